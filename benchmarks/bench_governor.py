@@ -0,0 +1,88 @@
+"""自适应画质：每一档固定不动时 step + draw 每帧的平均和 p95 工作时间，
+以及按帧率限速、敌人数突然暴涨又清空时 governor 的升降档过程。
+
+    python -m benchmarks.bench_governor
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import time
+import pygame
+from config.settings import *
+import headless
+from sprites.enemy import Enemy, spawn
+from utils.governor import QualityGovernor, LEVELS
+
+COUNTS = (500, 1500)
+FRAMES = 180
+SPIKE = 1500
+
+def make(variant, count, window=GOVERNOR_WINDOW):
+    game = headless.make_game(variant, seed=0)
+    game.governor = QualityGovernor(window=window)
+    spawn(Enemy, count, group=game.enemies)
+    game.invincible_until = 10 ** 9
+    return game
+
+def frames(game, count, fps=0):
+    """跑 count 帧，返回每帧工作时间（秒）；fps 不为 0 时按这个帧率限速。"""
+    governor = game.governor
+    script = headless.SCRIPTS["circle"]
+    clock = pygame.time.Clock()
+    work = []
+    for _ in range(count):
+        if fps:
+            clock.tick(fps)
+        governor.begin()
+        start = time.perf_counter()
+        game.step(script(game.sim_clock.frames, game))
+        if governor.should_draw():
+            game.draw(0.5 if governor.interpolate else 1.0)
+        work.append(time.perf_counter() - start)
+        if governor.end():
+            game.apply_quality()
+    return work
+
+def per_level(variant, count):
+    # 窗口足够大，测量时 governor 不会自己换档
+    game = make(variant, count, window=10 ** 9)
+    result = {}
+    for name in LEVELS:
+        game.governor.force(name)
+        game.apply_quality()
+        frames(game, 30)  # 预热，让 AI 调度器重新错开相位
+        work = sorted(frames(game, FRAMES))
+        result[name] = (sum(work) / len(work) * 1000, work[int(len(work) * 0.95)] * 1000)
+    return result
+
+def spike(variant):
+    game = make(variant, 0)
+    governor = game.governor
+    phases = []
+    for label, count, n in (("idle", 0, 120), ("spike", SPIKE, 600), ("calm", None, 900)):
+        if count:
+            spawn(Enemy, count, group=game.enemies)
+        elif count is None:
+            game.enemies.empty()
+        work = frames(game, n, FPS)
+        phases.append((label, sum(work) / n * 1000, governor.name))
+    return phases, governor
+
+def main():
+    print(f"frame budget {1000 / FPS:.1f} ms; mean / p95 work ms per frame with the level held fixed")
+    print(f"{'game':>6} {'enemies':>8} | " + " | ".join(f"{name:>13}" for name in LEVELS))
+    for variant in ("main", "main2"):
+        for count in COUNTS:
+            r = per_level(variant, count)
+            print(f"{variant:>6} {count:>8} | " + " | ".join(f"{r[n][0]:>6.2f} {r[n][1]:>6.2f}" for n in LEVELS))
+    for variant in ("main", "main2"):
+        phases, governor = spike(variant)
+        print(f"\n{variant}: paced at {FPS} fps, {SPIKE} enemies added then cleared")
+        for label, ms, name in phases:
+            print(f"  {label:<6} {ms:>6.2f} ms/frame, ends at {name}")
+        for d in governor.decisions:
+            print(f"  frame {d['frame']:>5}: {d['from']} -> {d['to']} ({d['work_ms']:.2f} ms, hold {d['hold']})")
+
+if __name__ == "__main__":
+    main()
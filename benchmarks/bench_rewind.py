@@ -0,0 +1,103 @@
+"""快照和回退：save_state 和压缩进 RewindBuffer 的耗时、回退（解出快照 + load_state）的耗时、
+快照原始大小和压缩后（关键帧、差）的大小、默认内存预算能存下多少秒，
+以及从快照恢复后重新模拟是否和原来一模一样。
+
+    python -m benchmarks.bench_rewind
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import time
+from config.settings import *
+import headless
+from sprites.enemy import Enemy, spawn
+from utils.replay import state_digest
+from utils.rewind import RewindBuffer, save_state, load_state
+
+COUNTS = (10, 100, 1000, 4000)
+TICKS = 600
+REPEATS = 5
+
+def make(count, swarm):
+    game = headless.make_game("main", swarm=swarm, seed=0)
+    game.activate()
+    spawn(Enemy, count, group=game.enemies)
+    game.invincible_until = 10 ** 9
+    return game
+
+def measure(count, swarm):
+    game = make(count, swarm)
+    script = headless.SCRIPTS["circle"]
+    buffer = RewindBuffer(budget=1 << 40)
+    keyframes = deltas = 0
+    before = 0
+    save_s = push_s = 0.0
+    for _ in range(TICKS):
+        game.step(script(game.sim_clock.frames, game))
+        frames = game.sim_clock.frames
+        if frames % REWIND_INTERVAL == 0:
+            start = time.perf_counter()
+            data = save_state(game)
+            middle = time.perf_counter()
+            new = len(buffer.groups)
+            buffer.push(frames, data)
+            save_s += middle - start
+            push_s += time.perf_counter() - middle
+            size = buffer.bytes - before
+            before = buffer.bytes
+            if len(buffer.groups) != new:
+                keyframes += size
+            else:
+                deltas += size
+    snapshots = TICKS // REWIND_INTERVAL
+    groups = len(buffer.groups)
+    # 最坏情况：回到最新一组的最后一个快照，要从关键帧开始把这一组的差全部应用一遍
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        load_state(game, buffer.rewind(buffer.newest))
+        best = min(best, time.perf_counter() - start)
+    per_second = buffer.bytes / (TICKS / FPS)
+    return {
+        'save_us': save_s / snapshots * 1e6,
+        'push_us': push_s / snapshots * 1e6,
+        'rewind_us': best * 1e6,
+        'raw': len(buffer.last),
+        'keyframe': keyframes / groups,
+        'delta': deltas / max(snapshots - groups, 1),
+        'seconds': REWIND_MEMORY_BYTES / per_second,
+    }
+
+def check(swarm):
+    """从一个快照恢复两次，各往后模拟 TICKS 个 tick，结果必须一样。"""
+    game = make(200, swarm)
+    script = headless.SCRIPTS["flee"]
+    for _ in range(TICKS // 2):
+        game.step(script(game.sim_clock.frames, game))
+    data = save_state(game)
+    digests = []
+    for _ in range(2):
+        load_state(game, data)
+        for _ in range(TICKS):
+            if game.step(script(game.sim_clock.frames, game)):
+                break
+        digests.append((game.sim_clock.frames, state_digest(game)))
+    return digests[0] == digests[1]
+
+def main():
+    print(f"snapshot every {REWIND_INTERVAL} ticks, keyframe every {REWIND_KEYFRAME_EVERY}, "
+          f"budget {REWIND_MEMORY_BYTES / 2**20:.0f} MiB")
+    print(f"{'enemies':>12} | {'save us':>8} {'push us':>8} {'rewind us':>10} | "
+          f"{'raw B':>8} {'key B':>8} {'delta B':>8} | {'seconds':>8}")
+    for swarm in (False, True):
+        for count in COUNTS:
+            r = measure(count, swarm)
+            label = f"{count}{' swarm' if swarm else ''}"
+            print(f"{label:>12} | {r['save_us']:>8.0f} {r['push_us']:>8.0f} {r['rewind_us']:>10.0f} | {r['raw']:>8} "
+                  f"{r['keyframe']:>8.0f} {r['delta']:>8.0f} | {r['seconds']:>8.0f}")
+    for swarm in (False, True):
+        print(f"restore is deterministic{' (swarm)' if swarm else ''}: {check(swarm)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""生成敌人的吞吐量：原来每个敌人现建坐标列表和巡逻点，对比共用的出生表和批量 spawn()。
+
+    python -m benchmarks.bench_spawn
+"""
+import time
+import pygame
+from config.settings import *
+from utils import rng
+from sprites.enemy import Enemy, ShootingEnemy, StrongEnemy, CopyEnemy, spawn
+from sprites.bullet import BulletPool
+
+COUNTS = (10, 100, 1000, 10000)
+REPEATS = 3
+
+class LegacyEnemy(Enemy):
+    """改动之前的做法，只用来对比。"""
+    def _init_position(self, pos=None):
+        rx = list(range(0, 301)) + list(range(500, SCREEN_WIDTH + 1))
+        ry = list(range(0, 201)) + list(range(400, SCREEN_HEIGHT + 1))
+        x, y = rng.choice(rx), rng.choice(ry)
+        self.rect = self.image.get_rect(center=(x, y))
+
+    def _init_movement(self):
+        super()._init_movement()
+        self.patrol_points = [(x, y) for x in range(0, SCREEN_WIDTH, 200)
+                              for y in range(0, SCREEN_HEIGHT, 200)]
+
+def legacy(count):
+    group = pygame.sprite.Group()
+    group.add(LegacyEnemy() for _ in range(count))
+
+def one_by_one(count):
+    group = pygame.sprite.Group()
+    group.add(Enemy() for _ in range(count))
+
+def bulk(count):
+    spawn(Enemy, count, group=pygame.sprite.Group())
+
+def rate(fn, count):
+    """最快一轮的每秒生成数。"""
+    best = min(_timed(fn, count) for _ in range(REPEATS))
+    return count / best
+
+def _timed(fn, count):
+    start = time.perf_counter()
+    fn(count)
+    return time.perf_counter() - start
+
+def main():
+    pygame.init()
+    bullets = BulletPool()
+    print(f"{'entities':>8} | {'legacy':>10} {'Enemy()':>10} {'spawn()':>10} | {'speedup':>7}   (enemies/s)")
+    for count in COUNTS:
+        old, single, batch = (rate(fn, count) for fn in (legacy, one_by_one, bulk))
+        print(f"{count:>8} | {old:>10.0f} {single:>10.0f} {batch:>10.0f} | {batch / old:>6.1f}x")
+    for cls in (ShootingEnemy, StrongEnemy, CopyEnemy):
+        per_sec = rate(lambda n: spawn(cls, n, group=pygame.sprite.Group(), bullet_pool=bullets), 10000)
+        print(f"spawn({cls.__name__}, 10000): {per_sec:.0f} enemies/s")
+
+if __name__ == "__main__":
+    main()
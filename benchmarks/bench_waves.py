@@ -0,0 +1,53 @@
+"""换关时的卡顿：同一关一次性生成所有敌人（原来的做法）和按 WAVE_SPAWNS_PER_TICK 分批进场，
+比较开局前几十个 tick 里最慢的一个 tick。
+
+    python -m benchmarks.bench_waves
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import time
+from config.settings import *
+import headless
+from sprites.waves import WaveSpawner, load_levels
+
+TICKS = 60
+REPEATS = 3
+
+def worst_tick(level, per_tick, swarm=False):
+    """开局 TICKS 个 tick（包括 init_game 本身）里最慢的一个，毫秒。"""
+    game = headless.make_game("main", swarm=swarm, seed=0, levels="horde")
+    total = game.levels[level - 1].total
+    worst = 0.0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        game.init_game(level, seed=0)
+        # init_game 已经按默认预算生成了第一批，这里换成要比较的预算重新开始这一关
+        game.enemies.empty()
+        game.waves = WaveSpawner(game.levels[level - 1], game.enemies, bullet_pool=game.bullets,
+                                 per_tick=per_tick or total)
+        game.waves.update()
+        times = [time.perf_counter() - start]
+        for _ in range(TICKS):
+            start = time.perf_counter()
+            game.step()
+            times.append(time.perf_counter() - start)
+        worst = max(worst, max(times) * 1000)
+    return worst
+
+def main():
+    start = time.perf_counter()
+    load_levels.cache_clear()
+    levels = load_levels("horde")
+    print(f"compiled {len(levels)} levels in {(time.perf_counter() - start) * 1000:.2f} ms")
+    print(f"{'level':>8} {'enemies':>8} | {'all at once':>12} {'streamed':>10}   (worst tick, ms)")
+    for swarm in (False, True):
+        for level in range(1, len(levels) + 1):
+            once = worst_tick(level, 0, swarm)
+            streamed = worst_tick(level, WAVE_SPAWNS_PER_TICK, swarm)
+            label = f"{level}{' swarm' if swarm else ''}"
+            print(f"{label:>8} {levels[level - 1].total:>8} | {once:>12.2f} {streamed:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""无窗口基准测试套件：敌人 update 单次调用、批量生成单个敌人、check_collisions / draw 随实体数的开销、各关整帧开销。
+
+    python -m benchmarks.suite                      # 跑全部，写 benchmarks/results.json 并和基线比较
+    python -m benchmarks.suite --only draw --quick
+    python -m benchmarks.suite --save-baseline      # 把这次结果存成新的基线
+
+所有数值都是微秒，取 REPEATS 轮里最快的一轮。每轮反复调用直到至少跑满 MIN_ROUND 秒，
+各项目的轮次交错着跑，这样每一项的最快一轮都是从整次运行里挑的，不会整项落在机器忙的那几秒里。
+和基线相比慢了超过 --threshold（默认 25%）的项目算回归，此时退出码为 1。
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import fnmatch
+import gc
+import json
+import platform
+import sys
+import time
+import numpy as np
+import pygame
+from config.settings import *
+import headless
+from sprites.enemy import Enemy, ShootingEnemy, StrongEnemy, CopyEnemy, spawn
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+RESULTS = os.path.join(HERE, "results.json")
+
+COUNTS = (10, 100, 1000, 10000)
+UPDATE_INSTANCES = 100
+REPEATS = 10
+MIN_ROUND = 0.1
+FRAMES = 10
+
+def timed_round(fn, min_time=MIN_ROUND):
+    """反复调用 fn() 直到计时部分累计满 min_time 秒，返回 (总耗时, 总调用次数)。
+    和 timeit 一样计时期间关掉垃圾回收，上万个精灵时一次全量回收就能抵好几帧。"""
+    total = calls = 0
+    gc.collect()
+    gc.disable()
+    try:
+        while total < min_time:
+            elapsed, n = fn()
+            total += elapsed
+            calls += n
+    finally:
+        gc.enable()
+    return total, calls
+
+# bench_* 做好准备工作，返回一个计时函数：调用一次返回 (耗时秒数, 调用次数)
+
+def bench_update(cls, frames=FRAMES):
+    game = headless.make_game("main", seed=0)
+    bullets = game.bullets
+    player = game.player.center
+
+    def run():
+        # 每次都从同样的敌人和时钟开始，轮次跑多少次都测的是同一段
+        game.activate()
+        game.sim_clock.reset()
+        game.rng.seed(0)
+        enemies = [cls(bullets) if cls is ShootingEnemy else cls() for _ in range(UPDATE_INSTANCES)]
+        start = time.perf_counter()
+        for _ in range(frames):
+            game.sim_clock.tick()
+            for enemy in enemies:
+                enemy.update(player)
+        elapsed = time.perf_counter() - start
+        bullets.clear()
+        return elapsed, frames * len(enemies)
+    return run
+
+def bench_spawn(count=1000):
+    game = headless.make_game("main", seed=0)
+
+    def run():
+        game.activate()
+        group = pygame.sprite.Group()
+        start = time.perf_counter()
+        spawn(Enemy, count, group=group)
+        return time.perf_counter() - start, count
+    return run
+
+def crowd(count, variant="main"):
+    """一局没有碰撞的游戏，场上有 count 个普通敌人（都在玩家周围的空白区外面）。"""
+    game = headless.make_game(variant, seed=count)
+    game.enemies.empty()
+    spawn(Enemy, count, group=game.enemies)
+    game.player_invincible = False
+    game.invincible_until = 0
+    return game
+
+def bench_collisions(count, frames=FRAMES):
+    game = crowd(count)
+    sprites = game.enemies.sprites()
+
+    def run():
+        game.activate()
+        elapsed = 0.0
+        for frame in range(frames):
+            # 每帧挪动一下，让网格有东西要同步（不计时）
+            step = 1 if frame % 2 else -1
+            for enemy in sprites:
+                enemy.rect.x += step
+            start = time.perf_counter()
+            game.check_collisions()
+            elapsed += time.perf_counter() - start
+        return elapsed, frames
+    return run
+
+def bench_draw(count, frames=FRAMES):
+    game = crowd(count)
+
+    def run():
+        game.activate()
+        start = time.perf_counter()
+        for _ in range(frames):
+            game.draw()
+        return time.perf_counter() - start, frames
+    return run
+
+def bench_frame(variant, level, frames=FRAMES * 6):
+    game = headless.make_game(variant, level, seed=0)
+    script = headless.flee_script
+
+    def run():
+        game.activate()
+        game.init_game(level, seed=0)
+        start = time.perf_counter()
+        for tick in range(frames):
+            if game.step(script(tick, game)) is not None:
+                game.init_game(level, seed=0)
+            game.draw()
+        return time.perf_counter() - start, frames
+    return run
+
+def benchmarks(quick=False):
+    """(名字, 准备函数) 列表；quick 时去掉 10,000 实体的项目。"""
+    counts = COUNTS[:-1] if quick else COUNTS
+    items = [(f"update.{cls.__name__}", lambda cls=cls: bench_update(cls))
+             for cls in (Enemy, ShootingEnemy, StrongEnemy, CopyEnemy)]
+    items.append(("spawn.Enemy", bench_spawn))
+    items += [(f"check_collisions.{n}", lambda n=n: bench_collisions(n)) for n in counts]
+    items += [(f"draw.{n}", lambda n=n: bench_draw(n)) for n in counts]
+    items += [(f"frame.{variant}.L{level}", lambda v=variant, l=level: bench_frame(v, l))
+              for variant in ("main", "main2") for level in (1, 2, 3)]
+    return items
+
+def run(only=None, quick=False, repeats=REPEATS):
+    timers = {name: setup() for name, setup in benchmarks(quick)
+              if not only or any(fnmatch.fnmatch(name, f"*{pattern}*") for pattern in only)}
+    best = dict.fromkeys(timers, float("inf"))
+    for _ in range(repeats):
+        for name, fn in timers.items():
+            elapsed, calls = timed_round(fn)
+            best[name] = min(best[name], elapsed / calls)
+    results = {}
+    for name, seconds in best.items():
+        results[name] = round(seconds * 1e6, 3)
+        print(f"{name:<28} {results[name]:>12.3f} us")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        'results': results,
+    }
+
+def compare(current, baseline, threshold):
+    """返回 [(名字, 基线, 当前, 变化比例, 是否回归)]，只比较两边都有的项目。"""
+    rows = []
+    for name, value in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        change = value / base - 1
+        rows.append((name, base, value, change, change > threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark suite")
+    parser.add_argument("--only", action="append", metavar="PATTERN", help="run benchmarks whose name contains PATTERN")
+    parser.add_argument("--quick", action="store_true", help="skip the 10,000-entity cases")
+    parser.add_argument("--output", default=RESULTS, help="where to write this run's JSON")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    current = run(args.only, args.quick)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    rows = compare(current, baseline, args.threshold)
+    print(f"\n{'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, base, value, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<28} {base:>12.3f} {value:>12.3f} {change:>+8.1%}{flag}")
+    regressions = sum(row[4] for row in rows)
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""录制工具：把 --capture 录下的 .gcap 文件导出成 PNG 序列，以及测录制对帧时间的影响。
+
+    python main.py --capture captures
+    python capture.py export captures/capture-20250101-120000-1234.gcap frames/
+    python capture.py bench --frames 300 --enemies 100 1000
+
+bench 按 RENDER_FPS 的节奏跑 headless 游戏并绘制，比较不录、在绘制里直接存 PNG（原来的做法）、
+后台 raw、后台 png 四种情况下游戏线程每帧的耗时、最慢的一帧，以及录下、丢掉的帧数。
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import shutil
+import tempfile
+import time
+import pygame
+from config.settings import *
+from utils.capture import FrameCapture, frames, save_png
+
+def export(path, out):
+    os.makedirs(out, exist_ok=True)
+    count = 0
+    for frame, seconds, rgb in frames(path):
+        save_png(rgb, os.path.join(out, f"frame-{frame:06d}.png"))
+        count += 1
+    print(f"exported {count} frames to {out}")
+
+class SyncCapture:
+    """对照组：在游戏线程里直接 pygame.image.save 每一帧。"""
+    enabled = True
+    def __init__(self, directory, fps=CAPTURE_FPS):
+        self.directory = directory
+        self.interval = 1 / fps if fps else 0.0
+        self.next_due = time.perf_counter()
+        self.frame = 0
+        self.written = 0
+        self.dropped = 0
+
+    def grab(self, surface):
+        now = time.perf_counter()
+        if now < self.next_due:
+            return
+        self.next_due = max(self.next_due + self.interval, now)
+        pygame.image.save(surface, os.path.join(self.directory, f"frame-{self.frame:06d}.png"))
+        self.frame += 1
+        self.written += 1
+
+    def close(self):
+        pass
+
+def run(enemies, mode, count, directory):
+    import headless
+    from sprites.enemy import Enemy, spawn
+    game = headless.make_game("main", seed=0)
+    game.activate()
+    spawn(Enemy, enemies, group=game.enemies)
+    game.invincible_until = 10 ** 9
+    if mode == "sync":
+        game.video = SyncCapture(directory)
+    elif mode != "off":
+        game.video = FrameCapture(game.screen, directory, mode)
+    script = headless.SCRIPTS["circle"]
+    frame_s = 1 / RENDER_FPS
+    busy = []
+    next_frame = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        game.step(script(game.sim_clock.frames, game))
+        game.draw()
+        end = time.perf_counter()
+        busy.append(end - start)
+        # 按渲染帧率等到下一帧，后台线程在这段时间里编码
+        next_frame += frame_s
+        if next_frame > end:
+            time.sleep(next_frame - end)
+        else:
+            next_frame = end
+    close_start = time.perf_counter()
+    game.video.close()
+    close_s = time.perf_counter() - close_start
+    result = {'mean_ms': sum(busy) / len(busy) * 1000, 'worst_ms': max(busy) * 1000, 'close_s': close_s,
+              'written': getattr(game.video, 'written', 0), 'dropped': getattr(game.video, 'dropped', 0)}
+    return result
+
+def bench(counts, count):
+    print(f"{count} frames paced at {RENDER_FPS} fps, capturing at {CAPTURE_FPS} fps "
+          f"with {CAPTURE_BUFFERS} buffers")
+    print(f"{'enemies':>8} {'mode':>5} | {'frame ms':>9} {'worst ms':>9} | {'written':>8} {'dropped':>8} {'flush s':>8}")
+    for enemies in counts:
+        for mode in ("off", "sync", "raw", "png"):
+            directory = tempfile.mkdtemp(prefix="capture-bench-")
+            try:
+                r = run(enemies, mode, count, directory)
+            finally:
+                shutil.rmtree(directory)
+            print(f"{enemies:>8} {mode:>5} | {r['mean_ms']:>9.2f} {r['worst_ms']:>9.2f} | "
+                  f"{r['written']:>8} {r['dropped']:>8} {r['close_s']:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="write every frame of a .gcap file as PNG")
+    p.add_argument("path")
+    p.add_argument("out")
+    p = sub.add_parser("bench", help="game-thread cost of each capture mode")
+    p.add_argument("--frames", type=int, default=300)
+    p.add_argument("--enemies", type=int, nargs="+", default=[100, 1000])
+    args = parser.parse_args()
+    if args.command == "export":
+        export(args.path, args.out)
+    else:
+        bench(args.enemies, args.frames)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 # Game settings
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-FPS = 60
+FPS = 60                # 模拟频率（每秒 tick 数）；所有速度都是每个 tick 移动的像素
+RENDER_FPS = 60         # 渲染帧率上限，0 表示不限，和模拟频率无关
+MAX_CATCHUP_STEPS = 5   # 一帧最多补几步模拟，落后更多就丢掉，避免越追越慢
+INTERPOLATE = True      # 渲染时在上一步和这一步的位置之间插值
 
 # Colors
 BLACK = (0, 0, 0)
@@ -45,4 +48,80 @@ POWERUP_INTERVAL = 10000  # milliseconds (10 seconds)
 # Combat settings
 ATTACK_RANGE = 200
 DISENGAGE_RANGE = 300
-SHOOT_COOLDOWN = 2000  # milliseconds
\ No newline at end of file
+SHOOT_COOLDOWN = 2000  # milliseconds
+
+# CopyEnemy replication
+COPY_ENEMY_BUDGET = 200  # 场上敌人总数上限，超出的复制会合并
+COPY_SPAWNS_PER_FRAME = 4
+COPY_MEMBERS_MAX = 8     # 一个合并体最多代表几个敌人；再多的复制直接丢掉
+ENV_MAX_ENEMIES = COPY_ENEMY_BUDGET  # env.py 观测里最多放几个敌人
+
+# Obstacles and flow-field pathfinding
+FLOW_CELL_SIZE = 20
+FLOW_FIELD_CACHE = 256  # 每个障碍物布局最多缓存多少个目标格子的流场
+# 静态障碍物布局 (x, y, w, h)，玩家出生的屏幕中间保持空着
+OBSTACLE_LAYOUTS = {
+    'none': (),
+    'pillars': ((170, 110, 60, 60), (570, 110, 60, 60), (170, 430, 60, 60), (570, 430, 60, 60)),
+    'walls': ((100, 150, 250, 20), (450, 430, 250, 20), (250, 230, 20, 170), (530, 200, 20, 170)),
+}
+OBSTACLE_LAYOUT = 'none'
+
+# Enemy AI level of detail (only used with --ai-lod)
+AI_NEAR_RADIUS = ATTACK_RANGE     # 这个距离以内的敌人每帧完整更新
+AI_FAR_INTERVAL = 4               # 远处的敌人每几帧完整更新一次
+AI_BUDGET_MS = None               # 远处敌人每帧最多用多少毫秒；None 表示不限
+
+# Asset manifest: name -> (kind, path relative to the project root, options)
+# 按顺序在后台线程里加载；lazy 的资源第一次用到时才排队加载
+ASSET_MANIFEST = {
+    'hit': ('sound', 'utils/sounds/hit.wav', {}),
+    'get': ('sound', 'utils/sounds/get.wav', {}),
+    'nice': ('sound', 'utils/sounds/nice.wav', {}),
+    'victory': ('sound', 'utils/sounds/victory.wav', {}),
+    'music': ('music', 'utils/sounds/music1.mp3', {'volume': 0.5, 'loops': -1}),
+}
+
+# Data-driven levels: levels/<name>.json, compiled into spawn schedules by sprites/waves.py
+LEVELS_DIR = 'levels'
+WAVE_SPAWNS_PER_TICK = 64  # 每个 tick 最多生成多少个敌人，大的波次分几帧陆续进场
+
+# Pipelined simulation/rendering (pipeline.py): capacity of each shared-memory snapshot
+PIPELINE_MAX_ENEMIES = 8192
+PIPELINE_MAX_BULLETS = 1024
+
+# Local multiplayer (server.py, utils/net.py)
+NET_PORT = 5555
+NET_SNAPSHOT_HZ = 30        # 服务器每秒发几次快照
+NET_HISTORY = 64            # 服务器和客户端各保留多少份快照用来做增量的基准
+NET_INPUT_REDUNDANCY = 8    # 每个输入包带上最近几帧的按键，丢几个包也不会丢输入
+NET_MTU = 1200              # 快照拆包后每个 UDP 包的最大负载
+NET_QUANTUM = 1             # 实体坐标的量化步长（像素）
+NET_MAX_PLAYERS = 8
+
+# Telemetry event stream (utils/telemetry.py, analytics.py)
+TELEMETRY_CAPACITY = 1 << 16          # 环形缓冲区能放多少条记录（2 的幂）
+TELEMETRY_FLUSH_S = 0.5               # 后台线程至少每隔这么久写一次
+TELEMETRY_FILE_BYTES = 64 * 1024 * 1024  # 单个文件超过这个大小就换下一个
+
+# Rewind (utils/rewind.py, --rewind): recent snapshots of the whole game under a memory budget
+REWIND_INTERVAL = 6                   # 每隔几个模拟 tick 存一个快照
+REWIND_KEYFRAME_EVERY = 30            # 每组快照的个数：第一个是完整的关键帧，其余的只存差
+REWIND_MEMORY_BYTES = 8 * 1024 * 1024 # 压缩后的快照总共最多占这么多内存
+REWIND_SECONDS = 3                    # 按一次退格回退多少秒
+
+# Gameplay capture (utils/capture.py, --capture): frames are copied into a buffer pool and encoded off the game thread
+CAPTURE_FORMAT = "raw"                # raw：一个异或差 + zlib 的 .gcap 文件；png：每帧一个 PNG
+CAPTURE_FPS = 30                      # 每秒最多抓几帧（按真实时间）
+CAPTURE_BUFFERS = 8                   # 缓冲池里的帧数，后台线程落后这么多帧时开始丢帧
+CAPTURE_LEVEL = 1                     # zlib 压缩级别
+CAPTURE_KEYFRAME_EVERY = 60           # raw 格式每隔几帧存一个完整的关键帧
+
+# Adaptive quality (utils/governor.py, --governor): degrade step by step when frames run over budget
+GOVERNOR_WINDOW = 30                  # 每攒够这么多帧的耗时做一次判断
+GOVERNOR_HIGH = 0.9                   # 平均工作时间超过预算的这个比例就降一档
+GOVERNOR_LOW = 0.5                    # 低于这个比例、并且稳定了 GOVERNOR_HOLD 帧才升一档
+GOVERNOR_HOLD = 120                   # 升档之前至少要在当前档位待多少帧
+GOVERNOR_HOLD_MAX = 1920              # 升档后又马上降回来时 hold 加倍，最多到这么多帧
+GOVERNOR_AI_INTERVAL = 8              # 降到 AI 这一档后远处的敌人每几帧完整更新一次
+GOVERNOR_HISTORY = 64                 # 保留最近多少次升降档记录
@@ -0,0 +1,351 @@
+"""Gym 风格的训练环境：reset()/step(action) 直接调用 Game.step，不做任何绘制。
+奖励从 Game 发出的遥测事件（击杀、换关、通关）里数，和游戏本身走的是同一套代码。
+
+观测是预分配的 float32 NumPy 数组（每次 step 原地改写，需要保留时请自行 copy）：
+    player   (5,)                 中心 x, 中心 y, 有能量, 无敌, 关卡
+    powerup  (3,)                 存在, 中心 x, 中心 y
+    enemies  (MAX_ENEMIES, 5)     存在, 中心 x, 中心 y, 种类, 血量/成员数
+                                  （按敌人组里的顺序取前 MAX_ENEMIES 个，放不下的个数在 info['hidden_enemies'] 里）
+    bullets  (MAX_BULLETS, 5)     存在, 中心 x, 中心 y, dx, dy（离玩家最近的优先）
+
+动作是 0..8 的整数：不动、上、下、左、右、左上、右上、左下、右下。
+
+VectorEnv 一次推进 N 局独立的游戏：workers=0 时在本进程里逐个推进，
+workers>0 时按分片交给子进程，观测、动作和奖励都放在共享内存里，不经过 pickle。
+
+    python env.py --envs 256 --workers 8 --steps 2000
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import pygame
+from config.settings import *
+from utils.keys import decode_keys
+from sprites.enemy import Enemy, ShootingEnemy, StrongEnemy, CopyEnemy
+from sprites.swarm import SwarmGroup, KIND_FSM
+from utils.telemetry import NULL_TELEMETRY, KILL, LEVEL, VICTORY
+
+# 默认等于复制的实体预算；关卡本身敌人更多时（例如 horde）多出来的不在观测里
+MAX_ENEMIES = ENV_MAX_ENEMIES
+MAX_BULLETS = 32
+
+# 动作 -> 按键位（W=1, A=2, S=4, D=8，与 utils.keys.GAME_KEYS 的顺序一致）
+ACTIONS = tuple(decode_keys(bits) for bits in (0, 1, 4, 2, 8, 1 | 2, 1 | 8, 4 | 2, 4 | 8))
+NUM_ACTIONS = len(ACTIONS)
+
+ENEMY_KINDS = {Enemy: 1, ShootingEnemy: 2, StrongEnemy: 3, CopyEnemy: 4}
+
+REWARD_KILL = 1.0
+REWARD_LEVEL = 5.0
+REWARD_DEATH = -5.0
+
+OBS_LAYOUT = (
+    ('player', (5,)),
+    ('powerup', (3,)),
+    ('enemies', (MAX_ENEMIES, 5)),
+    ('bullets', (MAX_BULLETS, 5)),
+)
+OBS_SIZE = sum(int(np.prod(shape)) for _, shape in OBS_LAYOUT)
+
+def obs_views(buffer):
+    """把形状为 (..., OBS_SIZE) 的 float32 缓冲区切成按名字访问的视图（不拷贝）。"""
+    lead = buffer.shape[:-1]
+    views = {}
+    start = 0
+    for name, shape in OBS_LAYOUT:
+        size = int(np.prod(shape))
+        views[name] = buffer[..., start:start + size].reshape(lead + shape)
+        start += size
+    return views
+
+def observe(game, obs):
+    """把当前局面写进 obs（obs_views 返回的字典），返回放不下、没有写进去的敌人数。"""
+    player = game.player
+    obs['player'][:] = (player.centerx, player.centery, game.player_has_power,
+                        game.player_invincible, game.current_level)
+    powerup = game.powerup
+    if powerup:
+        obs['powerup'][:] = (1.0, powerup.rect.centerx, powerup.rect.centery)
+    else:
+        obs['powerup'][:] = 0.0
+
+    enemies = obs['enemies']
+    enemies[:] = 0.0
+    group = game.enemies
+    n = 0
+    if isinstance(group, SwarmGroup):
+        # 受管敌人直接从数组里取，屏幕外的 rect 可能没同步
+        n = min(group.count, MAX_ENEMIES)
+        enemies[:n, 0] = 1.0
+        enemies[:n, 1] = group.x[:n] + group.half_w[:n]
+        enemies[:n, 2] = group.y[:n] + group.half_h[:n]
+        enemies[:n, 3] = np.where(group.kind[:n] == KIND_FSM, ENEMY_KINDS[Enemy],
+                                  np.where(group.copier[:n], ENEMY_KINDS[CopyEnemy], ENEMY_KINDS[StrongEnemy]))
+        enemies[:n, 4] = [getattr(s, 'hp', getattr(s, 'members', 1)) for s in group.slots[:n]]
+        others = group.unmanaged()
+    else:
+        others = group
+    for enemy in others:
+        if n >= MAX_ENEMIES:
+            break
+        enemies[n] = (1.0, enemy.rect.centerx, enemy.rect.centery, ENEMY_KINDS.get(type(enemy), 0),
+                      getattr(enemy, 'hp', getattr(enemy, 'members', 1)))
+        n += 1
+    hidden = len(group) - n
+
+    bullets = obs['bullets']
+    bullets[:] = 0.0
+    pool = game.bullets
+    live = pool.live()
+    half = pool.size / 2
+    if len(live) > MAX_BULLETS:
+        dist = (pool.x[live] + half - player.centerx) ** 2 + (pool.y[live] + half - player.centery) ** 2
+        live = live[np.argpartition(dist, MAX_BULLETS)[:MAX_BULLETS]]
+    m = len(live)
+    bullets[:m, 0] = 1.0
+    bullets[:m, 1] = pool.x[live] + half
+    bullets[:m, 2] = pool.y[live] + half
+    bullets[:m, 3] = pool.dx[live]
+    bullets[:m, 4] = pool.dy[live]
+    return hidden
+
+class RewardTracker:
+    """挂在 game.telemetry 上数这一步的击杀和换关，其余照常转给原来的 telemetry。"""
+    def __init__(self, inner=NULL_TELEMETRY):
+        self.inner = inner
+        self.kills = 0
+        self.levels = 0
+
+    def record(self, game, kind, pos, arg=0, value=0):
+        if kind == KILL:
+            self.kills += 1
+        elif kind == LEVEL or kind == VICTORY:
+            self.levels += 1
+        self.inner.record(game, kind, pos, arg, value)
+
+    def emit(self, *args, **kwargs):
+        self.inner.emit(*args, **kwargs)
+
+    def close(self):
+        self.inner.close()
+
+    @property
+    def enabled(self):
+        return self.inner.enabled
+
+class GameEnv:
+    """单局环境。buffer 是长度为 OBS_SIZE 的 float32 数组，不给时自己分配。"""
+    def __init__(self, variant="main", level=1, swarm=False, max_steps=FPS * 120,
+                 invincible_ms=1000, buffer=None, obstacles=OBSTACLE_LAYOUT):
+        import headless
+        self.game = headless.make_game(variant, level, swarm, obstacles=obstacles)
+        self.rewards = self.game.telemetry = RewardTracker(self.game.telemetry)
+        self.level = level
+        self.max_steps = max_steps
+        self.invincible_ms = invincible_ms
+        self.buffer = np.zeros(OBS_SIZE, dtype=np.float32) if buffer is None else buffer
+        self.obs = obs_views(self.buffer)
+        self.steps = 0
+
+    def reset(self, seed=None, level=None):
+        """开始新的一局；seed 为 None 时从这局游戏自己的随机源取种子。返回 (obs, info)。"""
+        game = self.game
+        game.activate()
+        game.init_game(self.level if level is None else level, seed=seed, invincible_ms=self.invincible_ms)
+        self.steps = 0
+        hidden = observe(game, self.obs)
+        return self.obs, {'seed': game.seed, 'hidden_enemies': hidden}
+
+    def step(self, action):
+        """推进一帧，返回 (obs, reward, terminated, truncated, info)，与 Game.step 的顺序相同。"""
+        tracker = self.rewards
+        tracker.kills = tracker.levels = 0
+        outcome = self.game.step(ACTIONS[action])
+        reward = tracker.kills * REWARD_KILL + tracker.levels * REWARD_LEVEL
+        if outcome == "game_over":
+            reward += REWARD_DEATH
+        self.steps += 1
+        terminated = outcome is not None
+        truncated = not terminated and self.steps >= self.max_steps
+        hidden = observe(self.game, self.obs)
+        return self.obs, reward, terminated, truncated, {'outcome': outcome or ("timeout" if truncated else None),
+                                                         'hidden_enemies': hidden}
+
+def _step_shard(envs, offset, actions, rewards, terminated, truncated):
+    """推进一组环境并原地写结果；结束的局自动重开。
+    返回 ([(序号, 结局, 步数, 关卡)], {序号: 结束时观测的拷贝})，重开会改写共享的观测行，所以先拷贝。"""
+    finished = []
+    final = {}
+    for i, env in enumerate(envs, offset):
+        _, rewards[i], terminated[i], truncated[i], info = env.step(actions[i])
+        if terminated[i] or truncated[i]:
+            finished.append((i, info['outcome'], env.steps, env.game.current_level))
+            final[i] = env.buffer.copy()
+            env.reset()
+    return finished, final
+
+def _shared(shape, dtype, name=None):
+    size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    if name is None:
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    else:
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _worker(conn, names, num_envs, start, stop, options):
+    blocks = [_shared(shape, dtype, name) for name, (shape, dtype) in zip(names, _arrays(num_envs))]
+    obs, actions, rewards, terminated, truncated = (array for _, array in blocks)
+    envs = []
+    try:
+        envs = [GameEnv(buffer=obs[i], **options) for i in range(start, stop)]
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "reset":
+                for i, env in enumerate(envs, start):
+                    env.reset(None if arg is None else arg + i)
+                conn.send(None)
+            elif cmd == "step":
+                conn.send(_step_shard(envs, start, actions, rewards, terminated, truncated))
+            else:
+                break
+    finally:
+        # 共享内存被数组引用着时不能 close
+        del envs, obs, actions, rewards, terminated, truncated
+        for shm, _ in blocks:
+            shm.close()
+        conn.close()
+
+def _arrays(num_envs):
+    return (((num_envs, OBS_SIZE), np.float32),
+            ((num_envs,), np.int64),
+            ((num_envs,), np.float32),
+            ((num_envs,), np.bool_),
+            ((num_envs,), np.bool_))
+
+class VectorEnv:
+    """同时推进 num_envs 局游戏。结束的局在 step 里自动重开，info['episodes'] 列出本步结束的局，
+    返回的 obs 里这些局已经是新一局的第一帧；结束时的观测在 info['final_obs'][序号] 里
+    （长度 OBS_SIZE 的拷贝，用 obs_views 按名字访问），超时截断后要自举的可以用它。
+
+    workers=0 时全部在本进程里跑；否则分成 workers 片，每片一个子进程。
+    """
+    def __init__(self, num_envs, variant="main", level=1, swarm=False, max_steps=FPS * 120,
+                 workers=0, obstacles=OBSTACLE_LAYOUT):
+        self.num_envs = num_envs
+        options = {'variant': variant, 'level': level, 'swarm': swarm, 'max_steps': max_steps,
+                   'obstacles': obstacles}
+        self.workers = min(workers, num_envs)
+        self.blocks = []
+        self.conns = []
+        self.processes = []
+        if self.workers:
+            self.blocks = [_shared(shape, dtype) for shape, dtype in _arrays(num_envs)]
+            arrays = [array for _, array in self.blocks]
+            names = [shm.name for shm, _ in self.blocks]
+            bounds = np.linspace(0, num_envs, self.workers + 1).astype(int)
+            for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+                parent, child = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=_worker, args=(child, names, num_envs, start, stop, options), daemon=True)
+                process.start()
+                child.close()
+                self.conns.append(parent)
+                self.processes.append(process)
+            self.envs = []
+        else:
+            arrays = [np.zeros(shape, dtype=dtype) for shape, dtype in _arrays(num_envs)]
+            self.envs = [GameEnv(buffer=arrays[0][i], **options) for i in range(num_envs)]
+        self.buffer, self.actions, self.rewards, self.terminated, self.truncated = arrays
+        self.obs = obs_views(self.buffer)
+        self.steps = 0
+        self.wall = 0.0
+
+    def reset(self, seed=None):
+        """重开所有局；给定 seed 时第 i 局用 seed + i。返回 (obs, info)。"""
+        if self.workers:
+            for conn in self.conns:
+                conn.send(("reset", seed))
+            for conn in self.conns:
+                conn.recv()
+        else:
+            for i, env in enumerate(self.envs):
+                env.reset(None if seed is None else seed + i)
+        return self.obs, {}
+
+    def step(self, actions):
+        """actions 是长度为 num_envs 的整数数组，返回 (obs, rewards, terminated, truncated, info)。"""
+        start = time.perf_counter()
+        self.actions[:] = actions
+        if self.workers:
+            for conn in self.conns:
+                conn.send(("step", None))
+            finished = []
+            final = {}
+            for conn in self.conns:
+                shard, shard_final = conn.recv()
+                finished.extend(shard)
+                final.update(shard_final)
+        else:
+            finished, final = _step_shard(self.envs, 0, self.actions, self.rewards, self.terminated, self.truncated)
+        self.wall += time.perf_counter() - start
+        self.steps += self.num_envs
+        return self.obs, self.rewards, self.terminated, self.truncated, {'episodes': finished, 'final_obs': final}
+
+    def steps_per_sec(self):
+        """到目前为止每秒推进的单局帧数（所有局加起来）。"""
+        return self.steps / self.wall if self.wall > 0 else 0.0
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(("close", None))
+        # 子进程里 SDL 接管了 SIGTERM，不能 terminate，只能等它自己退出
+        for process in self.processes:
+            process.join()
+        for conn in self.conns:
+            conn.close()
+        self.conns = []
+        self.processes = []
+        self.buffer = self.actions = self.rewards = self.terminated = self.truncated = self.obs = None
+        for shm, _ in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Step many games with random actions and report steps/sec")
+    parser.add_argument("--game", default="main", choices=["main", "main2"])
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--envs", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=0, help="0 = step all games in this process")
+    parser.add_argument("--steps", type=int, default=1000, help="batched steps to run")
+    parser.add_argument("--swarm", action="store_true", help="use the NumPy enemy swarm backend")
+    parser.add_argument("--obstacles", default=OBSTACLE_LAYOUT, choices=sorted(OBSTACLE_LAYOUTS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    episodes = 0
+    with VectorEnv(args.envs, args.game, args.level, args.swarm, workers=args.workers,
+                   obstacles=args.obstacles) as env:
+        env.reset(args.seed)
+        for _ in range(args.steps):
+            _, _, _, _, info = env.step(rng.integers(NUM_ACTIONS, size=args.envs))
+            episodes += len(info['episodes'])
+        print(f"{env.steps} steps across {args.envs} games ({args.workers or 'no'} workers) "
+              f"in {env.wall:.2f}s: {env.steps_per_sec():.0f} steps/s, {episodes} episodes finished")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""无窗口快进模拟：用模拟时钟和脚本输入驱动 Game，用于回归测试和数值平衡。
+
+    python headless.py --game main2 --level 1 --ticks 100000 --script circle
+    python headless.py --seed 42 --record replays/
+    python headless.py --replay replays/main-L1-0000002a.rpl
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import importlib
+import math
+import time
+import pygame
+from config.settings import *
+from utils.keys import KeyState
+from utils.replay import Replay, state_digest
+
+IDLE = KeyState()
+
+def idle_script(tick, game):
+    return IDLE
+
+def circle_script(tick, game):
+    # 每 30 帧换一个方向，绕着屏幕兜圈子
+    order = (pygame.K_d, pygame.K_s, pygame.K_a, pygame.K_w)
+    return KeyState((order[(tick // 30) % 4],))
+
+def flee_script(tick, game):
+    # 远离最近的敌人，拿到能量后反过来冲向它
+    if not game.enemies:
+        return IDLE
+    px, py = game.player.center
+    nearest = min(game.enemies, key=lambda e: math.hypot(e.rect.centerx - px, e.rect.centery - py))
+    dx = nearest.rect.centerx - px
+    dy = nearest.rect.centery - py
+    if not game.player_has_power:
+        dx, dy = -dx, -dy
+    keys = []
+    if dx > 0: keys.append(pygame.K_d)
+    if dx < 0: keys.append(pygame.K_a)
+    if dy > 0: keys.append(pygame.K_s)
+    if dy < 0: keys.append(pygame.K_w)
+    return KeyState(keys)
+
+SCRIPTS = {'idle': idle_script, 'circle': circle_script, 'flee': flee_script}
+
+def make_game(game_module="main", level=1, swarm=False, seed=None, invincible_ms=1000, record_dir=None,
+              obstacles=OBSTACLE_LAYOUT, lod=False, levels=None, telemetry=None, sim_hz=FPS):
+    """创建一个 headless 的 Game（main 或 main2），直接进入指定关卡。
+    给定 seed 时这一局完全可复现；levels 是 levels/ 下的关卡文件名，默认和游戏同名；
+    sim_hz 是模拟频率（流水线模式的子进程要和主进程的 FixedStep 一致）；
+    telemetry 是遥测事件的输出目录，跑完要调用 game.telemetry.close()。"""
+    module = importlib.import_module(game_module)
+    game = module.Game(headless=True, swarm=swarm, seed=seed, record_dir=record_dir, obstacles=obstacles,
+                       lod=lod, levels=levels, telemetry=telemetry, sim_hz=sim_hz)
+    game.init_game(level, seed=seed, invincible_ms=invincible_ms)
+    if hasattr(game, "state"):
+        game.state = "playing"
+    return game
+
+class HeadlessRunner:
+    def __init__(self, game, script=idle_script):
+        self.game = game
+        self.script = script
+        self.tick = 0
+
+    def step(self):
+        keys = self.script(self.tick, self.game)
+        self.tick += 1
+        return self.game.step(keys)
+
+    def run(self, max_ticks):
+        """跑到游戏结束、胜利或 max_ticks 为止，返回本次结果。"""
+        start = time.perf_counter()
+        outcome = None
+        while outcome is None and self.tick < max_ticks:
+            outcome = self.step()
+        wall = time.perf_counter() - start
+        outcome = outcome or "timeout"
+        return {
+            'outcome': outcome,
+            'ticks': self.tick,
+            'level': self.game.current_level,
+            'sim_ms': self.game.sim_clock.get_ticks(),
+            'wall_s': wall,
+            'ticks_per_sec': self.tick / wall if wall > 0 else float('inf'),
+            'replay': self.game.save_replay(outcome),
+            'ai': self.game.ai.stats() if self.game.ai is not None else None,
+        }
+
+def resimulate(replay):
+    """按回放里的按键全速重新模拟，返回结果以及是否与录制时完全一致。"""
+    game = make_game(replay.variant, replay.level, replay.swarm, replay.seed, replay.invincible_ms,
+                     obstacles=replay.obstacles, lod=replay.lod)
+    start = time.perf_counter()
+    outcome = None
+    ticks = 0
+    for keys in replay.keys():
+        ticks += 1
+        outcome = game.step(keys)
+        if outcome is not None:
+            break
+    wall = time.perf_counter() - start
+    # 录制时是中途退出或超时的，模拟完所有按键也不会有结果
+    outcome = outcome or replay.outcome
+    digest = state_digest(game)
+    return {
+        'outcome': outcome,
+        'ticks': ticks,
+        'level': game.current_level,
+        'sim_ms': game.sim_clock.get_ticks(),
+        'wall_s': wall,
+        'ticks_per_sec': ticks / wall if wall > 0 else float('inf'),
+        'match': (outcome, ticks, digest) == (replay.outcome, replay.ticks, replay.digest),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game headless at full speed")
+    parser.add_argument("--game", default="main", choices=["main", "main2"])
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--ticks", type=int, default=FPS * 60)
+    parser.add_argument("--script", default="flee", choices=sorted(SCRIPTS))
+    parser.add_argument("--swarm", action="store_true", help="use the NumPy enemy swarm backend")
+    parser.add_argument("--seed", type=int, default=None, help="seed for a reproducible run")
+    parser.add_argument("--record", metavar="DIR", default=None, help="save a replay of the run into DIR")
+    parser.add_argument("--obstacles", default=OBSTACLE_LAYOUT, choices=sorted(OBSTACLE_LAYOUTS))
+    parser.add_argument("--ai-lod", action="store_true", help="update distant and patrolling enemies every few frames")
+    parser.add_argument("--levels", metavar="NAME", default=None, help="level file levels/NAME.json (default: same as --game)")
+    parser.add_argument("--telemetry", metavar="DIR", default=None, help="write gameplay events to DIR")
+    parser.add_argument("--replay", metavar="FILE", default=None, help="re-simulate a recorded replay")
+    args = parser.parse_args()
+    if args.record and args.levels:
+        # 回放里只记了游戏名，重新模拟时用默认的关卡文件
+        parser.error("--record needs the default --levels")
+    if args.replay and args.telemetry:
+        parser.error("--telemetry records a new run, not a --replay")
+
+    if args.replay:
+        result = resimulate(Replay.load(args.replay))
+    else:
+        game = make_game(args.game, args.level, args.swarm, args.seed, record_dir=args.record,
+                         obstacles=args.obstacles, lod=args.ai_lod, levels=args.levels, telemetry=args.telemetry)
+        result = HeadlessRunner(game, SCRIPTS[args.script]).run(args.ticks)
+        game.telemetry.close()
+    print(f"{result['outcome']} at tick {result['ticks']} (level {result['level']}, "
+          f"{result['sim_ms'] / 1000:.1f}s simulated in {result['wall_s']:.3f}s, "
+          f"{result['ticks_per_sec']:.0f} ticks/s)")
+    if result.get('ai'):
+        ai = result['ai']
+        print(f"AI LOD: {ai['updated']} full updates, {ai['skipped']} skipped, {ai['deferred']} deferred "
+              f"({ai['skip_ratio']:.0%} extrapolated)")
+    if result.get('replay'):
+        print(f"replay saved to {result['replay']}")
+    if 'match' in result:
+        print("replay matches recording" if result['match'] else "REPLAY DIVERGED from recording")
+    if args.telemetry:
+        stats = game.telemetry.stats()
+        print(f"telemetry: {stats['written']} events in {len(stats['files'])} file(s), {stats['dropped']} dropped")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,139 @@
+import os
+import random
 import pygame
 from config.settings import *
-from utils.sound import load_sounds
-from sprites.enemy import Enemy, ShootingEnemy, StrongEnemy
+from utils.sound import load_sounds, silent_sounds
+from utils.assets import StartupTimer
+from utils.clock import SimClock, FixedStep, use_clock, get_ticks
+from utils.interpolation import Snapshot
+from utils.rng import use_rng
+from utils.replay import ReplayRecorder, state_digest
+from utils.spatial_hash import SpatialHash
+from utils.flowfield import Pathfinder, obstacle_map, use_pathfinder
+from utils.render import DirtyRenderer
+from utils.capture import FrameCapture, NULL_CAPTURE
+from utils.governor import QualityGovernor, NULL_GOVERNOR, LEVELS
+from utils.rewind import RewindBuffer, save_state, load_state
+from utils.telemetry import (Telemetry, NULL_TELEMETRY, POWERUP, STRONG_HIT, KILL, BULLET_HIT,
+                             LEVEL, DEATH, VICTORY, QUALITY, BULLET, kind_code, health)
+from utils.profiler import FrameProfiler, NULL_PROFILER, WAIT, INPUT, UPDATE, COLLISIONS, DRAW, PRESENT
+from utils.screens import IdleMeter, message_screen
+from sprites.enemy import ShootingEnemy, StrongEnemy
 from sprites.powerup import Powerup
+from sprites.images import set_enemy_border
+from sprites.waves import WaveSpawner, load_levels
+from sprites.bullet import BulletPool
+from sprites.lod import AIScheduler
+from sprites.swarm import SwarmGroup, make_enemy_group
 
 class Game:
-    def __init__(self):
+    # 回放文件里用来区分 main.py / main2.py
+    variant = "main"
+
+    def __init__(self, headless=False, swarm=False, seed=None, record_dir=None, profile=False,
+                 obstacles=OBSTACLE_LAYOUT, lod=False, sim_hz=FPS, render_hz=RENDER_FPS, levels=None,
+                 telemetry=None, rewind=False, capture=None, capture_format=CAPTURE_FORMAT,
+                 governor=False):
+        """headless=True 时不打开窗口、不加载声音，也不限制帧率；
+        swarm=True 时用 NumPy 批量更新普通敌人、强敌和复制敌人；
+        seed 固定本局的随机数，record_dir 不为 None 时把每一局的按键记录成回放文件；
+        profile=True 时记录每帧各阶段耗时，F3 开关叠加层；
+        obstacles 是 OBSTACLE_LAYOUTS 里的布局名，有障碍物时追击的敌人沿共享流场绕行；
+        lod=True 时远处和巡逻中的敌人隔几帧才完整更新一次（AIScheduler）；
+        sim_hz 是固定的模拟频率，render_hz 是渲染帧率上限（0 不限），两者互不影响；
+        levels 是 levels/ 下的关卡文件名，默认和 variant 同名；
+        telemetry 是目录名时把拾取、击杀、死亡、换关等事件写成二进制事件流（utils/telemetry.py）；
+        rewind=True 时每 REWIND_INTERVAL 个 tick 存一个快照，按退格键（死亡画面上也可以）回退 REWIND_SECONDS 秒；
+        capture 是目录名时把游戏画面录下来，在后台线程里编码成 capture_format（utils/capture.py）；
+        governor=True 时帧时间超出预算就逐档降低画质，负载下来后再升回去（utils/governor.py）。"""
+        self.startup = StartupTimer()
+        self.headless = headless
+        self.swarm = swarm
         pygame.init()
-        pygame.mixer.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        if headless:
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            self.sounds = silent_sounds()
+        else:
+            pygame.mixer.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            # 声音在后台线程里加载，不拖慢第一帧
+            self.sounds = load_sounds()
         self.clock = pygame.time.Clock()
-        self.sounds = load_sounds()
+        # 模拟时间按帧推进，和真实时间无关，这样同样的输入总能得到同样的结果
+        self.sim_clock = SimClock(sim_hz)
+        self.fixed = FixedStep(sim_hz)
+        self.render_hz = render_hz
+        # 渲染频率和模拟频率不同步，画的时候在上一步和这一步之间插值
+        self.interpolate = INTERPOLATE and not headless
+        self.snapshot = Snapshot()
+        self.rng = random.Random(seed)
+        self.layout = obstacles
+        self.obstacles = obstacle_map(obstacles)
+        self.pathfinder = Pathfinder(self.obstacles) if self.obstacles else None
+        self.lod = lod
+        self.levels = load_levels(levels or self.variant)
+        self.record_dir = record_dir
+        self.recorder = None
+        self.activate()
+        self.renderer = DirtyRenderer(self.screen, display=not headless)
+        self.video = FrameCapture(self.screen, capture, capture_format) if capture else NULL_CAPTURE
+        self.idle_meter = IdleMeter()
+        self.profiler = FrameProfiler() if profile else NULL_PROFILER
+        self.telemetry = Telemetry(telemetry) if telemetry else NULL_TELEMETRY
+        self.rewinder = RewindBuffer() if rewind else None
+        # 录回放时不用 far-ai 这一档：它按机器快慢改变模拟结果，回放就对不上了
+        allowed = LEVELS if record_dir is None else tuple(name for name in LEVELS if name != "far-ai")
+        self.governor = QualityGovernor(1000 / (render_hz or FPS), allowed) if governor else NULL_GOVERNOR
+        # 敌人贴图不带边框
+        set_enemy_border(None)
         self.init_game()
 
-    def init_game(self, level=1):
-        """增加 level 参数，用于控制重开的关卡。"""
+    def activate(self):
+        """让精灵使用这一局的模拟时钟和随机源（同一进程里有多局游戏时要先调用）。"""
+        use_clock(self.sim_clock)
+        use_rng(self.rng)
+        use_pathfinder(self.pathfinder)
+
+    def init_game(self, level=1, seed=None, invincible_ms=1000):
+        """增加 level 参数，用于控制重开的关卡。
+        每一局从 seed 重新播种并把模拟时钟归零；seed 为 None 时从本局的随机源取一个。"""
+        if seed is None:
+            seed = self.rng.getrandbits(32)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.sim_clock.reset()
+        self.snapshot.clear()
+        if self.rewinder is not None:
+            self.rewinder.clear()
         self.current_level = level
         self.player = pygame.Rect(SCREEN_WIDTH//2, SCREEN_HEIGHT//2, PLAYER_SIZE, PLAYER_SIZE)
-        self.enemies = pygame.sprite.Group()
+        self.enemies = make_enemy_group(self.swarm)
+        self.grid = SpatialHash()
+        self.ai = AIScheduler() if self.lod else None
+        self.apply_quality()
+        self.bullets = BulletPool()
         self.spawn_enemies(self.current_level)
         self.powerup = Powerup()
         self.player_has_power = False
-        self.next_powerup_time = pygame.time.get_ticks() + POWERUP_INTERVAL
+        self.next_powerup_time = get_ticks() + POWERUP_INTERVAL
         #增加无敌帧
         self.player_invincible = True
-        self.invincible_until = 1000
+        self.invincible_until = invincible_ms
+        if self.record_dir is not None:
+            self.recorder = ReplayRecorder(self.variant, level, seed, invincible_ms, self.swarm, self.layout, self.lod)
 
     def spawn_enemies(self, level=1):
-        if level == 1:
-            # 仅生成普通敌人
-            self.enemies.add(Enemy() for _ in range(1))
-            self.enemies.add(ShootingEnemy() for _ in range(1))
-            self.enemies.add(StrongEnemy() for _ in range(1))
-        elif level == 2:
-            # 生成普通敌人 + 射击敌人
-            self.enemies.add(Enemy() for _ in range(1))
-            self.enemies.add(ShootingEnemy() for _ in range(1))
-        elif level == 3:
-            # 生成普通敌人 + 射击敌人 + 强敌
-            self.enemies.add(Enemy() for _ in range(1))
-            self.enemies.add(ShootingEnemy() for _ in range(1))
-            self.enemies.add(StrongEnemy() for _ in range(1))
-
-    def handle_input(self):
-        keys = pygame.key.get_pressed()
+        """按关卡数据开始生成第 level 关；到时间的第一批立即生成，其余的在 update 里分批进场。"""
+        self.waves = WaveSpawner(self.levels[level - 1], self.enemies, bullet_pool=self.bullets)
+        self.waves.update()
+
+    def handle_input(self, keys=None):
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        if self.recorder is not None:
+            self.recorder.record(keys)
         speed = PLAYER_SPRINT_SPEED if self.player_has_power else PLAYER_SPEED
+        old = self.player.topleft
         
         if keys[pygame.K_w]: self.player.y -= speed
         if keys[pygame.K_s]: self.player.y += speed
@@ -52,193 +141,350 @@ class Game:
         if keys[pygame.K_d]: self.player.x += speed
         
         self.player.clamp_ip(self.screen.get_rect())
+        if self.obstacles:
+            self.obstacles.resolve(old, self.player)
 
     def update(self):
+        self.waves.update()
         if self.powerup:
             self.powerup.update()
 
         # Check powerup collection
         if self.powerup and self.player.colliderect(self.powerup.rect):
             self.player_has_power = True
+            self.telemetry.record(self, POWERUP, self.powerup.rect.center)
             if self.sounds['get']:
                 self.sounds['get'].play()
             self.powerup = None
 
         # Spawn new powerup
         if not self.powerup and not self.player_has_power:
-            current_time = pygame.time.get_ticks()
+            current_time = get_ticks()
             if current_time >= self.next_powerup_time: #if 
                 self.powerup = Powerup()
                 self.next_powerup_time = current_time + POWERUP_INTERVAL
 
-        # Update enemies
-        for enemy in self.enemies:
-            if isinstance(enemy, ShootingEnemy):
-                enemy.update(self.player.center, self.player_has_power)
-            else:
-                enemy.update(self.player.center)
+        # Update enemies（玩家换了格子才换流场）
+        if self.pathfinder:
+            self.pathfinder.update(self.player.center)
+        enemies = self.enemies
+        if isinstance(enemies, SwarmGroup):
+            enemies.step(self.player.center)
+            enemies.sync_rects(self.screen.get_rect())
+            enemies = enemies.unmanaged()
+        if self.ai is not None:
+            self.ai.update(enemies, self.player.center, self.player_has_power)
+        else:
+            for enemy in enemies:
+                if isinstance(enemy, ShootingEnemy):
+                    enemy.update(self.player.center, self.player_has_power)
+                else:
+                    enemy.update(self.player.center)
+        self.bullets.update()
 
     def check_collisions(self):
-        current_time = pygame.time.get_ticks()
+        current_time = get_ticks()
         # 如果玩家处于无敌状态则跳过碰撞检测
         if self.player_invincible and current_time < self.invincible_until:
             return False
         
         self.player_invincible = False #重要一步，否则无敌状态会一直保持
 
-        for enemy in self.enemies.copy():
-            if self.player.colliderect(enemy.rect):
-                if isinstance(enemy, StrongEnemy):#检查和强敌的碰撞
-                    if self.player_has_power:
-                        if self.sounds['nice']:
-                            self.sounds['nice'].play()
-                        # 当 StrongEnemy 受到碰撞时调用 hit() 方法
-                        if enemy.hit():
-                            self.enemies.remove(enemy)
-                        self.player_has_power = False
-                        #self.powerup = Powerup() # if add this the powerup will appear once the enemy is killed
-                        self.next_powerup_time = current_time + POWERUP_INTERVAL
-                        # 设置无敌状态，给予玩家反应时间
-                        self.player_invincible = True
-                        self.invincible_until = current_time + 200
-                    else:
-                        return True  # Game Over
-                else:#检查和普通敌人的碰撞
-                    if self.player_has_power:
-                        if self.sounds['nice']:
-                            self.sounds['nice'].play()
+        # 只检查玩家附近格子里的敌人
+        self.grid.sync(self.enemies)
+        for enemy in self.grid.query(self.player):
+            if not self.player.colliderect(enemy.rect):
+                continue
+            if isinstance(enemy, StrongEnemy):#检查和强敌的碰撞
+                if self.player_has_power:
+                    if self.sounds['nice']:
+                        self.sounds['nice'].play()
+                    # 当 StrongEnemy 受到碰撞时调用 hit() 方法
+                    killed = enemy.hit()
+                    self.telemetry.record(self, STRONG_HIT, enemy.rect.center, kind_code(enemy), health(enemy))
+                    if killed:
+                        self.telemetry.record(self, KILL, enemy.rect.center, kind_code(enemy), len(self.enemies) - 1)
                         self.enemies.remove(enemy)
-                        self.player_has_power = False
-                        #self.powerup = Powerup()
-                        self.next_powerup_time = current_time + POWERUP_INTERVAL
-                        self.player_invincible = True
-                        self.invincible_until = current_time + 200
-                    else:
-                        return True  # Game Over
-
-            if isinstance(enemy, ShootingEnemy):#检查和射击敌人子弹的碰撞
-                for bullet in enemy.bullets.copy():
-                    if self.player.colliderect(bullet.rect):
-                        if self.player_has_power:
-                            if self.sounds['nice']:
-                                self.sounds['nice'].play()
-                            bullet.kill()
-                            self.player_has_power = False
-                            #self.powerup = Powerup()
-                            self.next_powerup_time = current_time + POWERUP_INTERVAL
-                            self.player_invincible = True
-                            self.invincible_until = current_time + 200
-                        else:
-                            return True  # Game Over
+                    self.player_has_power = False
+                    #self.powerup = Powerup() # if add this the powerup will appear once the enemy is killed
+                    self.next_powerup_time = current_time + POWERUP_INTERVAL
+                    # 设置无敌状态，给予玩家反应时间
+                    self.player_invincible = True
+                    self.invincible_until = current_time + 200
+                else:
+                    self.telemetry.record(self, DEATH, self.player.center, kind_code(enemy), len(self.enemies))
+                    return True  # Game Over
+            else:#检查和普通敌人的碰撞
+                if self.player_has_power:
+                    if self.sounds['nice']:
+                        self.sounds['nice'].play()
+                    self.telemetry.record(self, KILL, enemy.rect.center, kind_code(enemy), len(self.enemies) - 1)
+                    self.enemies.remove(enemy)
+                    self.player_has_power = False
+                    #self.powerup = Powerup()
+                    self.next_powerup_time = current_time + POWERUP_INTERVAL
+                    self.player_invincible = True
+                    self.invincible_until = current_time + 200
+                else:
+                    self.telemetry.record(self, DEATH, self.player.center, kind_code(enemy), len(self.enemies))
+                    return True  # Game Over
+
+        for bullet in self.bullets.collide(self.player):#检查和射击敌人子弹的碰撞
+            if self.player_has_power:
+                if self.sounds['nice']:
+                    self.sounds['nice'].play()
+                self.telemetry.record(self, BULLET_HIT, self.player.center)
+                self.bullets.kill(bullet)
+                self.player_has_power = False
+                #self.powerup = Powerup()
+                self.next_powerup_time = current_time + POWERUP_INTERVAL
+                self.player_invincible = True
+                self.invincible_until = current_time + 200
+            else:
+                self.telemetry.record(self, DEATH, self.player.center, BULLET, len(self.enemies))
+                return True  # Game Over
         return False
 
-    def draw(self):
-        self.screen.fill(BLACK)
+    def draw(self, alpha=1.0):
+        # alpha < 1 时所有东西画在上一步和这一步模拟之间
+        moved = self.snapshot.apply(self, alpha)
+        # 只清除并重画上一帧和这一帧画过的区域
+        self.renderer.begin()
+        
+        # Draw obstacles
+        if self.obstacles:
+            for rect in self.obstacles.rects:
+                self.renderer.rect(GRAY, rect)
         
         # Draw powerup
         if self.powerup:
-            self.screen.blit(self.powerup.image, self.powerup.rect)
+            self.renderer.blit(self.powerup.image, self.powerup.rect)
         
         # Draw player
         color = (ORANGE if self.player_invincible == True else YELLOW if self.player_has_power and self.player_invincible == False else GREEN)
-        pygame.draw.rect(self.screen, color, self.player)
+        self.renderer.rect(color, self.player)
         
         # Draw enemies and bullets
         self.enemies.draw(self.screen)
-        for enemy in self.enemies:
-            if isinstance(enemy, ShootingEnemy):
-                enemy.bullets.draw(self.screen)
+        self.renderer.add(self.enemies.spritedict.values())
+        self.renderer.add(self.bullets.draw(self.screen, doreturn=True, alpha=alpha))
+        if moved:
+            self.snapshot.restore()
+        self.profiler.draw_overlay(self.renderer)
+        self.profiler.mark(DRAW)
         
-        pygame.display.flip()
+        self.renderer.present()
+        self.video.grab(self.screen)
+        self.profiler.mark(PRESENT)
 
     def game_over_screen(self):
-        font = pygame.font.Font(None, 74)
-        text = font.render("Game Over, Press R to Restart", True, RED)
-        text_rect = text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-        self.screen.blit(text, text_rect)
-        pygame.display.flip()
-    
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return False
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r:
-                        # 调用 init_game 时，将 self.current_level 传进去
-                        self.init_game(self.current_level)
-                        current_time = pygame.time.get_ticks()
-                        self.player_invincible = True
-                        self.invincible_until = pygame.time.get_ticks() + 2000
-                        return True
-                    if event.key == pygame.K_ESCAPE:
-                        return False
-        return True
+        # 画面只画一次，然后阻塞等待按键，不再空转；开了 rewind 时退格键回到死前几秒
+        keys = (pygame.K_r, pygame.K_ESCAPE) + ((pygame.K_BACKSPACE,) if self.rewinder is not None else ())
+        key = message_screen(self.screen, "Game Over, Press R to Restart", RED, keys, self.idle_meter)
+        self.renderer.invalidate()
+        if key == pygame.K_BACKSPACE and self.rewind():
+            return True
+        # 回放等到不再回退、真正结束这一局时才写，回退后接着录的部分也在里面
+        self.save_replay("game_over")
+        # 还没有快照可回退时和 R 一样重开
+        if key in (pygame.K_r, pygame.K_BACKSPACE):
+            # 调用 init_game 时，将 self.current_level 传进去
+            self.init_game(self.current_level, invincible_ms=2000)
+            return True
+        return False
 
     def game_win_screen(self):
-        font = pygame.font.Font(None, 74)
-        text = font.render("Victory! Press R to Restart", True, GREEN)
-        text_rect = text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-        self.screen.blit(text, text_rect)
-        pygame.display.flip()
-
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return False
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r:
-                        self.init_game()
-                        return True
-                    if event.key == pygame.K_ESCAPE:
-                        return False
+        key = message_screen(self.screen, "Victory! Press R to Restart", GREEN,
+                             (pygame.K_r, pygame.K_ESCAPE), self.idle_meter)
+        self.renderer.invalidate()
+        if key == pygame.K_r:
+            self.init_game()
+            return True
+        return False
+
+    def advance_level(self):
+        """敌人清空、这一关的波次也都生成完时切换到下一关；已通过最后一关时返回 True。"""
+        if len(self.enemies) != 0 or not self.waves.done:
+            return False
+        if self.current_level >= len(self.levels):
+            self.telemetry.record(self, VICTORY, self.player.center)
+            return True
+        self.current_level += 1
+        self.telemetry.record(self, LEVEL, self.player.center, self.current_level)
+        self.bullets.clear()
+        self.spawn_enemies(self.current_level)
+        self.player_invincible = True
+        self.invincible_until = get_ticks() + 2000
+        self.powerup = Powerup()
+        return False
+
+    def save_replay(self, outcome):
+        """把这一局的回放写进 record_dir，返回文件路径；没有在录制时返回 None。"""
+        if self.recorder is None:
+            return None
+        path = os.path.join(self.record_dir, f"{self.variant}-L{self.recorder.level}-{self.seed:08x}.rpl")
+        self.recorder.save(path, outcome, state_digest(self))
+        self.recorder = None
+        return path
+
+    def step(self, keys=None):
+        """推进一步模拟（不绘制），返回 "game_over"、"victory" 或 None。
+        keys 为 None 时读取键盘。"""
+        if self.interpolate:
+            self.snapshot.capture(self)
+        self.activate()
+        self.sim_clock.tick()
+        self.handle_input(keys)
+        self.profiler.mark(INPUT)
+        self.update()
+        self.profiler.mark(UPDATE)
+        collided = self.check_collisions()
+        self.profiler.mark(COLLISIONS)
+        if collided:
+            return "game_over"
+        if self.advance_level():
+            return "victory"
+        if self.rewinder is not None and self.sim_clock.frames % REWIND_INTERVAL == 0:
+            self.rewinder.push(self.sim_clock.frames, save_state(self))
+        return None
+
+    def rewind(self, seconds=REWIND_SECONDS):
+        """回到大约 seconds 秒之前存的快照（没有那么早的就回到最早的一个），之后的快照作废；
+        正在录制的回放也截到那一帧。没有开 rewind 或还没有快照时返回 False。"""
+        if self.rewinder is None:
+            return False
+        data = self.rewinder.rewind(self.sim_clock.frames - round(seconds * self.sim_clock.fps))
+        if data is None:
+            return False
+        load_state(self, data)
+        if self.recorder is not None:
+            self.recorder.truncate(self.sim_clock.frames)
+        self.renderer.invalidate()
+        self.fixed.reset()
         return True
 
+    def resume(self):
+        """从阻塞的画面（菜单、结束画面）回来：重新计时，不把等待的时间补成模拟。"""
+        self.clock.tick()
+        self.fixed.reset()
+        self.profiler.resync()
+
+    def apply_quality(self):
+        """按 governor 当前的档位调整远处敌人的 AI 更新间隔；画面上的降级由 run 和 draw 直接看 governor。"""
+        if self.governor.far_ai:
+            if self.ai is None:
+                self.ai = AIScheduler(interval=GOVERNOR_AI_INTERVAL)
+            else:
+                self.ai.set_interval(GOVERNOR_AI_INTERVAL)
+        elif self.lod:
+            self.ai.set_interval(AI_FAR_INTERVAL)
+        else:
+            self.ai = None
+
     def run(self):
         running = True
+        profiler = self.profiler
+        governor = self.governor
+        fixed = self.fixed
         while running:
-            self.clock.tick(FPS)
+            profiler.begin()
+            # 渲染按 render_hz 限速，模拟按经过的真实时间以固定步长推进
+            elapsed = self.clock.tick(self.render_hz)
+            profiler.mark(WAIT)
+            governor.begin()
             
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     running = False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    profiler.toggle_overlay()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_BACKSPACE:
+                    self.rewind()
 
-            self.handle_input()
-            self.update()
+            outcome = None
+            for _ in range(fixed.advance(elapsed)):
+                outcome = self.step()
+                if outcome is not None:
+                    break
             
-            if self.check_collisions():
+            # 降到 skip 档时隔一帧画一次，但结束前的最后一帧总要画
+            if governor.should_draw() or outcome is not None:
+                self.draw(fixed.alpha if self.interpolate and governor.interpolate and outcome is None else 1.0)
+            profiler.end(len(self.enemies), len(self.bullets))
+            if governor.end():
+                self.apply_quality()
+                self.telemetry.record(self, QUALITY, self.player.center, governor.level, int(governor.last_ms * 1000))
+            self.startup.first_frame(self.sounds)
+
+            if outcome == "game_over":
                 if self.sounds['hit']:
                     self.sounds['hit'].play()
                 running = self.game_over_screen()
-            
-            self.draw()
-
-            # 当所有敌人清空时，切换到下一关或显示胜利画面
-            if len(self.enemies) == 0:
-                if self.current_level == 1:
-                    # 切换到第二关
-                    self.current_level = 2
-                    self.spawn_enemies(self.current_level)
-                    self.player_invincible = True
-                    self.invincible_until = pygame.time.get_ticks() + 2000
-                    self.powerup = Powerup()
-                elif self.current_level == 2:
-                    # 切换到第三关
-                    self.current_level = 3
-                    self.spawn_enemies(self.current_level)
-                    self.player_invincible = True
-                    self.invincible_until = pygame.time.get_ticks() + 2000
-                    self.powerup = Powerup()
-                else:
-                    # 已通过最后一关
-                    if self.sounds['victory']:
-                        self.sounds['victory'].play()
-                    running = self.game_win_screen()
+                self.resume()
+            elif outcome == "victory":
+                # 当所有敌人清空时，切换到下一关或显示胜利画面
+                if self.sounds['victory']:
+                    self.sounds['victory'].play()
+                self.save_replay("victory")
+                running = self.game_win_screen()
+                self.resume()
+        self.save_replay("quit")
+        self.sounds.close()
+        self.telemetry.close()
+        self.video.close()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
-    pygame.quit()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=None, help="seed for a reproducible game")
+    parser.add_argument("--record", metavar="DIR", default=None, help="save a replay of every run into DIR")
+    parser.add_argument("--profile", action="store_true", help="time every frame phase (F3 toggles the overlay)")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="profile and write the frames to FILE (.jsonl, otherwise Chrome trace JSON)")
+    parser.add_argument("--obstacles", default=OBSTACLE_LAYOUT, choices=sorted(OBSTACLE_LAYOUTS))
+    parser.add_argument("--ai-lod", action="store_true", help="update distant and patrolling enemies every few frames")
+    parser.add_argument("--sim-hz", type=int, default=FPS, help="fixed simulation steps per second")
+    parser.add_argument("--render-hz", type=int, default=RENDER_FPS, help="frame rate cap, 0 = uncapped")
+    parser.add_argument("--levels", metavar="NAME", default=None, help="level file levels/NAME.json")
+    parser.add_argument("--telemetry", metavar="DIR", default=None, help="write gameplay events to DIR")
+    parser.add_argument("--rewind", action="store_true", help="keep recent snapshots, Backspace rewinds a few seconds")
+    parser.add_argument("--capture", metavar="DIR", default=None, help="record gameplay video into DIR")
+    parser.add_argument("--capture-format", default=CAPTURE_FORMAT, choices=("raw", "png"))
+    parser.add_argument("--governor", action="store_true",
+                        help="lower visual and AI quality step by step when frames run over budget")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="simulate in a worker process while the previous frame is drawn (see pipeline.py)")
+    args = parser.parse_args()
+    if args.record and args.sim_hz != FPS:
+        # 回放按默认的模拟频率重新模拟
+        parser.error("--record needs the default --sim-hz")
+    if args.record and args.levels:
+        parser.error("--record needs the default --levels")
+    if args.pipeline:
+        # 这些都挂在主进程的 Game 上，流水线模式里没有这个 Game
+        for flag, value in (("--governor", args.governor), ("--profile", args.profile), ("--trace", args.trace),
+                            ("--rewind", args.rewind)):
+            if value:
+                parser.error(f"{flag} is not supported with --pipeline")
+    if args.pipeline:
+        import pipeline
+        pipeline.play(Game.variant, seed=args.seed, obstacles=args.obstacles, lod=args.ai_lod, levels=args.levels,
+                      record_dir=args.record, sim_hz=args.sim_hz, render_hz=args.render_hz, telemetry=args.telemetry,
+                      capture=args.capture, capture_format=args.capture_format)
+    else:
+        game = Game(seed=args.seed, record_dir=args.record, profile=args.profile or args.trace is not None,
+                    obstacles=args.obstacles, lod=args.ai_lod, sim_hz=args.sim_hz, render_hz=args.render_hz,
+                    levels=args.levels, telemetry=args.telemetry, rewind=args.rewind,
+                    capture=args.capture, capture_format=args.capture_format, governor=args.governor)
+        game.run()
+        if game.governor.enabled:
+            print(game.governor)
+        if game.video.enabled:
+            print(game.video)
+        if game.profiler.enabled:
+            print(game.profiler)
+            if args.trace:
+                game.profiler.export(args.trace)
+        pygame.quit()
\ No newline at end of file
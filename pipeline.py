@@ -0,0 +1,438 @@
+"""流水线模式：模拟放到子进程里，主进程画上一帧的快照，两边同时跑。
+
+每帧主进程把按键发给子进程，子进程推进模拟并把局面写进共享内存里的一份快照；
+与此同时主进程画另一份快照（上一帧的结果），画完再等子进程回话，然后交换两份快照。
+主进程从不读子进程正在写的那一份，所以不需要加锁。
+
+模拟只在子进程里按收到的按键顺序推进，和串行的 Game.step 完全一样，
+同样的种子和按键得到同样的局面（--bench 会核对 state_digest），代价是输入晚一帧生效。
+
+    python pipeline.py --game main2 --level 1            # 用流水线模式玩（R 重开，Esc 退出）
+    python pipeline.py --bench --counts 100 1000 4000    # 串行和流水线的帧率随敌人数的变化
+"""
+import os
+import argparse
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import pygame
+from config.settings import *
+from utils.keys import encode_keys, decode_keys
+from utils.clock import FixedStep
+from utils.flowfield import obstacle_map
+from utils.render import DirtyRenderer
+from utils.capture import FrameCapture, NULL_CAPTURE
+from utils.screens import message_screen
+from sprites.images import get_image, image_key
+
+# 快照头部的字段，int64
+HEADER = ('time_ms', 'level', 'flags', 'outcome', 'enemies', 'bullets',
+          'player_x', 'player_y', 'powerup_x', 'powerup_y', 'powerup_image', 'sim_us')
+H = {name: i for i, name in enumerate(HEADER)}
+FLAG_POWER = 1
+FLAG_INVINCIBLE = 2
+FLAG_POWERUP = 4
+OUTCOMES = (None, "game_over", "victory")
+
+def _layout():
+    return (((len(HEADER),), np.int64),
+            ((PIPELINE_MAX_ENEMIES, 3), np.int32),   # x, y, 贴图编号
+            ((PIPELINE_MAX_BULLETS, 2), np.int32))   # x, y
+
+def _shared(shape, dtype, name=None):
+    size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    if name is None:
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    else:
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+class SoundCues:
+    """子进程里代替 Game.sounds：播放只记下名字，随回复交给主进程去放。"""
+    class _Cue:
+        def __init__(self, cues, name):
+            self.cues = cues
+            self.name = name
+
+        def play(self):
+            self.cues.played.append(self.name)
+
+    def __init__(self):
+        self.played = []
+
+    def __getitem__(self, name):
+        return self._Cue(self, name)
+
+    def drain(self):
+        played, self.played = self.played, []
+        return played
+
+class SnapshotWriter:
+    """把 Game 的局面写进一份快照。贴图按 get_image 的键编号，新出现的键随回复发给主进程。"""
+    def __init__(self):
+        self.ids = {}
+        self.new = []
+
+    def image_id(self, image):
+        key = image_key(image)
+        i = self.ids.get(key)
+        if i is None:
+            i = self.ids[key] = len(self.ids)
+            self.new.append(key)
+        return i
+
+    def write(self, game, buffer, outcome=None, sim_us=0):
+        header, enemies, bullets = buffer
+        image_id = self.image_id
+        # 超过容量的部分不画（模拟不受影响）
+        sprites = game.enemies.sprites()[:len(enemies)]
+        n = len(sprites)
+        if n:
+            enemies[:n] = [(s.rect.x, s.rect.y, image_id(s.image)) for s in sprites]
+        live = game.bullets.live()[:len(bullets)]
+        m = len(live)
+        bullets[:m, 0] = game.bullets.x[live]
+        bullets[:m, 1] = game.bullets.y[live]
+        powerup = game.powerup
+        header[:] = (
+            game.sim_clock.ticks, game.current_level,
+            (FLAG_POWER if game.player_has_power else 0) | (FLAG_INVINCIBLE if game.player_invincible else 0)
+            | (FLAG_POWERUP if powerup else 0),
+            OUTCOMES.index(outcome), n, m, game.player.x, game.player.y,
+            powerup.rect.x if powerup else 0, powerup.rect.y if powerup else 0,
+            image_id(powerup.image) if powerup else -1, sim_us)
+        new, self.new = self.new, []
+        return new
+
+class SnapshotView:
+    """在主进程里画一份快照，和 Game.draw 画出来的一样（不插值）。"""
+    def __init__(self, screen, variant, obstacles=OBSTACLE_LAYOUT, display=True):
+        self.screen = screen
+        self.renderer = DirtyRenderer(screen, display=display)
+        self.border = variant == "main2"
+        self.obstacles = obstacle_map(obstacles)
+        self.images = []
+        self.bullet = get_image('bullet', BULLET_SIZE, WHITE)
+
+    def register(self, keys):
+        self.images.extend(get_image(*key) for key in keys)
+
+    def draw(self, buffer):
+        header, enemies, bullets = buffer
+        renderer = self.renderer
+        renderer.begin()
+        if self.obstacles:
+            for rect in self.obstacles.rects:
+                renderer.rect(GRAY, rect)
+        flags = int(header[H['flags']])
+        if flags & FLAG_POWERUP:
+            image = self.images[header[H['powerup_image']]]
+            renderer.blit(image, (int(header[H['powerup_x']]), int(header[H['powerup_y']])))
+        player = pygame.Rect(int(header[H['player_x']]), int(header[H['player_y']]), PLAYER_SIZE, PLAYER_SIZE)
+        color = (ORANGE if flags & FLAG_INVINCIBLE else YELLOW if flags & FLAG_POWER else GREEN)
+        renderer.rect(color, player)
+        if self.border:
+            pygame.draw.rect(self.screen, WHITE, player, 2)
+        n = int(header[H['enemies']])
+        if n:
+            images = self.images
+            renderer.add(self.screen.blits([(images[i], (x, y)) for x, y, i in enemies[:n].tolist()]))
+        m = int(header[H['bullets']])
+        if m:
+            image = self.bullet
+            renderer.add(self.screen.blits([(image, pos) for pos in map(tuple, bullets[:m].tolist())]))
+        renderer.present()
+
+def _worker(conn, names, options):
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    import headless
+    blocks = [_shared(shape, dtype, name) for name, (shape, dtype) in zip(names, _layout() * 2)]
+    buffers = ([array for _, array in blocks[:3]], [array for _, array in blocks[3:]])
+    game = None
+    try:
+        game = headless.make_game(**options)
+        game.sounds = SoundCues()
+        writer = SnapshotWriter()
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "step":
+                bits, steps, index = arg
+                start = time.perf_counter()
+                keys = decode_keys(bits)
+                outcome = None
+                for _ in range(steps):
+                    outcome = game.step(keys)
+                    if outcome is not None:
+                        game.save_replay(outcome)
+                        break
+                sim_us = int((time.perf_counter() - start) * 1e6)
+                conn.send((writer.write(game, buffers[index], outcome, sim_us), game.sounds.drain()))
+            elif cmd == "write":
+                conn.send((writer.write(game, buffers[arg[0]]), []))
+            elif cmd == "reset":
+                level, invincible_ms, index = arg
+                game.init_game(level, invincible_ms=invincible_ms)
+                conn.send((writer.write(game, buffers[index]), []))
+            elif cmd == "crowd":
+                # 只给 --bench 用：换成 count 个普通敌人
+                from sprites.enemy import Enemy, spawn
+                count, index = arg
+                game.activate()
+                game.enemies.empty()
+                spawn(Enemy, count, group=game.enemies)
+                conn.send((writer.write(game, buffers[index]), []))
+            elif cmd == "digest":
+                from utils.replay import state_digest
+                conn.send(state_digest(game))
+            else:
+                game.save_replay("quit")
+                break
+    finally:
+        if game is not None:
+            game.telemetry.close()
+        del buffers
+        for shm, _ in blocks:
+            shm.close()
+        conn.close()
+
+class Pipeline:
+    """主进程这一侧：front 是可以画的快照，back 留给子进程写。
+
+    submit() 发出下一帧的模拟，collect() 等它写完并交换两份快照；两次调用之间画 front。
+    """
+    def __init__(self, variant="main", level=1, swarm=False, seed=None, obstacles=OBSTACLE_LAYOUT,
+                 lod=False, levels=None, record_dir=None, invincible_ms=1000, telemetry=None, sim_hz=FPS):
+        self.blocks = [_shared(shape, dtype) for shape, dtype in _layout() * 2]
+        arrays = [array for _, array in self.blocks]
+        self.buffers = (arrays[:3], arrays[3:])
+        self.front = 0
+        options = {'game_module': variant, 'level': level, 'swarm': swarm, 'seed': seed,
+                   'invincible_ms': invincible_ms, 'record_dir': record_dir,
+                   'obstacles': obstacles, 'lod': lod, 'levels': levels, 'telemetry': telemetry,
+                   'sim_hz': sim_hz}
+        # 主进程已经打开了窗口，fork 出来的子进程会带着它，所以用 spawn
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker, args=(child, [shm.name for shm, _ in self.blocks], options),
+                                       daemon=True)
+        self.process.start()
+        child.close()
+        self.pending = False
+        self.images = []
+        self.cues = []
+        # 子进程里 make_game 已经按 seed 开好局了，先把初始局面写进 front
+        try:
+            self._sync("write", ())
+        except (EOFError, OSError):
+            # 子进程没起来（例如脚本缺少 if __name__ == "__main__"），把共享内存还回去
+            self.process.join()
+            self._release()
+            raise
+
+    @property
+    def snapshot(self):
+        return self.buffers[self.front]
+
+    @property
+    def outcome(self):
+        return OUTCOMES[self.snapshot[0][H['outcome']]]
+
+    def _receive(self):
+        new, cues = self.conn.recv()
+        self.images.extend(new)
+        self.cues.extend(cues)
+
+    def _sync(self, cmd, arg):
+        """在 back 上执行一条命令并等它完成，然后 back 变成 front。"""
+        self.collect()
+        self.conn.send((cmd, arg + (1 - self.front,)))
+        self._receive()
+        self.front = 1 - self.front
+
+    def reset(self, level, invincible_ms=1000):
+        self._sync("reset", (level, invincible_ms))
+
+    def crowd(self, count):
+        self._sync("crowd", (count,))
+
+    def submit(self, keys, steps=1):
+        """让子进程用 keys（按键状态或 encode_keys 的位）推进 steps 步，写进 back。"""
+        bits = keys if isinstance(keys, int) else encode_keys(keys)
+        self.conn.send(("step", (bits, steps, 1 - self.front)))
+        self.pending = True
+
+    def collect(self):
+        """等 submit 的模拟完成并交换快照；返回这一帧的结果（None、"game_over" 或 "victory"）。"""
+        if not self.pending:
+            return None
+        self._receive()
+        self.pending = False
+        self.front = 1 - self.front
+        return self.outcome
+
+    def new_images(self):
+        images, self.images = self.images, []
+        return images
+
+    def played(self):
+        cues, self.cues = self.cues, []
+        return cues
+
+    def digest(self):
+        self.collect()
+        self.conn.send(("digest", None))
+        return self.conn.recv()
+
+    def close(self):
+        if self.process is None:
+            return
+        self.collect()
+        self.conn.send(("close", None))
+        # 子进程里 SDL 接管了 SIGTERM，不能 terminate，只能等它自己退出
+        self.process.join()
+        self._release()
+
+    def _release(self):
+        self.conn.close()
+        self.process = None
+        self.buffers = None
+        for shm, _ in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def play(variant="main", level=1, swarm=False, seed=None, obstacles=OBSTACLE_LAYOUT, lod=False,
+         levels=None, record_dir=None, sim_hz=FPS, render_hz=RENDER_FPS, telemetry=None, capture=None,
+         capture_format=CAPTURE_FORMAT):
+    """用流水线模式玩：没有开始菜单，输了 R 重开这一关，通关 R 从第 1 关重来，Esc 退出。
+    capture 是目录名时录下画面（见 utils/capture.py）。"""
+    from utils.sound import load_sounds
+    pygame.init()
+    pygame.mixer.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    sounds = load_sounds()
+    view = SnapshotView(screen, variant, obstacles)
+    capture = FrameCapture(screen, capture, capture_format) if capture else NULL_CAPTURE
+    clock = pygame.time.Clock()
+    fixed = FixedStep(sim_hz)
+    with Pipeline(variant, level, swarm, seed, obstacles, lod, levels, record_dir, telemetry=telemetry,
+                  sim_hz=sim_hz) as pipe:
+        view.register(pipe.new_images())
+        running = True
+        while running:
+            elapsed = clock.tick(render_hz)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    running = False
+            steps = fixed.advance(elapsed)
+            if steps:
+                # 子进程推进下一帧的同时，这里画上一帧
+                pipe.submit(pygame.key.get_pressed(), steps)
+            view.draw(pipe.snapshot)
+            capture.grab(screen)
+            outcome = pipe.collect()
+            view.register(pipe.new_images())
+            for name in pipe.played():
+                if sounds[name]:
+                    sounds[name].play()
+            if outcome is None or not running:
+                continue
+            view.draw(pipe.snapshot)
+            if outcome == "game_over":
+                message, color, restart = "Game Over, Press R to Restart", RED, int(pipe.snapshot[0][H['level']])
+            else:
+                message, color, restart = "Victory! Press R to Restart", GREEN, 1
+            key = message_screen(screen, message, color, (pygame.K_r, pygame.K_ESCAPE))
+            view.renderer.invalidate()
+            if key != pygame.K_r:
+                break
+            pipe.reset(restart, 2000)
+            view.register(pipe.new_images())
+            clock.tick()
+            fixed.reset()
+    sounds.close()
+    capture.close()
+    if capture.enabled:
+        print(capture)
+    pygame.quit()
+
+def bench_keys(tick):
+    # 只依赖 tick 的输入（和 headless.circle_script 一样），串行和流水线可以逐帧对上
+    return (8, 4, 2, 1)[(tick // 30) % 4]
+
+def bench(variant="main", counts=(100, 1000, 4000), frames=300, swarm=False):
+    """每个敌人数各跑 frames 帧（模拟一步 + 画一帧），比较串行和流水线的帧率，并核对结果一致。"""
+    import headless
+    from sprites.enemy import Enemy, spawn
+    from utils.replay import state_digest
+    pygame.init()
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    forever = 10 ** 9  # 一直无敌，免得中途结束
+    print(f"{os.cpu_count()} CPUs, {frames} frames each, {'swarm' if swarm else 'sprite'} enemies")
+    print(f"{'enemies':>8} | {'serial':>10} {'pipelined':>10} | {'speedup':>7}   (frames/s)  digest")
+    for count in counts:
+        # 串行：同一个进程里 step、写快照、画快照
+        game = headless.make_game(variant, swarm=swarm, seed=0, invincible_ms=forever)
+        game.enemies.empty()
+        spawn(Enemy, count, group=game.enemies)
+        writer = SnapshotWriter()
+        buffer = [np.zeros(shape, dtype) for shape, dtype in _layout()]
+        view = SnapshotView(screen, variant, display=False)
+        view.register(writer.write(game, buffer))
+        start = time.perf_counter()
+        for tick in range(frames):
+            game.step(decode_keys(bench_keys(tick)))
+            view.register(writer.write(game, buffer))
+            view.draw(buffer)
+        serial = frames / (time.perf_counter() - start)
+        expected = state_digest(game)
+
+        with Pipeline(variant, swarm=swarm, seed=0, invincible_ms=forever) as pipe:
+            pipe.crowd(count)
+            view = SnapshotView(screen, variant, display=False)
+            view.register(pipe.new_images())
+            start = time.perf_counter()
+            for tick in range(frames):
+                pipe.submit(bench_keys(tick))
+                view.draw(pipe.snapshot)
+                pipe.collect()
+                view.register(pipe.new_images())
+            pipelined = frames / (time.perf_counter() - start)
+            same = pipe.digest() == expected
+        print(f"{count:>8} | {serial:>10.0f} {pipelined:>10.0f} | {pipelined / serial:>6.2f}x   "
+              f"{'same' if same else 'DIFFERENT'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the simulation in a worker process, pipelined with rendering")
+    parser.add_argument("--game", default="main", choices=["main", "main2"])
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--swarm", action="store_true", help="use the NumPy enemy swarm backend")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--obstacles", default=OBSTACLE_LAYOUT, choices=sorted(OBSTACLE_LAYOUTS))
+    parser.add_argument("--ai-lod", action="store_true")
+    parser.add_argument("--levels", metavar="NAME", default=None)
+    parser.add_argument("--bench", action="store_true", help="compare serial and pipelined frame rates")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 4000])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--capture", metavar="DIR", default=None, help="record gameplay video into DIR")
+    parser.add_argument("--capture-format", default=CAPTURE_FORMAT, choices=("raw", "png"))
+    args = parser.parse_args()
+    if args.bench:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        bench(args.game, args.counts, args.frames, args.swarm)
+    else:
+        play(args.game, args.level, args.swarm, args.seed, args.obstacles, args.ai_lod, args.levels,
+             capture=args.capture, capture_format=args.capture_format)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,545 @@
+"""本机多人对战：一个权威服务器跑模拟，多个客户端通过 UDP 连上来，各自控制一个玩家。
+
+服务器每个 tick 按收到的输入移动各个玩家、更新敌人（每个敌人追离它最近的玩家）、
+逐个玩家做碰撞检测（死了就在中间复活，不会结束整局），每 FPS / NET_SNAPSHOT_HZ 个 tick
+给每个客户端发一份相对它确认过的快照的增量（见 utils/net.py）。
+客户端按下键就先在本地移动自己的玩家（预测），收到快照后以服务器的位置为准，
+再把服务器还没处理的输入重放一遍。
+
+    python server.py serve --port 5555
+    python server.py client --host 127.0.0.1 --port 5555
+    python server.py bench --clients 2 4 8 --enemies 100 1000 --loss 0.05 --delay 50
+"""
+import os
+import argparse
+import itertools
+import random
+import time
+from collections import OrderedDict, deque
+import numpy as np
+import pygame
+from config.settings import *
+from utils import net
+from utils.clock import get_ticks
+from utils.keys import decode_keys, encode_keys
+from sprites.images import get_image, image_key
+from sprites.enemy import ShootingEnemy
+from sprites.powerup import Powerup
+import main
+
+RESPAWN_INVINCIBLE_MS = 2000
+
+def spawn_point(pid):
+    """玩家 pid 的出生点：围着屏幕中间排一圈。"""
+    if pid == 0:
+        return SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
+    angle = pid * 2.399963  # 黄金角，人多了也不会叠在一起
+    return SCREEN_WIDTH // 2 + int(60 * np.cos(angle)), SCREEN_HEIGHT // 2 + int(60 * np.sin(angle))
+
+def move_player(rect, bits, has_power):
+    """和 Game.handle_input 一样的移动规则（没有障碍物），客户端预测时用。"""
+    speed = PLAYER_SPRINT_SPEED if has_power else PLAYER_SPEED
+    if bits & 1: rect.y -= speed
+    if bits & 4: rect.y += speed
+    if bits & 2: rect.x -= speed
+    if bits & 8: rect.x += speed
+    rect.clamp_ip(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+
+class Seat:
+    """服务器上的一个玩家：位置、能量、无敌状态和还没处理的输入。"""
+    def __init__(self, pid):
+        self.pid = pid
+        self.rect = pygame.Rect(0, 0, PLAYER_SIZE, PLAYER_SIZE)
+        self.inputs = deque()
+        self.last_seq = 0
+        self.deaths = 0
+        self.respawn()
+
+    def respawn(self):
+        self.rect.topleft = spawn_point(self.pid)
+        self.has_power = False
+        self.invincible = True
+        self.invincible_until = get_ticks() + RESPAWN_INVINCIBLE_MS
+
+    def queue(self, seq, bits):
+        if seq > self.last_seq and (not self.inputs or seq > self.inputs[-1][0]):
+            self.inputs.append((seq, bits))
+        # 客户端跑得比服务器快时不让队列越积越长，丢掉最旧的（客户端对账时会纠正）
+        while len(self.inputs) > NET_INPUT_REDUNDANCY:
+            self.last_seq = self.inputs.popleft()[0]
+
+    def next_keys(self):
+        """这个 tick 用的按键；没收到输入就站着不动。"""
+        if not self.inputs:
+            return 0
+        self.last_seq, bits = self.inputs.popleft()
+        return bits
+
+class ArenaGame(main.Game):
+    """多个玩家共用一局 main.py 的游戏。Game 的代码只认识一个玩家，
+    所以处理某个玩家时先把他的状态换到 self.player 等属性上（_bind），处理完再存回去。"""
+    def __init__(self, seed=None, level=1, levels=None):
+        self.seats = {}
+        super().__init__(headless=True, seed=seed, levels=levels)
+        self.init_game(level, seed=seed)
+        self.entity_ids = {}
+        # 敌人可用的 id；离场的敌人把 id 还到队尾，先进先出，刚消失的 id 尽量晚些再发出去
+        self.free_ids = deque(range(1, net.BULLET_BASE))
+
+    def join(self, pid):
+        seat = self.seats[pid] = Seat(pid)
+        return seat
+
+    def leave(self, pid):
+        self.seats.pop(pid, None)
+
+    def _bind(self, seat):
+        self.player = seat.rect
+        self.player_has_power = seat.has_power
+        self.player_invincible = seat.invincible
+        self.invincible_until = seat.invincible_until
+
+    def _unbind(self, seat):
+        seat.has_power = self.player_has_power
+        seat.invincible = self.player_invincible
+        seat.invincible_until = self.invincible_until
+
+    def step_arena(self):
+        self.activate()
+        self.sim_clock.tick()
+        seats = list(self.seats.values())
+        for seat in seats:
+            self._bind(seat)
+            self.handle_input(decode_keys(seat.next_keys()))
+            self._unbind(seat)
+        self.update()
+        for seat in seats:
+            self._bind(seat)
+            dead = self.check_collisions()
+            self._unbind(seat)
+            if dead:
+                seat.deaths += 1
+                seat.respawn()
+        level = self.current_level
+        if self.advance_level():
+            # 打通最后一关就从第一关重新开始，房间一直开着
+            self.current_level = 1
+            self.bullets.clear()
+            self.spawn_enemies(1)
+        if self.current_level != level:
+            for seat in seats:
+                seat.invincible = True
+                seat.invincible_until = get_ticks() + RESPAWN_INVINCIBLE_MS
+
+    def update(self):
+        self.waves.update()
+        seats = list(self.seats.values())
+        if self.powerup:
+            self.powerup.update()
+            for seat in seats:
+                if seat.rect.colliderect(self.powerup.rect):
+                    seat.has_power = True
+                    self.powerup = None
+                    break
+        if not self.powerup and not any(seat.has_power for seat in seats):
+            current_time = get_ticks()
+            if current_time >= self.next_powerup_time:
+                self.powerup = Powerup()
+                self.next_powerup_time = current_time + POWERUP_INTERVAL
+
+        enemies = self.enemies.sprites()
+        if enemies:
+            if seats:
+                # 每个敌人追离自己最近的玩家
+                centers = np.array([seat.rect.center for seat in seats], dtype=np.float64)
+                positions = np.array([enemy.rect.center for enemy in enemies], dtype=np.float64)
+                d2 = ((positions[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+                targets = d2.argmin(axis=1).tolist()
+            else:
+                targets = [None] * len(enemies)
+            middle = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+            for enemy, k in zip(enemies, targets):
+                seat = seats[k] if k is not None else None
+                target = seat.rect.center if seat else middle
+                if isinstance(enemy, ShootingEnemy):
+                    enemy.update(target, seat.has_power if seat else False)
+                else:
+                    enemy.update(target)
+        self.bullets.update()
+
+    def entity_id(self, sprite):
+        i = self.entity_ids.get(sprite)
+        if i is None:
+            i = self.entity_ids[sprite] = self.free_ids.popleft()
+        return i
+
+    def capture(self, image_id):
+        """这一帧的实体状态（net.ENTITY 数组）；image_id 把贴图换成贴图表里的编号。"""
+        sprites = self.enemies.sprites()
+        # 死掉的敌人攒够了（或者 id 快不够新敌人用了）才一起回收，还在场上的 id 不会被重发
+        if len(self.entity_ids) > 2 * len(sprites) + 64 or len(self.free_ids) < len(sprites):
+            alive = set(sprites)
+            self.free_ids.extend(i for s, i in self.entity_ids.items() if s not in alive)
+            self.entity_ids = {s: i for s, i in self.entity_ids.items() if s in alive}
+        ids = [self.entity_id(s) for s in sprites]
+        images = [image_id(s.image) for s in sprites]
+        xs = [s.rect.x for s in sprites]
+        ys = [s.rect.y for s in sprites]
+        live = self.bullets.live()
+        bullet = image_id(self.bullets.image)
+        ids.extend((live + net.BULLET_BASE).tolist())
+        images.extend([bullet] * len(live))
+        xs.extend(self.bullets.x[live].astype(np.int64).tolist())
+        ys.extend(self.bullets.y[live].astype(np.int64).tolist())
+        if self.powerup:
+            ids.append(net.POWERUP_ID)
+            images.append(image_id(self.powerup.image))
+            xs.append(self.powerup.rect.x)
+            ys.append(self.powerup.rect.y)
+        return net.make_state(ids, images, xs, ys)
+
+class Peer:
+    def __init__(self, pid, address, nonce, seat):
+        self.pid = pid
+        self.address = address
+        self.nonce = nonce
+        self.seat = seat
+        self.ack = 0
+        self.bytes_sent = 0
+
+class Server:
+    """权威服务器：receive() 处理收到的包，step() 推进一个 tick，到时间就给每个客户端发快照。"""
+    def __init__(self, endpoint, level=1, seed=None, levels=None, snapshot_hz=NET_SNAPSHOT_HZ,
+                 max_players=NET_MAX_PLAYERS):
+        self.endpoint = endpoint
+        self.game = ArenaGame(seed, level, levels)
+        self.peers = {}
+        self.max_players = max_players
+        self.interval = max(1, round(FPS / snapshot_hz))
+        self.tick = 0
+        self.history = OrderedDict()  # tick -> (实体状态, 贴图表长度)
+        self.images = []
+        self.image_ids = {}
+        # 统计
+        self.snapshots = 0
+        self.bytes_sent = 0
+        self.full_bytes = 0   # 如果每次都发完整快照（不做增量、不拆包）要发多少
+        self.step_s = 0.0
+
+    def image_id(self, image):
+        key = image_key(image)
+        i = self.image_ids.get(key)
+        if i is None:
+            i = self.image_ids[key] = len(self.images)
+            self.images.append(key)
+        return i
+
+    def receive(self):
+        for data, address in self.endpoint.receive():
+            kind = data[0]
+            peer = self.peers.get(address)
+            if kind == net.JOIN:
+                _, nonce = net.JOIN_PACKET.unpack_from(data)
+                if peer is None:
+                    pids = {p.pid for p in self.peers.values()}
+                    free = [pid for pid in range(self.max_players) if pid not in pids]
+                    if not free:
+                        continue
+                    peer = self.peers[address] = Peer(free[0], address, nonce, self.game.join(free[0]))
+                # WELCOME 也可能丢，客户端会重发 JOIN，这里每次都回
+                self.endpoint.send(net.WELCOME_PACKET.pack(net.WELCOME, peer.pid, peer.nonce), address)
+            elif kind == net.INPUT and peer is not None:
+                _, _, ack, seq, count = net.INPUT_HEADER.unpack_from(data)
+                peer.ack = max(peer.ack, ack)
+                bits = data[net.INPUT_HEADER.size:net.INPUT_HEADER.size + count]
+                for i, b in enumerate(bits):
+                    peer.seat.queue(seq - count + 1 + i, b)
+            elif kind == net.LEAVE and peer is not None:
+                self.game.leave(peer.pid)
+                del self.peers[address]
+
+    def step(self):
+        start = time.perf_counter()
+        self.receive()
+        self.game.step_arena()
+        self.tick += 1
+        if self.tick % self.interval == 0:
+            self.broadcast()
+        self.step_s += time.perf_counter() - start
+
+    def broadcast(self):
+        game = self.game
+        state = game.capture(self.image_id)
+        self.history[self.tick] = (state, len(self.images))
+        while len(self.history) > NET_HISTORY:
+            self.history.popitem(last=False)
+        seats = list(game.seats.values())
+        players = np.empty(len(seats), net.PLAYER)
+        players['id'] = [seat.pid for seat in seats]
+        players['x'] = [seat.rect.x for seat in seats]
+        players['y'] = [seat.rect.y for seat in seats]
+        players['flags'] = [(net.PLAYER_POWER if seat.has_power else 0) |
+                            (net.PLAYER_INVINCIBLE if seat.invincible else 0) for seat in seats]
+        players = players.tobytes()
+        full = len(net.encode_delta(state[:0])) + state.nbytes
+        for peer in self.peers.values():
+            base = self.history.get(peer.ack)
+            base_state, base_images = base if base is not None else (None, 0)
+            delta = net.encode_delta(state, base_state)
+            payload = b"".join((
+                net.SNAPSHOT_HEADER.pack(self.tick, peer.ack if base is not None else 0, peer.seat.last_seq,
+                                         game.current_level, len(seats)),
+                players,
+                net.encode_images(self.images, base_images),
+                delta))
+            for packet in net.fragment(self.tick, payload):
+                self.endpoint.send(packet, peer.address)
+                peer.bytes_sent += len(packet)
+                self.bytes_sent += len(packet)
+            self.full_bytes += len(payload) - len(delta) + full
+            self.snapshots += 1
+
+    def entities(self):
+        return len(self.game.enemies) + len(self.game.bullets.live()) + (1 if self.game.powerup else 0)
+
+class Client:
+    """客户端：update(按键位, 当前毫秒) 每帧调用一次，先处理收到的快照，再预测并发出这一帧的输入。"""
+    JOIN_RETRY_MS = 250
+
+    def __init__(self, endpoint, server):
+        self.endpoint = endpoint
+        self.server = server
+        self.nonce = random.getrandbits(32)
+        self.pid = None
+        self.joined_at = None
+        self.seq = 0
+        self.pending = deque()
+        self.sent_at = {}
+        self.rect = pygame.Rect(0, 0, PLAYER_SIZE, PLAYER_SIZE)
+        self.flags = 0
+        self.level = 1
+        self.players = np.zeros(0, net.PLAYER)
+        self.states = OrderedDict()
+        self.state = net.EMPTY
+        self.latest = 0
+        self.images = []
+        self.reassembler = net.Reassembler()
+        # 统计
+        self.snapshots = 0
+        self.missing_base = 0
+        self.corrections = 0
+        self.correction_px = 0.0
+        self.rtt = []
+
+    def receive(self, now):
+        for data, _ in self.endpoint.receive():
+            kind = data[0]
+            if kind == net.WELCOME:
+                _, pid, nonce = net.WELCOME_PACKET.unpack_from(data)
+                if nonce == self.nonce and self.pid is None:
+                    self.pid = pid
+                    self.rect.topleft = spawn_point(pid)
+            elif kind == net.SNAPSHOT:
+                done = self.reassembler.add(data)
+                if done is not None:
+                    self.on_snapshot(done[1], now)
+
+    def on_snapshot(self, payload, now):
+        tick, base_tick, input_seq, level, count = net.SNAPSHOT_HEADER.unpack_from(payload)
+        base = None
+        if base_tick:
+            base = self.states.get(base_tick)
+            if base is None:
+                # 基准快照早就被挤掉了，等服务器发下一份
+                self.missing_base += 1
+                return
+        offset = net.SNAPSHOT_HEADER.size
+        players = np.frombuffer(payload, net.PLAYER, count, offset)
+        offset = net.decode_images(payload, offset + players.nbytes, self.images)
+        state, _ = net.decode_delta(payload, offset, base)
+        self.states[tick] = state
+        while len(self.states) > NET_HISTORY:
+            self.states.popitem(last=False)
+        self.state = state
+        self.latest = tick
+        self.level = level
+        self.players = players
+        self.snapshots += 1
+        self.reconcile(players, input_seq, now)
+
+    def reconcile(self, players, input_seq, now):
+        mine = players[players['id'] == self.pid]
+        if not len(mine):
+            return
+        sent = self.sent_at.pop(input_seq, None)
+        if sent is not None:
+            self.rtt.append(now - sent)
+        for seq in [s for s in self.sent_at if s < input_seq]:
+            del self.sent_at[seq]
+        while self.pending and self.pending[0][0] <= input_seq:
+            self.pending.popleft()
+        predicted = self.rect.topleft
+        self.flags = int(mine['flags'][0])
+        self.rect.topleft = (int(mine['x'][0]), int(mine['y'][0]))
+        for _, bits in self.pending:
+            move_player(self.rect, bits, self.flags & net.PLAYER_POWER)
+        error = abs(self.rect.x - predicted[0]) + abs(self.rect.y - predicted[1])
+        if error:
+            self.corrections += 1
+            self.correction_px += error
+
+    def update(self, bits, now):
+        self.receive(now)
+        if self.pid is None:
+            if self.joined_at is None or now - self.joined_at >= self.JOIN_RETRY_MS:
+                self.endpoint.send(net.JOIN_PACKET.pack(net.JOIN, self.nonce), self.server)
+                self.joined_at = now
+            return
+        self.seq += 1
+        self.pending.append((self.seq, bits))
+        self.sent_at[self.seq] = now
+        move_player(self.rect, bits, self.flags & net.PLAYER_POWER)
+        recent = [b for _, b in itertools.islice(reversed(self.pending), NET_INPUT_REDUNDANCY)][::-1]
+        self.endpoint.send(net.INPUT_HEADER.pack(net.INPUT, self.pid, self.latest, self.seq, len(recent))
+                           + bytes(recent), self.server)
+
+    def leave(self):
+        if self.pid is not None:
+            self.endpoint.send(net.LEAVE_PACKET.pack(net.LEAVE, self.pid), self.server)
+
+    def draw(self, screen):
+        screen.fill(BLACK)
+        images = [get_image(*key) for key in self.images]
+        state = self.state
+        q = NET_QUANTUM
+        screen.blits([(images[i], (x * q, y * q))
+                      for i, x, y in zip(state['image'].tolist(), state['x'].tolist(), state['y'].tolist())],
+                     doreturn=False)
+        for pid, x, y, flags in self.players.tolist():
+            if pid != self.pid:
+                pygame.draw.rect(screen, BLUE, (x, y, PLAYER_SIZE, PLAYER_SIZE))
+        color = (ORANGE if self.flags & net.PLAYER_INVINCIBLE else
+                 YELLOW if self.flags & net.PLAYER_POWER else GREEN)
+        pygame.draw.rect(screen, color, self.rect)
+        pygame.display.flip()
+
+def serve(port=NET_PORT, level=1, seed=None, levels=None):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    endpoint = net.UdpEndpoint(("127.0.0.1", port))
+    server = Server(endpoint, level, seed, levels)
+    print(f"serving on {endpoint.address[0]}:{endpoint.address[1]}")
+    period = 1 / FPS
+    next_tick = time.perf_counter()
+    report = time.perf_counter() + 5
+    sent = 0
+    try:
+        while True:
+            server.step()
+            next_tick += period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+            if time.perf_counter() >= report:
+                print(f"{len(server.peers)} players, {server.entities()} entities, "
+                      f"{server.step_s / server.tick * 1000:.2f} ms/tick, "
+                      f"{(server.bytes_sent - sent) / 5 / 1024:.1f} KiB/s out")
+                sent = server.bytes_sent
+                report += 5
+    except KeyboardInterrupt:
+        pass
+    finally:
+        endpoint.close()
+
+def play(host="127.0.0.1", port=NET_PORT):
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("client")
+    endpoint = net.UdpEndpoint()
+    client = Client(endpoint, (host, port))
+    clock = pygame.time.Clock()
+    running = True
+    while running:
+        clock.tick(FPS)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                running = False
+        client.update(encode_keys(pygame.key.get_pressed()), time.perf_counter() * 1000)
+        client.draw(screen)
+    client.leave()
+    endpoint.close()
+    pygame.quit()
+
+def bot_keys(tick, pid):
+    # 每个机器人错开相位绕圈，只依赖 tick，结果可复现
+    return (8, 4, 2, 1)[((tick + 17 * pid) // 30) % 4]
+
+def bench(clients=(2, 4, 8), enemies=(100, 1000), seconds=10, loss=0.0, delay_ms=0.0, jitter_ms=0.0):
+    """在模拟的本机网络上跑 seconds 秒，统计服务器每 tick 耗时、每个客户端的下行带宽和预测误差。"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from sprites.enemy import Enemy, spawn
+    pygame.init()
+    ticks = seconds * FPS
+    print(f"{seconds}s at {FPS} Hz, snapshots at {NET_SNAPSHOT_HZ} Hz, "
+          f"loss {loss:.0%}, delay {delay_ms:.0f}±{jitter_ms:.0f} ms")
+    print(f"{'clients':>7} {'entities':>8} | {'ms/tick':>7} {'core':>5} | {'KiB/s/client':>12} "
+          f"{'vs full':>7} | {'delivered':>9} {'rtt ms':>6} {'fix px':>6}")
+    for n in clients:
+        for count in enemies:
+            network = net.LoopbackNetwork(loss, delay_ms, jitter_ms, seed=0)
+            server = Server(network.endpoint("server"), seed=0)
+            server.game.activate()
+            server.game.enemies.empty()
+            server.game.waves.index = len(server.game.waves.level.schedule)
+            spawn(Enemy, count, group=server.game.enemies)
+            bots = [Client(network.endpoint(f"client{i}"), "server") for i in range(n)]
+            for tick in range(ticks):
+                network.advance(1000 / FPS)
+                for i, bot in enumerate(bots):
+                    bot.update(bot_keys(tick, i), network.now)
+                server.step()
+            entities = server.entities()
+            ms = server.step_s / server.tick * 1000
+            # 一个核每 tick 只有 1000/FPS 毫秒，超过 100% 就跟不上实时了
+            load = ms / (1000 / FPS)
+            down = server.bytes_sent / n / seconds / 1024
+            saved = server.bytes_sent / server.full_bytes if server.full_bytes else 1.0
+            expected = server.snapshots
+            delivered = sum(bot.snapshots for bot in bots) / expected if expected else 0.0
+            rtts = [r for bot in bots for r in bot.rtt]
+            rtt = sum(rtts) / len(rtts) if rtts else float('nan')
+            fixes = sum(bot.correction_px for bot in bots) / max(1, sum(bot.corrections for bot in bots))
+            print(f"{n:>7} {entities:>8} | {ms:>7.2f} {load:>5.0%} | {down:>12.1f} {saved:>7.0%} | "
+                  f"{delivered:>9.0%} {rtt:>6.0f} {fixes:>6.1f}")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Local authoritative multiplayer server and client")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("serve")
+    p.add_argument("--port", type=int, default=NET_PORT)
+    p.add_argument("--level", type=int, default=1)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--levels", metavar="NAME", default=None)
+    p = sub.add_parser("client")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=NET_PORT)
+    p = sub.add_parser("bench")
+    p.add_argument("--clients", type=int, nargs="+", default=[2, 4, 8])
+    p.add_argument("--enemies", type=int, nargs="+", default=[100, 1000])
+    p.add_argument("--seconds", type=int, default=10)
+    p.add_argument("--loss", type=float, default=0.0, help="packet loss probability")
+    p.add_argument("--delay", type=float, default=0.0, help="one-way delay in ms")
+    p.add_argument("--jitter", type=float, default=0.0, help="delay jitter in ms")
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.port, args.level, args.seed, args.levels)
+    elif args.command == "client":
+        play(args.host, args.port)
+    else:
+        bench(args.clients, args.enemies, args.seconds, args.loss, args.delay, args.jitter)
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,24 +1,2 @@
-# Game settings
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-FPS = 50
-
-# Colors
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-GREEN = (0, 255, 0)
-RED = (255, 0, 0)
-YELLOW = (255, 255, 0)
-ORANGE = (255, 165, 0)
-PURPLE = (148, 0, 211)
-
-# Sizes
-PLAYER_SIZE = 50
-ENEMY_SIZE = 30
-BULLET_SIZE = 8
-POWERUP_SIZE = 30
-
-# Game mechanics
-PLAYER_SPEED = 4
-PLAYER_SPRINT_SPEED = 6
-POWERUP_INTERVAL = 10000  # milliseconds
\ No newline at end of file
+# 设置只在 config/settings.py 里定义，这里转出去，免得两边不一致（以前这里是 FPS = 50）
+from config.settings import *
@@ -1,15 +1,98 @@
 import pygame
+import numpy as np
 from config.settings import *
+from .images import get_image
+from .swarm import rect_round
 
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self, pos, direction):
-        super().__init__()
-        self.image = pygame.Surface((BULLET_SIZE, BULLET_SIZE))
-        self.image.fill(WHITE)
-        self.rect = self.image.get_rect(center=pos)
+BULLET_CAPACITY = 1024
+
+class BulletPool:
+    """所有射击敌人共用的子弹池：固定容量、预分配槽位，位置和方向放在数组里。
+
+    子弹飞出屏幕后自动回收；池满时新子弹会被丢弃并计入 dropped。
+    """
+    def __init__(self, capacity=BULLET_CAPACITY):
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.float64)  # rect 左上角，整数值
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.dx = np.zeros(capacity, dtype=np.float64)
+        self.dy = np.zeros(capacity, dtype=np.float64)
+        # 上一个模拟帧的位置，渲染插值用
+        self.px = np.zeros(capacity, dtype=np.float64)
+        self.py = np.zeros(capacity, dtype=np.float64)
+        self.alive = np.zeros(capacity, dtype=np.bool_)
+        self.free = list(range(capacity - 1, -1, -1))
         self.speed = BULLET_SPEED
-        self.direction = direction
+        self.size = BULLET_SIZE
+        self.dropped = 0
+        self.image = get_image('bullet', BULLET_SIZE, WHITE)
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    def spawn(self, pos, direction):
+        """在 pos（中心点）生成一颗沿 direction 飞行的子弹，返回槽位，池满返回 -1。"""
+        if not self.free:
+            self.dropped += 1
+            return -1
+        i = self.free.pop()
+        rect = pygame.Rect(0, 0, self.size, self.size)
+        rect.center = pos
+        self.x[i], self.y[i] = rect.x, rect.y
+        self.px[i], self.py[i] = rect.x, rect.y
+        self.dx[i], self.dy[i] = direction.x, direction.y
+        self.alive[i] = True
+        return i
+
+    def kill(self, i):
+        if self.alive[i]:
+            self.alive[i] = False
+            self.free.append(i)
+
+    def clear(self):
+        self.alive[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+
+    def live(self):
+        return np.flatnonzero(self.alive)
 
     def update(self):
-        self.rect.x += self.direction.x * self.speed
-        self.rect.y += self.direction.y * self.speed
\ No newline at end of file
+        live = self.live()
+        if not len(live):
+            return
+        self.px[live] = self.x[live]
+        self.py[live] = self.y[live]
+        x = rect_round(self.x[live] + self.dx[live] * self.speed)
+        y = rect_round(self.y[live] + self.dy[live] * self.speed)
+        self.x[live] = x
+        self.y[live] = y
+        # 完全飞出屏幕的子弹直接回收
+        gone = live[(x + self.size <= 0) | (x >= SCREEN_WIDTH) |
+                    (y + self.size <= 0) | (y >= SCREEN_HEIGHT)]
+        if len(gone):
+            self.alive[gone] = False
+            self.free.extend(gone.tolist())
+
+    def collide(self, rect):
+        """返回与 rect 相交的子弹槽位。"""
+        live = self.live()
+        x, y = self.x[live], self.y[live]
+        hit = ((x < rect.right) & (x + self.size > rect.left) &
+               (y < rect.bottom) & (y + self.size > rect.top))
+        return live[hit].tolist()
+
+    def draw(self, surface, doreturn=False, alpha=1.0):
+        """一次 blits 画出所有活着的子弹；doreturn=True 时返回画过的区域。
+        alpha < 1 时画在上一帧和这一帧位置之间。"""
+        live = self.live()
+        if not len(live):
+            return []
+        image = self.image
+        x, y = self.x[live], self.y[live]
+        if alpha < 1:
+            px, py = self.px[live], self.py[live]
+            x = rect_round(px + (x - px) * alpha)
+            y = rect_round(py + (y - py) * alpha)
+        xs = x.astype(np.int64).tolist()
+        ys = y.astype(np.int64).tolist()
+        return surface.blits([(image, pos) for pos in zip(xs, ys)], doreturn=doreturn) or []
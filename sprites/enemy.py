@@ -1,29 +1,31 @@
 import pygame
-import random
 import math
 from config.settings import *
-from .bullet import Bullet
+from utils import rng
+from utils.clock import get_ticks
+from utils.flowfield import chase_vector
+from .images import enemy_image
+from .spawn import OUTSIDE_CENTER, spawn_tables, sample_position
 
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, pos=None):
         super().__init__()
-        self.image = pygame.Surface((ENEMY_SIZE, ENEMY_SIZE))
-        self.image.fill(PURPLE)
-        self._init_position()
+        self.image = enemy_image('enemy', ENEMY_SIZE, PURPLE)
+        self._init_position(pos)
         self._init_movement()
 
-    def _init_position(self):
-        rx = list(range(0, 301)) + list(range(500, SCREEN_WIDTH + 1))
-        ry = list(range(0, 201)) + list(range(400, SCREEN_HEIGHT + 1))
-        x, y = random.choice(rx), random.choice(ry)
-        self.rect = self.image.get_rect(center=(x, y))
+    def _init_position(self, pos=None):
+        # pos 为 None 时在屏幕中间以外随机取一个点（候选坐标表只算一次）
+        if pos is None:
+            pos = sample_position()
+        self.rect = self.image.get_rect(center=pos)
 
     def _init_movement(self):
         self.speed = ENEMY_SPEED
         self.state = "patrol"
-        self.patrol_points = [(x, y) for x in range(0, SCREEN_WIDTH, 200) 
-                            for y in range(0, SCREEN_HEIGHT, 200)]
-        self.target_point = random.choice(self.patrol_points)
+        # 巡逻点所有敌人共用一份
+        self.patrol_points = spawn_tables(SCREEN_WIDTH, SCREEN_HEIGHT).patrol_points
+        self.target_point = rng.choice(self.patrol_points)
         self.attack_range = ATTACK_RANGE
         self.disengage_range = DISENGAGE_RANGE
 
@@ -49,29 +51,28 @@ class Enemy(pygame.sprite.Sprite):
         if d.length() > self.speed:
             d = d.normalize() * self.speed
         else:
-            self.target_point = random.choice(self.patrol_points)
+            self.target_point = rng.choice(self.patrol_points)
 
         self.rect.x += d.x
         self.rect.y += d.y
 
     def _attack(self, target):
-        dx = target[0] - self.rect.centerx
-        dy = target[1] - self.rect.centery
-        dist = math.hypot(dx, dy)
+        # 有障碍物时沿共享流场走，否则直线追击
+        dx, dy, dist = chase_vector(self.rect.center, target)
 
         if dist != 0:
             self.rect.x += self.speed * dx / dist
             self.rect.y += self.speed * dy / dist
 
 class ShootingEnemy(Enemy):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, bullet_pool=None, pos=None):
+        super().__init__(pos)
         self.speed = SHOOTING_ENEMY_SPEED
-        self.image = pygame.Surface((SHOOTING_ENEMY_SIZE, SHOOTING_ENEMY_SIZE)) #很重要，要先设置大小，再填充颜色，新的Surface会覆盖原有的Surface，没搞懂
-        self.image.fill(RED)
+        self.image = enemy_image('shooting', SHOOTING_ENEMY_SIZE, RED) #贴图是共享的，只换引用；rect 仍是 Enemy 里按 ENEMY_SIZE 算的
         self.shoot_cooldown = SHOOT_COOLDOWN
         self.last_shot = 0
-        self.bullets = pygame.sprite.Group()
+        # 子弹放进 Game 共用的 BulletPool
+        self.bullet_pool = bullet_pool
 
     def update(self, player_pos, player_has_power=False):
         if player_has_power:
@@ -79,17 +80,18 @@ class ShootingEnemy(Enemy):
         else:
             super().update(player_pos)
             
-        now = pygame.time.get_ticks()
+        now = get_ticks()
         if now - self.last_shot > self.shoot_cooldown:
             self.shoot_bullet(player_pos)
             self.last_shot = now
-        self.bullets.update()
 
     def shoot_bullet(self, target):
         dx = target[0] - self.rect.centerx
         dy = target[1] - self.rect.centery
+        if self.bullet_pool is None or (dx == 0 and dy == 0):
+            return
         direction = pygame.math.Vector2(dx, dy).normalize()
-        self.bullets.add(Bullet(self.rect.center, direction))
+        self.bullet_pool.spawn(self.rect.center, direction)
 
     def runaway(self, player_pos):
         dx = self.rect.centerx - player_pos[0]
@@ -103,31 +105,31 @@ class ShootingEnemy(Enemy):
                 self.rect.y = new_y
 
 class StrongEnemy(Enemy):
-    def __init__(self):
-        super().__init__()
-        self.image = pygame.Surface((STRONG_ENEMY_SIZE, STRONG_ENEMY_SIZE))
-        self.image.fill(PURPLE)  # 初始颜色
+    def __init__(self, pos=None):
+        super().__init__(pos)
+        self.image = enemy_image('strong', STRONG_ENEMY_SIZE, PURPLE, STRONG_ENEMY_HP)  # 初始颜色
         self.speed = STRONG_ENEMY_SPEED
         self.hp = STRONG_ENEMY_HP
         # 删除左右往返移动的属性
 
+    def set_hp(self, hp):
+        self.hp = hp
+        # 根据剩余血量改变颜色
+        if hp == 2:
+            self.image = enemy_image('strong', STRONG_ENEMY_SIZE, DARK_PURPLE, 2)
+        elif hp == 1:
+            self.image = enemy_image('strong', STRONG_ENEMY_SIZE, MIDNIGHT_PURPLE, 1)
+
     def update(self, player_pos):
         # 始终向玩家追随
-        dx = player_pos[0] - self.rect.centerx
-        dy = player_pos[1] - self.rect.centery
-        dist = math.hypot(dx, dy)
+        dx, dy, dist = chase_vector(self.rect.center, player_pos)
         if dist != 0:
             # 使用归一化方向向量更新位置
             self.rect.x += int(self.speed * dx / dist)
             self.rect.y += int(self.speed * dy / dist)
 
     def hit(self):
-        self.hp -= 1
-        # 根据剩余血量改变颜色
-        if self.hp == 2:
-            self.image.fill(DARK_PURPLE)
-        elif self.hp == 1:
-            self.image.fill(MIDNIGHT_PURPLE)
+        self.set_hp(self.hp - 1)
         # 血量归零时移除敌人
         if self.hp <= 0:
             self.kill()
@@ -135,39 +137,81 @@ class StrongEnemy(Enemy):
         return False
     
 class CopyEnemy(Enemy):
-    def __init__(self):
-        super().__init__()
-        self.image = pygame.Surface((COPY_ENEMY_SIZE, COPY_ENEMY_SIZE))
-        self.image.fill(BLUE)
+    def __init__(self, pos=None):
+        super().__init__(pos)
+        self.image = enemy_image('copy', COPY_ENEMY_SIZE, BLUE)
         self.speed = COPY_ENEMY_SPEED
         # Add copy cooldown attributes
         self.copy_cooldown = 10000  # 10 seconds in milliseconds
-        self.last_copy = pygame.time.get_ticks()
+        self.last_copy = get_ticks()
         # Store reference to the game's enemy group (will be set by Game class)
         self.enemy_group = None
+        # 可选的 ReplicationScheduler；为 None 时直接复制
+        self.scheduler = None
+        # 超出预算的复制体会合并进来，一个精灵代表 members 个敌人
+        self.members = 1
 
     def update(self, player_pos):
         # Normal movement
-        dx = player_pos[0] - self.rect.centerx
-        dy = player_pos[1] - self.rect.centery
-        dist = math.hypot(dx, dy)
+        dx, dy, dist = chase_vector(self.rect.center, player_pos)
         if dist != 0:
             self.rect.x += int(self.speed * dx / dist)
             self.rect.y += int(self.speed * dy / dist)
 
         # Check if it's time to create a copy
-        now = pygame.time.get_ticks()
+        now = get_ticks()
         if now - self.last_copy > self.copy_cooldown and self.enemy_group is not None:
-            # Create new CopyEnemy
-            new_copy = CopyEnemy()
-            # Set its position near the original
-            new_copy.rect.center = (
-                self.rect.centerx + random.randint(-50, 50),
-                self.rect.centery + random.randint(-50, 50)
-            )
-            # Give it reference to the enemy group
-            new_copy.enemy_group = self.enemy_group
-            # Add it to the game's enemy group
-            self.enemy_group.add(new_copy)
-            # Reset the timer
-            self.last_copy = now
\ No newline at end of file
+            self.replicate(now)
+
+    def replicate(self, now):
+        if self.scheduler is not None:
+            # 合并体里的每个成员都要复制一次
+            self.scheduler.request(self, self.members)
+        else:
+            self.enemy_group.add(self.spawn_copy())
+        # Reset the timer
+        self.last_copy = now
+
+    def spawn_copy(self):
+        # Create new CopyEnemy
+        new_copy = CopyEnemy()
+        # Set its position near the original
+        new_copy.rect.center = (
+            self.rect.centerx + rng.randint(-50, 50),
+            self.rect.centery + rng.randint(-50, 50)
+        )
+        # Give it reference to the enemy group
+        new_copy.enemy_group = self.enemy_group
+        new_copy.scheduler = self.scheduler
+        return new_copy
+
+    def hit(self):
+        # 合并体每次被撞只少一个成员
+        self.members -= 1
+        if self.members <= 0:
+            self.kill()
+            return True
+        return False
+
+KINDS = {'enemy': Enemy, 'shooting': ShootingEnemy, 'strong': StrongEnemy, 'copy': CopyEnemy}
+
+def spawn(kind, count, region=OUTSIDE_CENTER, group=None, bullet_pool=None, scheduler=None):
+    """一次生成 count 个敌人并（给了 group 时）一次性加入 group，返回生成的列表。
+
+    kind 是敌人类或 KINDS 里的名字；region 是 spawn.OUTSIDE_CENTER、spawn.ANYWHERE 或一个 Rect。
+    射击敌人共用 bullet_pool，复制敌人复制进 group 并交给 scheduler 调度。
+    随机数的消耗顺序和逐个 Enemy() 完全相同，同一个种子生成的敌人也相同。
+    """
+    cls = KINDS.get(kind, kind)
+    tables = spawn_tables(SCREEN_WIDTH, SCREEN_HEIGHT)
+    if cls is ShootingEnemy:
+        enemies = [ShootingEnemy(bullet_pool, sample_position(region, tables)) for _ in range(count)]
+    else:
+        enemies = [cls(sample_position(region, tables)) for _ in range(count)]
+    if cls is CopyEnemy:
+        for enemy in enemies:
+            enemy.enemy_group = group
+            enemy.scheduler = scheduler
+    if group is not None:
+        group.add(enemies)
+    return enemies
@@ -0,0 +1,41 @@
+"""共享的精灵贴图缓存：同样的 (类型, 大小, 颜色, 边框, 血量) 只生成一次，精灵只引用不持有。"""
+import pygame
+from config.settings import *
+
+_cache = {}
+# id(贴图) -> 缓存键，用来在别的进程里按键重新生成同样的贴图（见 pipeline.py）
+_keys = {}
+# 敌人贴图的边框样式 (颜色, 宽度)，None 表示不画边框；由 Game 在生成敌人之前设置
+_enemy_border = None
+
+def set_enemy_border(border):
+    global _enemy_border
+    _enemy_border = border
+
+def get_image(kind, size, color, border=None, hp=None):
+    key = (kind, size, color, border, hp)
+    image = _cache.get(key)
+    if image is None:
+        image = pygame.Surface((size, size))
+        image.fill(color)
+        if border is not None:
+            border_color, width = border
+            pygame.draw.rect(image, border_color, image.get_rect(), width)
+        # 有窗口时转换成显示格式，blit 走快速路径
+        if pygame.display.get_surface() is not None:
+            image = image.convert()
+        _cache[key] = image
+        _keys[id(image)] = key
+    return image
+
+def image_key(image):
+    """get_image 生成的贴图对应的 (类型, 大小, 颜色, 边框, 血量)，可以再传给 get_image。"""
+    return _keys[id(image)]
+
+def enemy_image(kind, size, color, hp=None):
+    return get_image(kind, size, color, _enemy_border, hp)
+
+def clear_cache():
+    """切换显示模式后调用，让贴图按新的显示格式重新生成。"""
+    _cache.clear()
+    _keys.clear()
@@ -0,0 +1,111 @@
+"""敌人 AI 的细节层次（LOD）调度：离玩家近的敌人每帧完整更新，
+远处的敌人（不管在巡逻还是追击）每 interval 帧更新一次，中间按上次的位移外推。"""
+import time
+from config.settings import *
+from .enemy import ShootingEnemy
+
+class AIScheduler:
+    """代替 Game.update 里逐个 enemy.update 的循环。
+
+    远处敌人按加入顺序错开相位，每帧只有大约 1/interval 的远处敌人做完整更新，
+    射击、复制之类的决策也就分散到了不同帧。budget_ms 不为 None 时，远处敌人的完整更新
+    超过这个真实时间就推迟到下一帧优先处理（这样结果依赖机器快慢，录回放时不要设）。
+    """
+    def __init__(self, near_radius=None, interval=None, budget_ms=None):
+        self.near_radius = AI_NEAR_RADIUS if near_radius is None else near_radius
+        self.interval = AI_FAR_INTERVAL if interval is None else interval
+        self.budget_ms = AI_BUDGET_MS if budget_ms is None else budget_ms
+        self.tick = 0
+        self.next_phase = 0
+        self.tracked = {}   # sprite -> [相位, 每帧 dx, 每帧 dy]
+        self.overdue = {}   # 因为超出预算被推迟的远处敌人
+        # 累计计数
+        self.updated = 0
+        self.skipped = 0
+        self.deferred = 0
+        self.last = (0, 0, 0)
+
+    def _track(self, enemy):
+        entry = self.tracked.get(enemy)
+        if entry is None:
+            entry = self.tracked[enemy] = [self.next_phase % self.interval, 0, 0]
+            self.next_phase += 1
+        return entry
+
+    def set_interval(self, interval):
+        """改变远处敌人的更新间隔；已经跟踪的敌人按新的间隔重新错开相位。"""
+        if interval == self.interval:
+            return
+        self.interval = interval
+        for i, entry in enumerate(self.tracked.values()):
+            entry[0] = i % interval
+        self.next_phase = len(self.tracked)
+
+    def _full(self, enemy, entry, player_pos, player_has_power):
+        rect = enemy.rect
+        x, y = rect.x, rect.y
+        if isinstance(enemy, ShootingEnemy):
+            enemy.update(player_pos, player_has_power)
+        else:
+            enemy.update(player_pos)
+        entry[1] = rect.x - x
+        entry[2] = rect.y - y
+
+    def update(self, enemies, player_pos, player_has_power=False):
+        px, py = player_pos
+        near_sq = self.near_radius * self.near_radius
+        phase = self.tick % self.interval
+        budget = None if self.budget_ms is None else time.perf_counter() + self.budget_ms / 1000
+        updated = skipped = deferred = 0
+        far_due = []
+        tracked = self.tracked
+        overdue = self.overdue
+        for enemy in enemies:
+            entry = tracked.get(enemy) or self._track(enemy)
+            rect = enemy.rect
+            dx = rect.centerx - px
+            dy = rect.centery - py
+            if dx * dx + dy * dy < near_sq:
+                self._full(enemy, entry, player_pos, player_has_power)
+                if overdue:
+                    overdue.pop(enemy, None)
+                updated += 1
+            elif entry[0] == phase or enemy in overdue:
+                far_due.append((enemy, entry))
+            else:
+                rect.x += entry[1]
+                rect.y += entry[2]
+                skipped += 1
+
+        # 推迟过的排在前面，保证不会一直轮不到
+        far_due.sort(key=lambda item: item[0] not in self.overdue)
+        for enemy, entry in far_due:
+            if budget is not None and time.perf_counter() > budget:
+                self.overdue[enemy] = None
+                enemy.rect.x += entry[1]
+                enemy.rect.y += entry[2]
+                deferred += 1
+                continue
+            self.overdue.pop(enemy, None)
+            self._full(enemy, entry, player_pos, player_has_power)
+            updated += 1
+
+        # 已经不在场上的敌人不再跟踪
+        if len(self.tracked) > 2 * (updated + skipped + deferred) + 64:
+            alive = set(enemies)
+            self.tracked = {e: v for e, v in self.tracked.items() if e in alive}
+            self.overdue = {e: v for e, v in self.overdue.items() if e in alive}
+        self.tick += 1
+        self.updated += updated
+        self.skipped += skipped
+        self.deferred += deferred
+        self.last = (updated, skipped, deferred)
+
+    def stats(self):
+        total = self.updated + self.skipped + self.deferred
+        return {
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'deferred': self.deferred,
+            'skip_ratio': (self.skipped + self.deferred) / total if total else 0.0,
+        }
@@ -1,18 +1,18 @@
 import pygame
-import random
 from config.settings import *
+from utils import rng
+from .images import get_image
 
 class Powerup(pygame.sprite.Sprite):
     def __init__(self):
         super().__init__()
-        self.image = pygame.Surface((POWERUP_SIZE, POWERUP_SIZE))
-        self.image.fill(YELLOW)
+        self.image = get_image('powerup', POWERUP_SIZE, YELLOW)
         self.rect = self.image.get_rect(
-            center=(random.randint(0, SCREEN_WIDTH), 
-                   random.randint(0, SCREEN_HEIGHT))
+            center=(rng.randint(0, SCREEN_WIDTH), 
+                   rng.randint(0, SCREEN_HEIGHT))
         )
-        self.speed_x = random.choice([-POWERUP_SPEED, POWERUP_SPEED])
-        self.speed_y = random.choice([-POWERUP_SPEED, POWERUP_SPEED])
+        self.speed_x = rng.choice([-POWERUP_SPEED, POWERUP_SPEED])
+        self.speed_y = rng.choice([-POWERUP_SPEED, POWERUP_SPEED])
 
     def update(self):
         self.rect.x += self.speed_x
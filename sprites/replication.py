@@ -0,0 +1,51 @@
+"""CopyEnemy 的集中复制调度：全局实体预算、每帧生成上限，超出预算的复制合并成一个群体单位（有上限）。"""
+from collections import deque
+from config.settings import *
+
+class ReplicationScheduler:
+    def __init__(self, enemy_group, budget=None, spawns_per_frame=None, max_members=None):
+        self.enemy_group = enemy_group
+        # 默认值在这里读，这样改过的设置（例如参数扫描）也能生效
+        self.budget = COPY_ENEMY_BUDGET if budget is None else budget
+        self.spawns_per_frame = COPY_SPAWNS_PER_FRAME if spawns_per_frame is None else spawns_per_frame
+        self.max_members = COPY_MEMBERS_MAX if max_members is None else max_members
+        self.pending = deque()  # [parent, 还要复制的数量]
+        self.spawned = 0
+        self.merged = 0
+
+    def __len__(self):
+        return sum(count for _, count in self.pending)
+
+    def request(self, parent, count=1):
+        """CopyEnemy 到了复制时间时调用；真正的生成放到 update() 里分帧进行。"""
+        self.pending.append([parent, count])
+
+    def update(self):
+        """每帧调用一次：在预算内最多生成 spawns_per_frame 个，超出预算的并入父体。"""
+        spawns = self.spawns_per_frame
+        while self.pending:
+            entry = self.pending[0]
+            parent, count = entry
+            if not parent.alive():
+                self.pending.popleft()
+                continue
+            room = self.budget - len(self.enemy_group)
+            if room <= 0:
+                # 没有预算了：不再生成新精灵，让父体代表这些复制。
+                # 合并体的每个成员都会复制，不封顶的话 members 会指数增长，所以最多到 max_members
+                merged = min(count, self.max_members - parent.members)
+                if merged > 0:
+                    parent.members += merged
+                    self.merged += merged
+                self.pending.popleft()
+                continue
+            if spawns <= 0:
+                break
+            n = min(count, room, spawns)
+            for _ in range(n):
+                self.enemy_group.add(parent.spawn_copy())
+            self.spawned += n
+            spawns -= n
+            entry[1] -= n
+            if entry[1] == 0:
+                self.pending.popleft()
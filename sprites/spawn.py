@@ -0,0 +1,35 @@
+"""出生点和巡逻点表：每个屏幕尺寸只算一次，所有敌人共用。"""
+from functools import lru_cache
+import pygame
+from config.settings import *
+from utils import rng
+
+# 出生区域：OUTSIDE_CENTER 避开屏幕中间玩家出生的地方，ANYWHERE 是整个屏幕，
+# 也可以直接传一个 pygame.Rect
+OUTSIDE_CENTER = "outside_center"
+ANYWHERE = "anywhere"
+
+class SpawnTables:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # 中心点坐标的候选值，和原来每个敌人现建的列表完全相同，所以随机结果不变
+        self.xs = tuple(range(0, 301)) + tuple(range(500, width + 1))
+        self.ys = tuple(range(0, 201)) + tuple(range(400, height + 1))
+        self.patrol_points = tuple((x, y) for x in range(0, width, 200)
+                                   for y in range(0, height, 200))
+
+@lru_cache(maxsize=None)
+def spawn_tables(width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+    return SpawnTables(width, height)
+
+def sample_position(region=OUTSIDE_CENTER, tables=None):
+    """在 region 里随机取一个中心点。"""
+    if tables is None:
+        tables = spawn_tables(SCREEN_WIDTH, SCREEN_HEIGHT)
+    if region == OUTSIDE_CENTER:
+        return rng.choice(tables.xs), rng.choice(tables.ys)
+    if region == ANYWHERE:
+        return rng.randint(0, tables.width), rng.randint(0, tables.height)
+    region = pygame.Rect(region)
+    return rng.randint(region.left, region.right), rng.randint(region.top, region.bottom)
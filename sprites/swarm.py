@@ -0,0 +1,225 @@
+"""NumPy 向量化的敌人群：把 Enemy/StrongEnemy/CopyEnemy 的位置、速度和状态机放进连续数组，
+每帧一次性推进所有敌人，只把需要绘制的敌人的 rect 写回。"""
+import pygame
+import numpy as np
+from config.settings import *
+from utils import rng
+from utils.clock import get_ticks
+from utils.flowfield import active_field
+from .enemy import Enemy, StrongEnemy, CopyEnemy
+
+KIND_FSM = 0    # Enemy: patrol/attack 状态机，rect 按浮点四舍五入
+KIND_CHASE = 1  # StrongEnemy/CopyEnemy: 一直追玩家，位移先 int() 截断
+
+PATROL = 0
+ATTACK = 1
+STATE_NAMES = ("patrol", "attack")
+
+MANAGED = {Enemy: KIND_FSM, StrongEnemy: KIND_CHASE, CopyEnemy: KIND_CHASE}
+
+def rect_round(v):
+    # pygame.Rect 对浮点坐标是四舍五入（0.5 远离零），这里保持一致；子弹池也用它
+    return np.where(v >= 0, np.floor(v + 0.5), np.ceil(v - 0.5))
+
+class SwarmGroup(pygame.sprite.Group):
+    """可以直接替换 Game.enemies 的 Group。受管的敌人由 step() 批量更新，
+    其他敌人（如 ShootingEnemy）仍由 unmanaged() 交给 Game 逐个 update。"""
+    def __init__(self, *sprites, capacity=64):
+        self.count = 0
+        self.slots = []
+        self.slot_of = {}
+        self.others = {}
+        self._alloc(capacity)
+        super().__init__(*sprites)
+
+    def _alloc(self, capacity):
+        old = getattr(self, 'x', None)
+        names = ('x', 'y', 'half_w', 'half_h', 'w', 'h', 'speed', 'tx', 'ty',
+                 'attack_range', 'disengage_range', 'last_copy', 'copy_cooldown')
+        for name in names:
+            arr = np.zeros(capacity, dtype=np.float64)
+            if old is not None:
+                arr[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, arr)
+        for name, dtype in (('kind', np.uint8), ('state', np.uint8), ('copier', np.bool_), ('shown', np.bool_)):
+            arr = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                arr[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, arr)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        kind = MANAGED.get(type(sprite))
+        if kind is None:
+            self.others[sprite] = None
+            return
+        if self.count == len(self.x):
+            self._alloc(len(self.x) * 2)
+        i = self.count
+        self.count += 1
+        self.slots.append(sprite)
+        self.slot_of[sprite] = i
+        self.kind[i] = kind
+        self.w[i], self.h[i] = sprite.rect.w, sprite.rect.h
+        self.half_w[i], self.half_h[i] = sprite.rect.w // 2, sprite.rect.h // 2
+        self.speed[i] = sprite.speed
+        self.attack_range[i] = sprite.attack_range
+        self.disengage_range[i] = sprite.disengage_range
+        self.copier[i] = isinstance(sprite, CopyEnemy)
+        self.shown[i] = True
+        if self.copier[i]:
+            self.last_copy[i] = sprite.last_copy
+            self.copy_cooldown[i] = sprite.copy_cooldown
+        self.pull(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        if sprite in self.others:
+            del self.others[sprite]
+            return
+        i = self.slot_of.pop(sprite, None)
+        if i is None:
+            return
+        self._write_back(i)
+        # 用最后一个槽位填补空位，保持数组连续
+        last = self.count - 1
+        if i != last:
+            moved = self.slots[last]
+            self.slots[i] = moved
+            self.slot_of[moved] = i
+            for name in ('x', 'y', 'half_w', 'half_h', 'w', 'h', 'speed', 'tx', 'ty',
+                         'attack_range', 'disengage_range', 'last_copy', 'copy_cooldown',
+                         'kind', 'state', 'copier', 'shown'):
+                arr = getattr(self, name)
+                arr[i] = arr[last]
+        self.slots.pop()
+        self.count = last
+
+    def pull(self, sprite):
+        """精灵的 rect/状态在数组之外被改动过（例如被弹开）时，重新读入数组。"""
+        i = self.slot_of.get(sprite)
+        if i is None:
+            return
+        self.x[i], self.y[i] = sprite.rect.x, sprite.rect.y
+        self.state[i] = ATTACK if getattr(sprite, 'state', "patrol") == "attack" else PATROL
+        if self.kind[i] == KIND_FSM:
+            self.tx[i], self.ty[i] = sprite.target_point
+
+    def _write_back(self, i):
+        sprite = self.slots[i]
+        sprite.rect.x, sprite.rect.y = int(self.x[i]), int(self.y[i])
+        sprite.state = STATE_NAMES[self.state[i]]
+        if self.kind[i] == KIND_FSM:
+            sprite.target_point = (self.tx[i].item(), self.ty[i].item())
+        if self.copier[i]:
+            sprite.last_copy = self.last_copy[i].item()
+
+    def copy(self):
+        # 拷贝只用于遍历，不需要再建一份数组
+        return pygame.sprite.Group(self.sprites())
+
+    def unmanaged(self):
+        return list(self.others)
+
+    def step(self, player_pos, now=None):
+        """一次推进所有受管敌人，行为与各自的 update(player_pos) 相同。"""
+        n = self.count
+        if n == 0:
+            return
+        px, py = player_pos
+        x, y = self.x[:n], self.y[:n]
+        speed = self.speed[:n]
+        fsm = self.kind[:n] == KIND_FSM
+        state = self.state[:n]
+
+        dx = px - (x + self.half_w[:n])
+        dy = py - (y + self.half_h[:n])
+        # Enemy.update 用 Vector2.distance_to，追击方向用 math.hypot
+        dist = np.sqrt(dx * dx + dy * dy)
+        hyp = np.hypot(dx, dy)
+        safe = np.where(hyp != 0, hyp, 1.0)
+        step_x = np.where(hyp != 0, speed * dx / safe, 0.0)
+        step_y = np.where(hyp != 0, speed * dy / safe, 0.0)
+        field = active_field()
+        if field is not None:
+            # 有障碍物时追击方向改为流场方向（和 chase_vector 一致）
+            fx, fy, has_dir = field.sample(x + self.half_w[:n], y + self.half_h[:n])
+            step_x = np.where(has_dir, speed * fx, step_x)
+            step_y = np.where(has_dir, speed * fy, step_y)
+
+        chase = ~fsm
+        attack = fsm & (state == ATTACK)
+        patrol = fsm & (state == PATROL)
+
+        # 巡逻：朝目标点走，够近就直接走到目标点并换一个新目标
+        tdx = self.tx[:n] - (x + self.half_w[:n])
+        tdy = self.ty[:n] - (y + self.half_h[:n])
+        tlen = np.sqrt(tdx * tdx + tdy * tdy)
+        far = tlen > speed
+        tsafe = np.where(far, tlen, 1.0)
+        move_x = np.where(far, tdx / tsafe * speed, tdx)
+        move_y = np.where(far, tdy / tsafe * speed, tdy)
+        arrived = np.flatnonzero(patrol & ~far)
+
+        new_x = np.where(chase, x + np.trunc(step_x),
+                         np.where(attack, rect_round(x + step_x), rect_round(x + move_x)))
+        new_y = np.where(chase, y + np.trunc(step_y),
+                         np.where(attack, rect_round(y + step_y), rect_round(y + move_y)))
+        x[:] = new_x
+        y[:] = new_y
+
+        engage = patrol & (dist < self.attack_range[:n])
+        disengage = attack & (dist > self.disengage_range[:n])
+        state[engage] = ATTACK
+        state[disengage] = PATROL
+        self.tx[:n][disengage] = x[disengage] + self.half_w[:n][disengage]
+        self.ty[:n][disengage] = y[disengage] + self.half_h[:n][disengage]
+
+        for i in arrived.tolist():
+            self.tx[i], self.ty[i] = rng.choice(self.slots[i].patrol_points)
+
+        # CopyEnemy 的复制在数组更新完之后做，避免 add() 中途扩容
+        if self.copier[:n].any():
+            if now is None:
+                now = get_ticks()
+            due = np.flatnonzero(self.copier[:n] & (now - self.last_copy[:n] > self.copy_cooldown[:n]))
+            for i in due.tolist():
+                sprite = self.slots[i]
+                if sprite.enemy_group is None:
+                    continue
+                self._write_back(i)
+                self.last_copy[i] = now
+                sprite.replicate(now)
+
+    def sync_rects(self, area=None):
+        """只把与 area（默认整个屏幕）相交的敌人的 rect 写回，返回写回的数量。"""
+        n = self.count
+        if n == 0:
+            return 0
+        if area is None:
+            area = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        x, y = self.x[:n], self.y[:n]
+        inside = ((x < area.right) & (x + self.w[:n] > area.left) &
+                  (y < area.bottom) & (y + self.h[:n] > area.top))
+        # 刚离开 area 的敌人也写回一次，免得 rect 停在边上
+        visible = np.flatnonzero(inside | self.shown[:n])
+        self.shown[:n] = inside
+        xs = x[visible].astype(np.int64).tolist()
+        ys = y[visible].astype(np.int64).tolist()
+        slots = self.slots
+        for i, rx, ry in zip(visible.tolist(), xs, ys):
+            rect = slots[i].rect
+            rect.x = rx
+            rect.y = ry
+        return len(xs)
+
+    def flush(self):
+        """把所有受管敌人的完整状态写回精灵（例如在保存或切换后端之前）。"""
+        for i in range(self.count):
+            self._write_back(i)
+
+def make_enemy_group(swarm=False):
+    """swarm=True 时返回 SwarmGroup，否则返回普通 Group。"""
+    if swarm:
+        return SwarmGroup()
+    return pygame.sprite.Group()
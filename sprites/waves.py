@@ -0,0 +1,105 @@
+"""数据驱动的关卡：levels/<name>.json 描述每一关的波次，加载时编译成按时间排好的生成表，
+游戏里由 WaveSpawner 每个 tick 按预算生成，几千个敌人的波次也分散到多帧，换关不会卡一帧。
+
+文件格式：
+    {"levels": [{"name": "Level 1",
+                 "waves": [{"at_ms": 0,
+                            "spawns": [{"kind": "enemy", "count": 3, "region": "outside_center"}]}]}]}
+
+kind 是 sprites.enemy.KINDS 里的名字；region 可以省略（默认 outside_center），也可以是
+"anywhere" 或 [x, y, w, h]；at_ms 是从这一关开始算起的模拟时间。
+"""
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+from config.settings import *
+from utils.clock import get_ticks
+from .enemy import KINDS, spawn
+from .spawn import OUTSIDE_CENTER, ANYWHERE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SpawnEntry = namedtuple("SpawnEntry", "at_ms kind count region")
+Level = namedtuple("Level", "name schedule total")
+
+def level_path(name):
+    return os.path.join(ROOT, LEVELS_DIR, f"{name}.json")
+
+def compile_level(data, where="level"):
+    """一关的原始数据 -> Level；schedule 是按 at_ms 排好的 SpawnEntry 元组（同一时间保持文件里的顺序）。"""
+    entries = []
+    for w, wave in enumerate(data.get('waves', ())):
+        at_ms = wave.get('at_ms', 0)
+        for s, item in enumerate(wave['spawns']):
+            place = f"{where} wave {w} spawn {s}"
+            if item['kind'] not in KINDS:
+                raise ValueError(f"{place}: unknown enemy kind {item['kind']!r}")
+            region = item.get('region', OUTSIDE_CENTER)
+            if isinstance(region, list):
+                region = tuple(region)
+            elif region not in (OUTSIDE_CENTER, ANYWHERE):
+                raise ValueError(f"{place}: unknown region {region!r}")
+            if item['count'] < 0 or at_ms < 0:
+                raise ValueError(f"{place}: count and at_ms must not be negative")
+            entries.append(SpawnEntry(at_ms, KINDS[item['kind']], item['count'], region))
+    entries.sort(key=lambda entry: entry.at_ms)
+    return Level(data.get('name', where), tuple(entries), sum(entry.count for entry in entries))
+
+@lru_cache(maxsize=None)
+def load_levels(name):
+    """读取并编译 levels/<name>.json，每个文件只编译一次；返回 Level 元组，第 1 关是下标 0。"""
+    path = level_path(name)
+    with open(path) as f:
+        data = json.load(f)
+    levels = tuple(compile_level(level, f"{path} level {i + 1}") for i, level in enumerate(data['levels']))
+    if not levels:
+        raise ValueError(f"{path}: no levels")
+    return levels
+
+class WaveSpawner:
+    """按生成表陆续生成一关的敌人：每次 update() 把已经到时间的条目生成出来，
+    但一个 tick 最多 per_tick 个，剩下的留到下一个 tick。
+
+    大条目拆开分批生成，随机数的消耗顺序和一次生成完全一样。
+    """
+    def __init__(self, level, group, bullet_pool=None, scheduler=None, per_tick=None):
+        self.level = level
+        self.group = group
+        self.bullet_pool = bullet_pool
+        self.scheduler = scheduler
+        self.per_tick = WAVE_SPAWNS_PER_TICK if per_tick is None else per_tick
+        self.started = get_ticks()
+        self.index = 0
+        self.left = level.schedule[0].count if level.schedule else 0
+        self.spawned = 0
+
+    @property
+    def done(self):
+        return self.index >= len(self.level.schedule)
+
+    def update(self):
+        """生成到期的敌人，返回这次生成的数量。"""
+        schedule = self.level.schedule
+        if self.index >= len(schedule):
+            return 0
+        now = get_ticks() - self.started
+        budget = self.per_tick
+        spawned = 0
+        while self.index < len(schedule) and budget > 0:
+            entry = schedule[self.index]
+            if entry.at_ms > now:
+                break
+            count = min(self.left, budget)
+            if count:
+                spawn(entry.kind, count, entry.region, group=self.group,
+                      bullet_pool=self.bullet_pool, scheduler=self.scheduler)
+            self.left -= count
+            budget -= count
+            spawned += count
+            if self.left == 0:
+                self.index += 1
+                if self.index < len(schedule):
+                    self.left = schedule[self.index].count
+        self.spawned += spawned
+        return spawned
@@ -0,0 +1,270 @@
+"""参数扫描：对 config/settings.py 里的数值做网格或随机采样，每组参数在进程池里跑大量脚本机器人对局。
+
+    python sweep.py --grid ATTACK_RANGE=150,200,250 --grid SHOOT_COOLDOWN=1000,2000 --episodes 200
+    python sweep.py --range STRONG_ENEMY_SPEED=2:5 --samples 16 --levels 1 3 --game main2
+
+结果按 (参数哈希, 种子) 缓存在 --cache 目录，重复扫描时跳过已经跑过的对局。
+
+覆盖设置是改模块全局变量实现的，所以只对运行时才去读的设置有效；已经绑进函数默认参数、
+模块级或类级常量、或者由别的设置算出来的用法改不到。setting_uses() 扫一遍源码：
+完全改不到的设置直接报错，部分用法改不到的给出警告。
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import ast
+import glob
+import hashlib
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+import time
+from collections import defaultdict
+from config import settings
+
+CACHE_DIR = ".sweep_cache"
+CHUNK = 25  # 每个任务跑多少个种子
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# apply_overrides 会改到的模块（以及 config.settings 本身）
+PATCHED = ("sprites", "utils", "main", "headless")
+SOURCES = ("config/settings.py", "main*.py", "headless.py", "sprites/*.py", "utils/*.py")
+
+_defaults = {name: value for name, value in vars(settings).items() if name.isupper()}
+
+def apply_overrides(overrides):
+    """把设置写回 config.settings 以及所有 `from config.settings import *` 过的模块。"""
+    values = dict(_defaults)
+    values.update(overrides)
+    for module in list(sys.modules.values()):
+        name = getattr(module, "__name__", "")
+        if name == "config.settings" or name.startswith(PATCHED):
+            for key, value in values.items():
+                if hasattr(module, key):
+                    setattr(module, key, value)
+
+class _Uses(ast.NodeVisitor):
+    """记下每个设置名在哪里被读：函数体里的算运行时读取，其余（默认参数、装饰器、模块级、类级）算定义时绑定。"""
+    def __init__(self, path, names):
+        self.path = path
+        self.names = names
+        self.depth = 0
+        self.runtime = defaultdict(list)
+        self.bound = defaultdict(list)
+
+    def _function(self, node, body):
+        args = node.args
+        for default in args.defaults + [d for d in args.kw_defaults if d is not None]:
+            self.visit(default)
+        for decorator in getattr(node, "decorator_list", ()):
+            self.visit(decorator)
+        self.depth += 1
+        for child in body:
+            self.visit(child)
+        self.depth -= 1
+
+    def visit_FunctionDef(self, node):
+        self._function(node, node.body)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self._function(node, [node.body])
+
+    def visit_If(self, node):
+        # 脚本入口（命令行参数的默认值等）在工作进程里不会执行
+        test = node.test
+        if (not self.depth and isinstance(test, ast.Compare) and isinstance(test.left, ast.Name)
+                and test.left.id == "__name__"):
+            return
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load) and node.id in self.names:
+            uses = self.runtime if self.depth else self.bound
+            uses[node.id].append(f"{self.path}:{node.lineno}")
+
+def setting_uses(names):
+    """扫描 SOURCES，返回 (运行时读取的位置, 定义时就绑定了的位置)，都是 {设置名: ["文件:行", ...]}。"""
+    runtime = defaultdict(list)
+    bound = defaultdict(list)
+    for pattern in SOURCES:
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern))):
+            with open(path, encoding="utf-8") as f:
+                tree = ast.parse(f.read(), path)
+            uses = _Uses(os.path.relpath(path, ROOT), set(names))
+            uses.visit(tree)
+            for name, places in uses.runtime.items():
+                runtime[name] += places
+            for name, places in uses.bound.items():
+                bound[name] += places
+    return runtime, bound
+
+def settings_hash(overrides, variant, script, max_ticks):
+    key = json.dumps([sorted(overrides.items()), variant, script, max_ticks])
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+def run_chunk(task):
+    """在工作进程里跑一批对局，返回每局的结果。"""
+    overrides, variant, level, seeds, script, max_ticks = task
+    import headless
+    apply_overrides(overrides)
+    results = []
+    for seed in seeds:
+        game = headless.make_game(variant, level, seed=seed)
+        result = headless.HeadlessRunner(game, headless.SCRIPTS[script]).run(max_ticks)
+        results.append({
+            'level': level,
+            'seed': seed,
+            'outcome': result['outcome'],
+            'survival_s': result['sim_ms'] / 1000,
+            'cleared': result['outcome'] == "victory" or game.current_level > level,
+        })
+    return overrides, results
+
+class ResultCache:
+    """每组参数一个 JSON Lines 文件，每行是一局的结果。"""
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".jsonl")
+
+    def load(self, key):
+        done = {}
+        try:
+            with open(self.path(key)) as f:
+                for line in f:
+                    row = json.loads(line)
+                    done[(row['level'], row['seed'])] = row
+        except FileNotFoundError:
+            pass
+        return done
+
+    def append(self, key, rows):
+        with open(self.path(key), "a") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+
+def build_configs(grid, ranges, samples, seed=0):
+    """网格参数做笛卡尔积；有 ranges 时再对每个网格点随机采样 samples 组。"""
+    names = sorted(grid)
+    points = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if not ranges:
+        return points
+    rng = random.Random(seed)
+    configs = []
+    for point in points:
+        for _ in range(samples):
+            config = dict(point)
+            for name, (low, high) in sorted(ranges.items()):
+                config[name] = round(rng.uniform(low, high), 3)
+            configs.append(config)
+    return configs
+
+def parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def sweep(configs, variant="main", levels=(1, 2, 3), episodes=100, script="flee",
+          max_ticks=None, processes=None, cache_dir=CACHE_DIR):
+    """跑完所有 (参数, 关卡, 种子) 组合，返回每组参数的汇总和吞吐量。"""
+    if max_ticks is None:
+        max_ticks = settings.FPS * 120
+    cache = ResultCache(cache_dir)
+    tasks = []
+    done = {}
+    for overrides in configs:
+        key = settings_hash(overrides, variant, script, max_ticks)
+        done[key] = cache.load(key)
+        for level in levels:
+            todo = [s for s in range(episodes) if (level, s) not in done[key]]
+            for i in range(0, len(todo), CHUNK):
+                tasks.append((overrides, variant, level, todo[i:i + CHUNK], script, max_ticks))
+
+    start = time.perf_counter()
+    ran = 0
+    if tasks:
+        pool = multiprocessing.Pool(processes)
+        for overrides, rows in pool.imap_unordered(run_chunk, tasks):
+            key = settings_hash(overrides, variant, script, max_ticks)
+            cache.append(key, rows)
+            for row in rows:
+                done[key][(row['level'], row['seed'])] = row
+            ran += len(rows)
+        # SDL 会接管 SIGTERM，Pool.terminate() 杀不掉工作进程，只能正常关闭
+        pool.close()
+        pool.join()
+    wall = time.perf_counter() - start
+
+    summary = []
+    for overrides in configs:
+        key = settings_hash(overrides, variant, script, max_ticks)
+        rows = [r for (level, seed), r in done[key].items() if level in levels and seed < episodes]
+        summary.append({
+            'settings': overrides,
+            'hash': key,
+            'episodes': len(rows),
+            'survival_s': sum(r['survival_s'] for r in rows) / len(rows) if rows else 0.0,
+            'win_rate': sum(r['cleared'] for r in rows) / len(rows) if rows else 0.0,
+        })
+    return summary, {'ran': ran, 'cached': sum(s['episodes'] for s in summary) - ran,
+                     'wall_s': wall, 'episodes_per_sec': ran / wall if wall > 0 else 0.0}
+
+def main():
+    from headless import SCRIPTS
+    parser = argparse.ArgumentParser(description="Monte Carlo sweep over game settings")
+    parser.add_argument("--game", default="main", choices=["main", "main2"])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...")
+    parser.add_argument("--range", action="append", default=[], metavar="NAME=LOW:HIGH")
+    parser.add_argument("--samples", type=int, default=8, help="random samples per grid point when --range is used")
+    parser.add_argument("--episodes", type=int, default=100, help="seeds per level and settings")
+    parser.add_argument("--script", default="flee", choices=sorted(SCRIPTS))
+    parser.add_argument("--max-ticks", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None, help="default: all cores")
+    parser.add_argument("--cache", default=CACHE_DIR)
+    parser.add_argument("--json", metavar="FILE", help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    grid = {}
+    for item in args.grid:
+        name, values = item.split("=", 1)
+        grid[name] = [parse_value(v) for v in values.split(",")]
+    ranges = {}
+    for item in args.range:
+        name, bounds = item.split("=", 1)
+        low, high = bounds.split(":")
+        ranges[name] = (float(low), float(high))
+    for name in list(grid) + list(ranges):
+        if name not in _defaults:
+            parser.error(f"unknown setting {name}")
+    runtime, bound = setting_uses(list(grid) + list(ranges))
+    for name in list(grid) + list(ranges):
+        if not runtime[name]:
+            parser.error(f"{name} is only read at import or definition time ({', '.join(bound[name]) or 'unused'}); "
+                         f"overriding it has no effect")
+        if bound[name]:
+            print(f"warning: {name} keeps its default at {', '.join(bound[name])}", file=sys.stderr)
+
+    configs = build_configs(grid, ranges, args.samples)
+    summary, stats = sweep(configs, args.game, args.levels, args.episodes, args.script,
+                           args.max_ticks, args.processes, args.cache)
+
+    print(f"{'survival s':>10} {'win rate':>9} {'episodes':>9}  settings")
+    for row in sorted(summary, key=lambda r: -r['survival_s']):
+        print(f"{row['survival_s']:>10.1f} {row['win_rate']:>9.1%} {row['episodes']:>9}  {row['settings'] or 'defaults'}")
+    print(f"ran {stats['ran']} episodes ({stats['cached']} cached) in {stats['wall_s']:.1f}s, "
+          f"{stats['episodes_per_sec']:.0f} episodes/s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'summary': summary, 'stats': stats}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""后台资源加载：按 config.settings.ASSET_MANIFEST 在一个工作线程里逐个加载，主线程不等。
+
+还没加载好的资源取出来是 None（和以前缺文件时一样，调用方本来就会判断），
+某个资源加载失败只影响它自己，失败原因记在 failed 里。
+"""
+import os
+import queue
+import threading
+import time
+import pygame
+from config.settings import *
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _load_sound(path, options):
+    sound = pygame.mixer.Sound(path)
+    if 'volume' in options:
+        sound.set_volume(options['volume'])
+    return sound
+
+def _load_music(path, options):
+    # 背景音乐是流式播放的，只有一首，加载好就直接开始放
+    pygame.mixer.music.load(path)
+    pygame.mixer.music.set_volume(options.get('volume', 1.0))
+    pygame.mixer.music.play(options.get('loops', -1))
+    return path
+
+LOADERS = {
+    'sound': _load_sound,
+    'music': _load_music,
+}
+
+class AssetLoader:
+    """用法：loader = AssetLoader().start()；loader['hit'] 取资源（没好时是 None）。
+
+    loaded / failed / load_ms 在工作线程里写，主线程只读，不需要加锁。
+    """
+    def __init__(self, manifest=None):
+        self.manifest = ASSET_MANIFEST if manifest is None else manifest
+        self.loaded = {}
+        self.failed = {}
+        self.load_ms = {}
+        self.requested = set()
+        self.queue = queue.Queue()
+        self.thread = None
+        self.started = None
+        self.finished = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        for name, (kind, path, options) in self.manifest.items():
+            if not options.get('lazy'):
+                self.request(name)
+        self.thread = threading.Thread(target=self._work, name="asset-loader", daemon=True)
+        self.thread.start()
+        return self
+
+    def request(self, name):
+        """把资源排进加载队列（已经排过的不重复排）。"""
+        if name not in self.requested:
+            self.requested.add(name)
+            self.finished = None
+            self.queue.put(name)
+
+    def _work(self):
+        while True:
+            name = self.queue.get()
+            if name is None:
+                return
+            kind, path, options = self.manifest[name]
+            start = time.perf_counter()
+            try:
+                self.loaded[name] = LOADERS[kind](os.path.join(ROOT, path), options)
+            except (pygame.error, OSError) as e:
+                self.failed[name] = str(e)
+                print(f"Warning: could not load {kind} '{name}' ({path}): {e}")
+            self.load_ms[name] = (time.perf_counter() - start) * 1000
+            if self.queue.empty():
+                self.finished = time.perf_counter()
+
+    def __getitem__(self, name):
+        asset = self.loaded.get(name)
+        if asset is None:
+            if name not in self.manifest:
+                raise KeyError(name)
+            self.request(name)
+        return asset
+
+    def pending(self):
+        return [name for name in self.requested if name not in self.loaded and name not in self.failed]
+
+    def ready(self):
+        return not self.pending()
+
+    def wait(self, timeout=None):
+        """阻塞到已排队的资源都处理完（基准测试和工具脚本用），返回是否全部处理完。"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self.pending():
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def close(self):
+        """停掉工作线程；正在加载的那个资源加载完才会退出，pygame.quit() 之前调用。"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def summary(self):
+        total = f"{(self.finished - self.started) * 1000:.0f} ms" if self.finished else "still loading"
+        slowest = sorted(self.load_ms.items(), key=lambda item: -item[1])[:3]
+        slowest = ", ".join(f"{name} {ms:.1f} ms" for name, ms in slowest)
+        return (f"assets: {len(self.loaded)} loaded, {len(self.pending())} pending, "
+                f"{len(self.failed)} failed ({total}; slowest: {slowest or '-'})")
+
+class NullAssetLoader:
+    """不加载资源时（无窗口运行）代替 AssetLoader：接口一样，清单里的资源取出来都是 None。"""
+    def __init__(self, manifest=None):
+        self.manifest = ASSET_MANIFEST if manifest is None else manifest
+
+    def start(self):
+        return self
+
+    def request(self, name):
+        pass
+
+    def __getitem__(self, name):
+        if name not in self.manifest:
+            raise KeyError(name)
+        return None
+
+    def pending(self):
+        return []
+
+    def ready(self):
+        return True
+
+    def wait(self, timeout=None):
+        return True
+
+    def close(self):
+        pass
+
+    def summary(self):
+        return "assets: not loaded"
+
+class StartupTimer:
+    """从 Game 构造开始到第一帧画到屏幕上的时间，第一次 first_frame() 时打印一次。"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_frame_ms = None
+
+    def first_frame(self, assets=None):
+        if self.first_frame_ms is not None:
+            return
+        self.first_frame_ms = (time.perf_counter() - self.started) * 1000
+        line = f"first frame after {self.first_frame_ms:.0f} ms"
+        if assets is not None:
+            line += f"; {assets.summary()}"
+        print(line)
@@ -0,0 +1,221 @@
+"""游戏画面录制：grab() 在游戏线程里只把屏幕像素原样拷进预先分配好的缓冲池（一次 memcpy），
+编码和写文件都在后台线程里做；缓冲池用完时这一帧直接丢掉并计数，游戏线程从不等待。
+
+两种格式：
+    raw  一个 .gcap 文件：HEADER 后面是一条条帧记录，每帧是和上一帧异或后再 zlib 压缩的原始像素，
+         每 CAPTURE_KEYFRAME_EVERY 帧存一个完整的关键帧；frames() 读回来，capture.py export 转成 PNG
+    png  一个目录，每帧一个 PNG（编码慢得多，跟不上时丢的帧也多）
+"""
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+import numpy as np
+from config.settings import *
+
+MAGIC = b"GCAP"
+VERSION = 1
+# magic, 版本, 宽, 高, 每行字节数, R/G/B 在 32 位像素里的位移, 开始录制的时间（微秒）
+HEADER = struct.Struct("<4sHHHIBBBQ")
+# 第几帧（从 0 开始，丢掉的帧也算）, 距开始的秒数, 是否关键帧, 压缩后的长度
+FRAME = struct.Struct("<IdBI")
+FORMATS = ("raw", "png")
+
+def to_rgb(pixels, width, height, pitch, shifts):
+    """32 位原始像素（每行 pitch 字节）-> (height, width, 3) 的 RGB 数组。"""
+    words = np.frombuffer(pixels, '<u4').reshape(height, pitch // 4)[:, :width]
+    rgb = np.empty((height, width, 3), np.uint8)
+    for channel, shift in enumerate(shifts):
+        rgb[..., channel] = words >> shift
+    return rgb
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def encode_png(rgb, level=CAPTURE_LEVEL):
+    """(height, width, 3) 的 RGB 数组 -> PNG 字节。
+    不用 pygame.image.save：它编码时一直拿着 GIL，后台线程编码会卡住游戏线程；zlib.compress 会放开 GIL。"""
+    height, width = rgb.shape[:2]
+    # 每行前面一个 0 字节（不做行过滤）
+    rows = np.zeros((height, width * 3 + 1), np.uint8)
+    rows[:, 1:] = rgb.reshape(height, width * 3)
+    return b"".join((b"\x89PNG\r\n\x1a\n",
+                     _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+                     _chunk(b"IDAT", zlib.compress(rows, level)),
+                     _chunk(b"IEND", b"")))
+
+def save_png(rgb, path, level=CAPTURE_LEVEL):
+    with open(path, "wb") as f:
+        f.write(encode_png(rgb, level))
+
+class FrameCapture:
+    """每隔 1/fps 秒（按真实时间）抓一帧 surface；path 是输出目录。"""
+    def __init__(self, surface, path, format=CAPTURE_FORMAT, fps=CAPTURE_FPS, buffers=CAPTURE_BUFFERS,
+                 level=CAPTURE_LEVEL, keyframe_every=CAPTURE_KEYFRAME_EVERY):
+        if format not in FORMATS:
+            raise ValueError(f"unknown capture format {format!r}")
+        if surface.get_bytesize() != 4:
+            raise ValueError("capture needs a 32-bit surface")
+        self.width, self.height = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.shifts = surface.get_shifts()[:3]
+        self.format = format
+        self.interval = 1 / fps if fps else 0.0
+        self.level = level
+        self.keyframe_every = keyframe_every
+        # 缓冲池：free 里是空闲的下标；deque 的 append/popleft 在线程之间是安全的
+        self.pool = np.empty((buffers, self.height * self.pitch), np.uint8)
+        self.free = deque(range(buffers))
+        self.queue = queue.SimpleQueue()
+        self.start = time.perf_counter()
+        self.next_due = self.start
+        self.frame = 0
+        # 统计：游戏线程这边
+        self.captured = 0
+        self.dropped = 0
+        self.grab_s = 0.0
+        # 统计：后台线程这边
+        self.written = 0
+        self.bytes = 0
+        self.encode_s = 0.0
+
+        os.makedirs(path, exist_ok=True)
+        name = time.strftime("capture-%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        if format == "raw":
+            self.path = os.path.join(path, name + ".gcap")
+            self.file = open(self.path, "wb")
+            self.file.write(HEADER.pack(MAGIC, VERSION, self.width, self.height, self.pitch,
+                                        *self.shifts, int(time.time() * 1e6)))
+        else:
+            self.path = os.path.join(path, name)
+            os.makedirs(self.path)
+            self.file = None
+        self.previous = None
+        self.thread = threading.Thread(target=self._run, name="capture-encoder", daemon=True)
+        self.thread.start()
+
+    @property
+    def enabled(self):
+        return True
+
+    def grab(self, surface):
+        """present 之后调用：到时间了就把 surface 的像素拷进一个空闲缓冲区交给后台线程。"""
+        now = time.perf_counter()
+        if now < self.next_due:
+            return
+        # 落后很多（例如刚从菜单回来）时不补帧
+        self.next_due = max(self.next_due + self.interval, now)
+        frame = self.frame
+        self.frame += 1
+        try:
+            index = self.free.popleft()
+        except IndexError:
+            self.dropped += 1
+            return
+        # get_buffer() 直接指向 surface 的像素，不经过中间拷贝；用完马上释放，免得 surface 一直锁着
+        np.copyto(self.pool[index], np.frombuffer(surface.get_buffer(), np.uint8))
+        self.queue.put((index, frame, now - self.start))
+        self.captured += 1
+        self.grab_s += time.perf_counter() - now
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            index, frame, seconds = item
+            start = time.perf_counter()
+            pixels = self.pool[index]
+            if self.format == "raw":
+                key, data = self._delta(pixels)
+                # 像素已经拷出来了，缓冲区马上还回去
+                self.free.append(index)
+                self._write_raw(frame, seconds, key, data)
+            else:
+                rgb = to_rgb(pixels, self.width, self.height, self.pitch, self.shifts)
+                self.free.append(index)
+                data = encode_png(rgb, self.level)
+                with open(os.path.join(self.path, f"frame-{frame:06d}.png"), "wb") as f:
+                    f.write(data)
+                self.bytes += len(data)
+            self.written += 1
+            self.encode_s += time.perf_counter() - start
+
+    def _delta(self, pixels):
+        """返回 (是否关键帧, 要压缩的数据)，并记下这一帧供下一帧做差。"""
+        if self.previous is None:
+            self.previous = pixels.copy()
+            return True, self.previous
+        if self.written % self.keyframe_every == 0:
+            np.copyto(self.previous, pixels)
+            return True, self.previous
+        # 和上一帧异或：没变的像素都是 0，压缩得很小
+        data = np.bitwise_xor(pixels, self.previous)
+        np.copyto(self.previous, pixels)
+        return False, data
+
+    def _write_raw(self, frame, seconds, key, data):
+        compressed = zlib.compress(data, self.level)
+        self.file.write(FRAME.pack(frame, seconds, key, len(compressed)))
+        self.file.write(compressed)
+        self.bytes += FRAME.size + len(compressed)
+
+    def close(self):
+        """等后台线程把排队的帧写完。"""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        if self.file is not None:
+            self.file.close()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'written': self.written,
+            'bytes': self.bytes,
+            'grab_ms': self.grab_s / self.captured * 1000 if self.captured else 0.0,
+            'encode_ms': self.encode_s / self.written * 1000 if self.written else 0.0,
+        }
+
+    def __str__(self):
+        s = self.stats()
+        return (f"capture: {s['written']} frames ({s['bytes'] / 2**20:.1f} MiB) written to {s['path']}, "
+                f"{s['dropped']} dropped; {s['grab_ms']:.2f} ms/frame on the game thread, "
+                f"{s['encode_ms']:.1f} ms/frame encoding")
+
+class NullCapture:
+    """不录制时用的空实现。"""
+    enabled = False
+    def grab(self, surface): pass
+    def close(self): pass
+
+NULL_CAPTURE = NullCapture()
+
+def frames(path):
+    """依次读出 .gcap 文件里的帧：(第几帧, 秒数, RGB 数组)。"""
+    with open(path, "rb") as f:
+        magic, version, width, height, pitch, *rest = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} capture file")
+        shifts = rest[:3]
+        previous = None
+        while True:
+            head = f.read(FRAME.size)
+            if len(head) < FRAME.size:
+                return
+            frame, seconds, key, length = FRAME.unpack(head)
+            data = f.read(length)
+            if len(data) < length:
+                return  # 录制中断时最后一帧可能不完整
+            pixels = np.frombuffer(zlib.decompress(data), np.uint8)
+            if not key:
+                pixels = np.bitwise_xor(pixels, previous)
+            previous = pixels
+            yield frame, seconds, to_rgb(pixels, width, height, pitch, shifts)
@@ -0,0 +1,72 @@
+import pygame
+from config.settings import FPS, MAX_CATCHUP_STEPS
+
+class SimClock:
+    """模拟时钟：每次 tick 固定前进一帧的毫秒数，不等待真实时间。"""
+    def __init__(self, fps=FPS):
+        self.fps = fps
+        self.frame_ms = 1000 / fps
+        self.ticks = 0.0
+        self.frames = 0
+
+    def tick(self, framerate=0):
+        # 与 pygame.time.Clock.tick 接口一致，但从不 sleep
+        self.ticks += self.frame_ms
+        self.frames += 1
+        return self.frame_ms
+
+    def reset(self):
+        self.ticks = 0.0
+        self.frames = 0
+
+    def get_ticks(self):
+        return int(self.ticks)
+
+    def get_fps(self):
+        return self.fps
+
+class FixedStep:
+    """固定步长的累加器：真实时间累加起来，每满 1000/hz 毫秒模拟一步。
+
+    一帧最多补 max_steps 步，落后更多时丢掉多出来的时间（记在 dropped 里），避免越追越慢。
+    """
+    def __init__(self, hz=FPS, max_steps=MAX_CATCHUP_STEPS):
+        self.hz = hz
+        self.step_ms = 1000 / hz
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped = 0
+
+    def advance(self, elapsed_ms):
+        """加上这一帧经过的真实时间，返回这一帧要模拟的步数。"""
+        self.accumulator += elapsed_ms
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step_ms
+        return steps
+
+    @property
+    def alpha(self):
+        """渲染插值系数：距离上一步模拟过去了一步的几分之几。"""
+        return min(self.accumulator / self.step_ms, 1.0)
+
+    def reset(self):
+        """暂停（菜单、结束画面）回来以后调用，不把等待的时间补成模拟。"""
+        self.accumulator = 0.0
+
+# 模拟当前使用的时间源，None 表示用真实时钟
+_active = None
+
+def use_clock(clock):
+    """切换全局时间源；传入 None 恢复 pygame 的真实时钟。"""
+    global _active
+    _active = clock
+
+def get_ticks():
+    if _active is None:
+        return pygame.time.get_ticks()
+    return _active.get_ticks()
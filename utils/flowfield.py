@@ -0,0 +1,182 @@
+"""共享的流场寻路：从玩家所在格子做一次 BFS，所有追击的敌人按所在格子 O(1) 查方向，绕开障碍物。
+
+障碍物布局按名字定义在 config.settings.OBSTACLE_LAYOUTS 里；每个布局一个 ObstacleMap，
+同一布局下按玩家所在格子缓存算好的流场，玩家回到走过的格子时不用重算。
+"""
+import math
+from collections import OrderedDict, deque
+import numpy as np
+import pygame
+from config.settings import *
+
+# 8 个邻居方向：(行偏移, 列偏移)
+NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+UNREACHABLE = np.iinfo(np.int32).max
+
+class ObstacleMap:
+    """静态障碍物：rects 用于挡住玩家和绘制，blocked 是按 cell_size 划分的格子。
+
+    格子按 margin 膨胀后再判断是否被挡，这样敌人的中心沿流场走时身体也不会擦进障碍物。
+    """
+    def __init__(self, name, rects, cell_size=FLOW_CELL_SIZE, margin=ENEMY_SIZE // 2,
+                 width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.name = name
+        self.rects = [pygame.Rect(r) for r in rects]
+        self.cell_size = cell_size
+        self.cols = math.ceil(width / cell_size)
+        self.rows = math.ceil(height / cell_size)
+        self.blocked = np.zeros((self.rows, self.cols), dtype=np.bool_)
+        for rect in self.rects:
+            grown = rect.inflate(margin * 2, margin * 2)
+            c0, r0 = max(grown.left // cell_size, 0), max(grown.top // cell_size, 0)
+            c1, r1 = (grown.right - 1) // cell_size, (grown.bottom - 1) // cell_size
+            self.blocked[r0:r1 + 1, c0:c1 + 1] = True
+        self.fields = OrderedDict()  # 目标格子 -> FlowField
+
+    def __bool__(self):
+        return bool(self.rects)
+
+    def cell_of(self, pos):
+        cs = self.cell_size
+        col = min(max(int(pos[0]) // cs, 0), self.cols - 1)
+        row = min(max(int(pos[1]) // cs, 0), self.rows - 1)
+        return row, col
+
+    def field(self, target, max_fields=FLOW_FIELD_CACHE):
+        """流向 target（行, 列）的流场，算过的直接取缓存（最近最少使用的先淘汰）。"""
+        field = self.fields.get(target)
+        if field is None:
+            field = FlowField(self, target)
+            self.fields[target] = field
+            if len(self.fields) > max_fields:
+                self.fields.popitem(last=False)
+        else:
+            self.fields.move_to_end(target)
+        return field
+
+    def blocks(self, rect):
+        return rect.collidelist(self.rects) != -1
+
+    def resolve(self, old, rect):
+        """rect 从 old 位置移动过来；撞到障碍物时先试只走 x、再试只走 y，都不行就退回原位。"""
+        if not self.blocks(rect):
+            return
+        y = rect.y
+        rect.y = old[1]
+        if not self.blocks(rect):
+            return
+        rect.x, rect.y = old[0], y
+        if not self.blocks(rect):
+            return
+        rect.x, rect.y = old
+
+class FlowField:
+    """到目标格子的 BFS 步数，以及每个格子朝下一个更近的邻居走的单位向量。"""
+    def __init__(self, obstacles, target):
+        self.obstacles = obstacles
+        self.target = target
+        rows, cols = obstacles.rows, obstacles.cols
+        # BFS 在一维的普通列表上做，比逐个索引 numpy 数组快得多
+        blocked = obstacles.blocked.ravel().tolist()
+        dist = [UNREACHABLE] * (rows * cols)
+        start = target[0] * cols + target[1]
+        # 目标格子哪怕贴着障碍物也要能作为起点
+        dist[start] = 0
+        queue = deque([start])
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            c = i % cols
+            for j in (i - cols if i >= cols else -1, i + cols if i + cols < rows * cols else -1,
+                      i - 1 if c > 0 else -1, i + 1 if c < cols - 1 else -1):
+                if j >= 0 and not blocked[j] and dist[j] > d:
+                    dist[j] = d
+                    queue.append(j)
+        dist = np.array(dist, dtype=np.int32).reshape(rows, cols)
+        self.dist = dist
+
+        # 每个格子在 8 个邻居里选距离最小的；斜着走时两边的直邻都要能走，避免切角
+        padded = np.full((rows + 2, cols + 2), np.inf)
+        padded[1:-1, 1:-1] = np.where(dist == UNREACHABLE, np.inf, dist)
+        def shifted(dr, dc):
+            return padded[1 + dr:rows + 1 + dr, 1 + dc:cols + 1 + dc]
+        candidates = []
+        for dr, dc in NEIGHBOURS:
+            values = shifted(dr, dc)
+            if dr and dc:
+                corner_ok = np.isfinite(shifted(dr, 0)) & np.isfinite(shifted(0, dc))
+                values = np.where(corner_ok, values, np.inf)
+            candidates.append(values)
+        candidates = np.stack(candidates)
+        best = candidates.argmin(axis=0)
+        better = candidates.min(axis=0) < padded[1:-1, 1:-1]
+        vectors = np.array([(dc, dr) for dr, dc in NEIGHBOURS], dtype=np.float64)
+        vectors /= np.hypot(vectors[:, 0], vectors[:, 1])[:, None]
+        self.has_dir = better
+        self.dir_x = np.where(better, vectors[best, 0], 0.0)
+        self.dir_y = np.where(better, vectors[best, 1], 0.0)
+        # 逐个查询时用普通列表，比 numpy 标量索引快得多
+        self.table = [[(x, y) if ok else None for x, y, ok in zip(xs, ys, oks)]
+                      for xs, ys, oks in zip(self.dir_x.tolist(), self.dir_y.tolist(), better.tolist())]
+
+    def direction(self, pos):
+        """pos 所在格子的单位方向；在目标格子里或走不到时返回 None（直接朝玩家走）。"""
+        r, c = self.obstacles.cell_of(pos)
+        return self.table[r][c]
+
+    def sample(self, x, y):
+        """向量化版本：返回 (dir_x, dir_y, 有方向) 三个数组。"""
+        cs = self.obstacles.cell_size
+        cols = np.clip(x.astype(np.int64) // cs, 0, self.obstacles.cols - 1)
+        rows = np.clip(y.astype(np.int64) // cs, 0, self.obstacles.rows - 1)
+        return self.dir_x[rows, cols], self.dir_y[rows, cols], self.has_dir[rows, cols]
+
+class Pathfinder:
+    """一局游戏的寻路状态：只有玩家换格子时才换流场。"""
+    def __init__(self, obstacles):
+        self.obstacles = obstacles
+        self.field = None
+        self.computed = 0
+
+    def update(self, player_pos):
+        target = self.obstacles.cell_of(player_pos)
+        if self.field is None or self.field.target != target:
+            cached = target in self.obstacles.fields
+            self.field = self.obstacles.field(target)
+            self.computed += not cached
+        return self.field
+
+    def direction(self, pos):
+        if self.field is None:
+            return None
+        return self.field.direction(pos)
+
+_maps = {}
+
+def obstacle_map(name):
+    """按布局名取 ObstacleMap（连同它的流场缓存）；没有障碍物的布局返回 None。"""
+    if not OBSTACLE_LAYOUTS.get(name):
+        return None
+    if name not in _maps:
+        _maps[name] = ObstacleMap(name, OBSTACLE_LAYOUTS[name])
+    return _maps[name]
+
+# 当前这局游戏的寻路器，None 表示没有障碍物、直线追击
+_active = None
+
+def use_pathfinder(pathfinder):
+    global _active
+    _active = pathfinder
+
+def active_field():
+    return _active.field if _active is not None else None
+
+def chase_vector(src, target):
+    """追击用的 (dx, dy, dist)：没有障碍物时就是直线，否则 (dx, dy) 是流场给的单位方向、dist 为 1。"""
+    if _active is not None:
+        d = _active.direction(src)
+        if d is not None:
+            return d[0], d[1], 1.0
+    dx = target[0] - src[0]
+    dy = target[1] - src[1]
+    return dx, dy, math.hypot(dx, dy)
@@ -0,0 +1,147 @@
+"""自适应画质：按最近几帧的工作时间（不含等待）和帧预算比较，超了就一档一档降，负载下来了再慢慢升回去。
+
+档位是累加的，降到某一档时前面各档的降级也都生效：
+    full    全部效果
+    simple  不做插值（省掉快照的 apply/restore 和子弹的插值计算），不画玩家的白边
+    far-ai  远处的敌人每 GOVERNOR_AI_INTERVAL 帧才完整更新一次（会改变模拟结果，录回放时不用这一档）
+    skip    隔一帧画一次，模拟照常按固定步长推进
+
+升降有滞后：平均超过预算的 GOVERNOR_HIGH 就降，低于 GOVERNOR_LOW 并且在当前档位待够 hold 帧才升；
+升上去没多久又降回来时 hold 加倍，避免在两档之间来回跳。
+没开启时用 NULL_GOVERNOR，一直是 full。
+"""
+import time
+from collections import deque
+from config.settings import *
+
+LEVELS = ("full", "simple", "far-ai", "skip")
+FULL, SIMPLE, FAR_AI, SKIP = range(len(LEVELS))
+
+class QualityGovernor:
+    def __init__(self, budget_ms=1000 / FPS, allowed=LEVELS, window=GOVERNOR_WINDOW, high=GOVERNOR_HIGH,
+                 low=GOVERNOR_LOW, hold=GOVERNOR_HOLD, hold_max=GOVERNOR_HOLD_MAX):
+        """allowed 是可以用的档位名（full 总是在里面），例如录回放时去掉 far-ai。"""
+        self.enabled = True
+        self.budget = budget_ms / 1000
+        self.steps = [FULL] + [LEVELS.index(name) for name in allowed if name != "full"]
+        self.steps.sort()
+        self.window = window
+        self.high = high
+        self.low = low
+        self.base_hold = self.hold = hold
+        self.hold_max = hold_max
+        self.index = 0
+        self.active = frozenset()
+        self.frame = 0
+        self._start = time.perf_counter()
+        self._total = 0.0
+        self._count = 0
+        self._since = 0          # 上次换档后过了多少帧
+        self._raised = False     # 上次换档是不是升档
+        # 统计
+        self.last_ms = 0.0
+        self.downgrades = 0
+        self.upgrades = 0
+        self.level_frames = [0] * len(LEVELS)
+        self.decisions = deque(maxlen=GOVERNOR_HISTORY)
+
+    @property
+    def level(self):
+        return self.steps[self.index]
+
+    @property
+    def name(self):
+        return LEVELS[self.level]
+
+    @property
+    def interpolate(self):
+        return SIMPLE not in self.active
+
+    @property
+    def borders(self):
+        return SIMPLE not in self.active
+
+    @property
+    def far_ai(self):
+        return FAR_AI in self.active
+
+    def should_draw(self):
+        """这一帧要不要画；skip 档隔一帧画一次。"""
+        return SKIP not in self.active or self.frame % 2 == 0
+
+    def begin(self):
+        """clock.tick 之后调用，开始计这一帧的工作时间。"""
+        self._start = time.perf_counter()
+
+    def end(self):
+        """一帧做完时调用；换了档返回 True，调用方按新的档位调整。"""
+        self._total += time.perf_counter() - self._start
+        self._count += 1
+        self.level_frames[self.level] += 1
+        self.frame += 1
+        self._since += 1
+        if self._count < self.window:
+            return False
+        mean = self._total / self._count
+        self._total = 0.0
+        self._count = 0
+        self.last_ms = mean * 1000
+        if mean > self.budget * self.high and self.index < len(self.steps) - 1:
+            if self._raised:
+                # 刚升上来就又撑不住说明升早了，下次多等一会儿；撑了很久才降就回到默认的 hold
+                self.hold = min(self.hold * 2, self.hold_max) if self._since < 2 * self.hold else self.base_hold
+            self._change(self.index + 1)
+            self.downgrades += 1
+            self._raised = False
+            return True
+        if mean < self.budget * self.low and self.index > 0 and self._since >= self.hold:
+            self._change(self.index - 1)
+            self.upgrades += 1
+            self._raised = True
+            return True
+        return False
+
+    def force(self, name):
+        """直接切到某一档（基准测试和调试用），记一条决策。"""
+        self._change(self.steps.index(LEVELS.index(name)))
+
+    def _change(self, index):
+        old = self.level
+        self.index = index
+        self.active = frozenset(self.steps[1:index + 1])
+        self.decisions.append({'frame': self.frame, 'from': LEVELS[old], 'to': self.name,
+                               'work_ms': round(self.last_ms, 3), 'hold': self.hold})
+        self._since = 0
+
+    def stats(self):
+        return {
+            'level': self.name,
+            'frames': self.frame,
+            'downgrades': self.downgrades,
+            'upgrades': self.upgrades,
+            'level_frames': {name: n for name, n in zip(LEVELS, self.level_frames) if n},
+            'last_ms': self.last_ms,
+            'budget_ms': self.budget * 1000,
+            'decisions': list(self.decisions),
+        }
+
+    def __str__(self):
+        s = self.stats()
+        frames = ", ".join(f"{name} {n}" for name, n in s['level_frames'].items())
+        return (f"governor: now {s['level']}, {s['downgrades']} down / {s['upgrades']} up; "
+                f"frames per level: {frames or 'none'}; "
+                f"last window {s['last_ms']:.1f} ms/frame against a {s['budget_ms']:.1f} ms budget")
+
+class NullGovernor:
+    """不开自适应画质时用的空实现：一直是 full。"""
+    enabled = False
+    level = FULL
+    name = LEVELS[FULL]
+    interpolate = True
+    borders = True
+    far_ai = False
+    def should_draw(self): return True
+    def begin(self): pass
+    def end(self): return False
+
+NULL_GOVERNOR = NullGovernor()
@@ -0,0 +1,46 @@
+"""渲染插值：每步模拟前记下玩家、能量球和敌人的位置，绘制时临时把它们放到两步之间，画完再放回去。"""
+
+class Snapshot:
+    def __init__(self):
+        self.player = None
+        self.powerup = None
+        self.enemies = {}
+        self.moved = []
+
+    def capture(self, game):
+        self.player = game.player.topleft
+        self.powerup = (game.powerup, game.powerup.rect.topleft) if game.powerup else None
+        self.enemies = {sprite: (sprite.rect.x, sprite.rect.y) for sprite in game.enemies}
+
+    def clear(self):
+        """开新局或换关时调用，避免从旧位置插值过来。"""
+        self.player = None
+        self.powerup = None
+        self.enemies = {}
+
+    def _move(self, rect, prev, alpha):
+        x, y = rect.x, rect.y
+        self.moved.append((rect, x, y))
+        rect.x = round(prev[0] + (x - prev[0]) * alpha)
+        rect.y = round(prev[1] + (y - prev[1]) * alpha)
+
+    def apply(self, game, alpha):
+        """把 rect 临时移到插值位置；返回是否移动过，之后要调用 restore()。"""
+        if self.player is None or alpha >= 1:
+            return False
+        self._move(game.player, self.player, alpha)
+        if self.powerup and self.powerup[0] is game.powerup:
+            self._move(game.powerup.rect, self.powerup[1], alpha)
+        enemies = self.enemies
+        for sprite in game.enemies:
+            prev = enemies.get(sprite)
+            # 这一步才出现的敌人没有上一帧的位置，直接画在当前位置
+            if prev is not None:
+                self._move(sprite.rect, prev, alpha)
+        return True
+
+    def restore(self):
+        for rect, x, y in self.moved:
+            rect.x = x
+            rect.y = y
+        self.moved = []
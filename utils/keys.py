@@ -0,0 +1,26 @@
+import pygame
+
+# 游戏只用到这四个键；回放文件里按这个顺序存成位
+GAME_KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+
+class KeyState:
+    """代替 pygame.key.get_pressed() 的按键状态，只支持 keys[K_x] 查询。"""
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+def encode_keys(keys):
+    """把按键状态压成一个整数，每个 GAME_KEYS 占一位。"""
+    bits = 0
+    for i, key in enumerate(GAME_KEYS):
+        if keys[key]:
+            bits |= 1 << i
+    return bits
+
+_decoded = [KeyState(key for i, key in enumerate(GAME_KEYS) if bits & (1 << i))
+            for bits in range(1 << len(GAME_KEYS))]
+
+def decode_keys(bits):
+    return _decoded[bits]
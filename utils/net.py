@@ -0,0 +1,214 @@
+"""本机联机用的协议和传输层。
+
+快照里的实体（敌人、子弹、能量球）按 id 排序，坐标按 NET_QUANTUM 量化成 int16；
+相对客户端确认过的某一份快照只发增量：消失的 id、新出现或变化太大的完整记录、
+小位移（int8）。一份快照拆成不超过 NET_MTU 的包发出去，收齐了才算收到。
+
+传输层有两种：UdpEndpoint 走真正的 UDP 套接字，LoopbackNetwork 在进程里模拟丢包和延迟，
+基准测试用后者，结果可复现。
+"""
+import heapq
+import json
+import random
+import socket
+import struct
+import numpy as np
+from config.settings import *
+
+# 包类型
+JOIN, WELCOME, INPUT, SNAPSHOT, LEAVE = range(1, 6)
+
+BULLET_BASE = 0x8000   # 子弹的 id 是 BULLET_BASE + 槽位
+POWERUP_ID = 0xFFFF
+
+ENTITY = np.dtype([('id', '<u2'), ('image', 'u1'), ('x', '<i2'), ('y', '<i2')])
+MOVE = np.dtype([('id', '<u2'), ('dx', 'i1'), ('dy', 'i1')])
+PLAYER = np.dtype([('id', 'u1'), ('x', '<i2'), ('y', '<i2'), ('flags', 'u1')])
+PLAYER_POWER = 1
+PLAYER_INVINCIBLE = 2
+
+JOIN_PACKET = struct.Struct('<BI')            # 类型, 随机数
+WELCOME_PACKET = struct.Struct('<BBI')        # 类型, 玩家 id, 随机数
+LEAVE_PACKET = struct.Struct('<BB')           # 类型, 玩家 id
+INPUT_HEADER = struct.Struct('<BBIIB')        # 类型, 玩家 id, 确认的快照 tick, 最新输入序号, 按键个数
+FRAGMENT_HEADER = struct.Struct('<BIBB')      # 类型, tick, 分片序号, 分片数
+SNAPSHOT_HEADER = struct.Struct('<IIIBB')     # tick, 基准 tick（0 表示完整快照）, 已处理的输入序号, 关卡, 玩家数
+DELTA_HEADER = struct.Struct('<HHH')          # 消失数, 完整记录数, 小位移数
+IMAGES_HEADER = struct.Struct('<HH')          # 起始编号, 个数
+
+EMPTY = np.zeros(0, ENTITY)
+
+def make_state(ids, images, xs, ys, quantum=NET_QUANTUM):
+    """一帧的实体 -> 按 id 排好序的 ENTITY 数组。"""
+    state = np.empty(len(ids), ENTITY)
+    state['id'] = ids
+    state['image'] = images
+    state['x'] = np.floor_divide(np.asarray(xs, dtype=np.int64), quantum)
+    state['y'] = np.floor_divide(np.asarray(ys, dtype=np.int64), quantum)
+    return state[np.argsort(state['id'], kind='stable')]
+
+def encode_delta(state, base=None):
+    """state 相对 base（None 表示没有基准，全部发完整记录）的增量。"""
+    if base is None or not len(base):
+        removed = np.zeros(0, '<u2')
+        full = state
+        moves = np.zeros(0, MOVE)
+    else:
+        pos = np.minimum(np.searchsorted(base['id'], state['id']), len(base) - 1)
+        old = base[pos]
+        known = old['id'] == state['id']
+        dx = state['x'].astype(np.int32) - old['x']
+        dy = state['y'].astype(np.int32) - old['y']
+        small = known & (old['image'] == state['image']) & (np.abs(dx) <= 127) & (np.abs(dy) <= 127)
+        moved = small & ((dx != 0) | (dy != 0))
+        full = state[~small]
+        moves = np.empty(int(moved.sum()), MOVE)
+        moves['id'] = state['id'][moved]
+        moves['dx'] = dx[moved]
+        moves['dy'] = dy[moved]
+        removed = base['id'][~np.isin(base['id'], state['id'])].astype('<u2')
+    return b"".join((DELTA_HEADER.pack(len(removed), len(full), len(moves)),
+                     removed.tobytes(), full.tobytes(), moves.tobytes()))
+
+def decode_delta(data, offset=0, base=None):
+    """encode_delta 的逆过程，返回 (state, 读到的位置)。"""
+    removed_n, full_n, moves_n = DELTA_HEADER.unpack_from(data, offset)
+    offset += DELTA_HEADER.size
+    removed = np.frombuffer(data, '<u2', removed_n, offset)
+    offset += removed.nbytes
+    full = np.frombuffer(data, ENTITY, full_n, offset)
+    offset += full.nbytes
+    moves = np.frombuffer(data, MOVE, moves_n, offset)
+    offset += moves.nbytes
+    state = EMPTY if base is None else base
+    if len(removed):
+        state = state[~np.isin(state['id'], removed)]
+    if len(moves):
+        state = state.copy()
+        idx = np.searchsorted(state['id'], moves['id'])
+        state['x'][idx] += moves['dx']
+        state['y'][idx] += moves['dy']
+    if len(full):
+        state = np.concatenate((state[~np.isin(state['id'], full['id'])], full))
+        state = state[np.argsort(state['id'], kind='stable')]
+    return state, offset
+
+def encode_images(images, start):
+    """贴图表里从 start 开始的新条目（get_image 的参数，用 JSON 存）。"""
+    entries = [json.dumps(key).encode() for key in images[start:]]
+    return IMAGES_HEADER.pack(start, len(entries)) + b"".join(bytes((len(e),)) + e for e in entries)
+
+def _tuples(value):
+    return tuple(_tuples(v) for v in value) if isinstance(value, list) else value
+
+def decode_images(data, offset, images):
+    """把新条目写进 images（列表，原地修改），返回读到的位置。"""
+    start, count = IMAGES_HEADER.unpack_from(data, offset)
+    offset += IMAGES_HEADER.size
+    del images[start:]
+    for _ in range(count):
+        size = data[offset]
+        images.append(_tuples(json.loads(data[offset + 1:offset + 1 + size])))
+        offset += 1 + size
+    return offset
+
+def fragment(tick, payload, mtu=NET_MTU):
+    count = max(1, -(-len(payload) // mtu))
+    if count > 255:
+        raise ValueError(f"snapshot of {len(payload)} bytes needs more than 255 packets")
+    return [FRAGMENT_HEADER.pack(SNAPSHOT, tick, i, count) + payload[i * mtu:(i + 1) * mtu]
+            for i in range(count)]
+
+class Reassembler:
+    """把分片拼回快照；比已经拼好的更旧的 tick 直接丢掉。"""
+    def __init__(self):
+        self.parts = {}
+        self.latest = 0
+
+    def add(self, packet):
+        """返回 (tick, payload)，还没收齐时返回 None。"""
+        _, tick, index, count = FRAGMENT_HEADER.unpack_from(packet)
+        if tick <= self.latest:
+            return None
+        parts = self.parts.setdefault(tick, {})
+        parts[index] = packet[FRAGMENT_HEADER.size:]
+        if len(parts) < count:
+            return None
+        self.latest = tick
+        self.parts = {t: p for t, p in self.parts.items() if t > tick}
+        return tick, b"".join(parts[i] for i in range(count))
+
+class UdpEndpoint:
+    def __init__(self, address=("127.0.0.1", 0)):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(address)
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+
+    def send(self, data, address):
+        self.sock.sendto(data, address)
+
+    def receive(self):
+        packets = []
+        while True:
+            try:
+                packets.append(self.sock.recvfrom(65536))
+            except (BlockingIOError, ConnectionResetError):
+                return packets
+
+    def close(self):
+        self.sock.close()
+
+class LoopbackNetwork:
+    """进程内模拟的网络：每个包以 loss 的概率丢掉，其余在 delay_ms ± jitter_ms 之后送达。
+
+    时间由调用方用 advance(ms) 推进，同样的种子得到同样的丢包和延迟。
+    """
+    def __init__(self, loss=0.0, delay_ms=0.0, jitter_ms=0.0, seed=0):
+        self.loss = loss
+        self.delay_ms = delay_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self.queues = {}
+        self.order = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def endpoint(self, address):
+        self.queues[address] = []
+        return LoopbackEndpoint(self, address)
+
+    def advance(self, ms):
+        self.now += ms
+
+    def _send(self, data, source, address):
+        self.sent += 1
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        due = self.now + max(0.0, self.delay_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms))
+        self.order += 1
+        heapq.heappush(self.queues[address], (due, self.order, bytes(data), source))
+
+    def _receive(self, address):
+        queue = self.queues[address]
+        packets = []
+        while queue and queue[0][0] <= self.now:
+            _, _, data, source = heapq.heappop(queue)
+            packets.append((data, source))
+        return packets
+
+class LoopbackEndpoint:
+    def __init__(self, network, address):
+        self.network = network
+        self.address = address
+
+    def send(self, data, address):
+        self.network._send(data, self.address, address)
+
+    def receive(self):
+        return self.network._receive(self.address)
+
+    def close(self):
+        pass
@@ -0,0 +1,179 @@
+"""按帧分阶段计时：环形缓冲区保存每帧各阶段耗时和实体数，可以画在游戏里，也可以导出。
+
+Game.run 在每个阶段结束时调用 mark(阶段)，一帧结束时调用 end()。
+没开启时用 NULL_PROFILER，所有方法都是空函数，几乎没有开销。
+"""
+import json
+import time
+import pygame
+import numpy as np
+from config.settings import *
+
+PHASES = ("wait", "input", "update", "collisions", "draw", "present")
+WAIT, INPUT, UPDATE, COLLISIONS, DRAW, PRESENT = range(len(PHASES))
+
+OVERLAY_EVERY = 15   # 每隔多少帧重新渲染一次叠加层
+SPARK_FRAMES = 120
+
+class FrameProfiler:
+    def __init__(self, capacity=1200):
+        self.enabled = True
+        self.capacity = capacity
+        self.phases = np.zeros((capacity, len(PHASES)), dtype=np.float64)  # 秒
+        self.starts = np.zeros(capacity, dtype=np.float64)
+        self.entities = np.zeros((capacity, 2), dtype=np.int32)  # 敌人、子弹
+        self.frames = 0
+        self.overlay = True
+        self.font = None
+        self.surface = None
+        self._origin = time.perf_counter()
+        self._row = [0.0] * len(PHASES)
+        self._start = self._last = self._origin
+
+    def begin(self):
+        self._start = self._last = time.perf_counter()
+        self._row = [0.0] * len(PHASES)
+
+    def mark(self, phase):
+        """把上一次 mark（或 begin）到现在的时间记到 phase 上。"""
+        now = time.perf_counter()
+        self._row[phase] += now - self._last
+        self._last = now
+
+    def resync(self):
+        """丢掉上一次 mark 之后的时间，例如中间阻塞在结束画面上。"""
+        self._last = time.perf_counter()
+
+    def end(self, enemies=0, bullets=0):
+        i = self.frames % self.capacity
+        self.phases[i] = self._row
+        self.starts[i] = self._start - self._origin
+        self.entities[i] = enemies, bullets
+        self.frames += 1
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+
+    def _order(self):
+        """缓冲区里有效帧的下标，从旧到新。"""
+        n = min(self.frames, self.capacity)
+        start = self.frames - n
+        return (np.arange(start, start + n) % self.capacity)
+
+    def summary(self):
+        """整帧（含等待）和工作时间（不含等待）的 p50/p95/p99，以及各阶段平均，单位毫秒。"""
+        order = self._order()
+        if not len(order):
+            return {}
+        phases = self.phases[order] * 1000
+        frame = phases.sum(axis=1)
+        work = frame - phases[:, WAIT]
+        result = {'frames': len(order)}
+        for name, values in (('frame', frame), ('work', work)):
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            result[name] = {'p50': p50, 'p95': p95, 'p99': p99}
+        result['phases'] = {name: phases[:, i].mean() for i, name in enumerate(PHASES)}
+        return result
+
+    def draw_overlay(self, renderer):
+        """在左上角画百分位数和最近 SPARK_FRAMES 帧工作时间的折线，通过 DirtyRenderer 提交。"""
+        if not self.overlay or not self.frames:
+            return
+        if self.surface is None or self.frames % OVERLAY_EVERY == 0:
+            self._render()
+        renderer.blit(self.surface, (4, 4))
+
+    def _render(self):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        stats = self.summary()
+        surface = pygame.Surface((SPARK_FRAMES * 2 + 48, 86))
+        surface.fill((20, 20, 20))
+        y = 2
+        for name in ('frame', 'work'):
+            s = stats[name]
+            text = f"{name:<5} p50 {s['p50']:5.1f}  p95 {s['p95']:5.1f}  p99 {s['p99']:5.1f} ms"
+            surface.blit(self.font.render(text, True, WHITE), (4, y))
+            y += 16
+        # 折线：满高度是两帧的时间预算，中间的线是一帧的预算
+        budget = 1000 / FPS
+        top, height = y + 2, surface.get_height() - y - 6
+        order = self._order()[-SPARK_FRAMES:]
+        work = (self.phases[order].sum(axis=1) - self.phases[order, WAIT]) * 1000
+        pygame.draw.line(surface, GRAY, (4, top + height // 2), (surface.get_width() - 4, top + height // 2))
+        if len(work) > 1:
+            ys = top + height - np.minimum(work / (2 * budget), 1.0) * height
+            points = [(4 + 2 * i, int(v)) for i, v in enumerate(ys)]
+            color = RED if stats['work']['p95'] > budget else GREEN
+            pygame.draw.lines(surface, color, False, points)
+        self.surface = surface
+
+    def export_jsonl(self, path):
+        """每帧一行：帧号、开始时间（秒）、各阶段毫秒数、实体数。"""
+        order = self._order()
+        first = self.frames - len(order)
+        with open(path, "w") as f:
+            for n, i in enumerate(order.tolist(), first):
+                row = {'frame': n, 't': round(self.starts[i], 6)}
+                row.update((name, round(self.phases[i, p] * 1000, 4)) for p, name in enumerate(PHASES))
+                row['enemies'], row['bullets'] = self.entities[i].tolist()
+                f.write(json.dumps(row) + "\n")
+
+    def export_chrome(self, path):
+        """Chrome trace-event 格式（chrome://tracing 或 Perfetto 打开），每个阶段一个 X 事件。"""
+        events = []
+        for i in self._order().tolist():
+            ts = self.starts[i] * 1e6
+            for p, name in enumerate(PHASES):
+                dur = self.phases[i, p] * 1e6
+                if dur > 0:
+                    events.append({'name': name, 'ph': "X", 'ts': round(ts, 1), 'dur': round(dur, 1),
+                                   'pid': 1, 'tid': 1})
+                ts += dur
+            enemies, bullets = self.entities[i].tolist()
+            events.append({'name': "entities", 'ph': "C", 'ts': round(self.starts[i] * 1e6, 1),
+                           'pid': 1, 'args': {'enemies': enemies, 'bullets': bullets}})
+        with open(path, "w") as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': "ms"}, f)
+
+    def export(self, path):
+        """按扩展名选择格式：.jsonl 为 JSON Lines，其他为 Chrome trace。"""
+        if path.endswith(".jsonl"):
+            self.export_jsonl(path)
+        else:
+            self.export_chrome(path)
+
+    def __str__(self):
+        s = self.summary()
+        if not s:
+            return "no frames profiled"
+        phases = ", ".join(f"{name} {ms:.2f}" for name, ms in s['phases'].items())
+        return (f"{s['frames']} frames: frame p50/p95/p99 "
+                f"{s['frame']['p50']:.1f}/{s['frame']['p95']:.1f}/{s['frame']['p99']:.1f} ms, "
+                f"work {s['work']['p50']:.1f}/{s['work']['p95']:.1f}/{s['work']['p99']:.1f} ms "
+                f"(mean ms: {phases})")
+
+class NullProfiler:
+    """关闭时使用：接口相同，什么也不做。"""
+    enabled = False
+    overlay = False
+
+    def begin(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def resync(self):
+        pass
+
+    def end(self, enemies=0, bullets=0):
+        pass
+
+    def toggle_overlay(self):
+        pass
+
+    def draw_overlay(self, renderer):
+        pass
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,78 @@
+"""脏矩形渲染：只清除和重画上一帧、这一帧画过的区域，用 display.update(rects) 提交。"""
+import pygame
+from config.settings import *
+
+class DirtyRenderer:
+    """用法：begin() 清掉上一帧画过的区域，画东西时用 blit/rect/add 记录区域，最后 present()。
+
+    脏区域面积超过屏幕的 full_ratio 时退回整屏 flip。
+    上一帧整屏 flip 过、或者画过的矩形多于 max_fills 个时，begin() 整屏 fill 一次：
+    逐个 fill 每个矩形大约 10 µs，十几个加起来就比整屏清一次还慢。
+    """
+    def __init__(self, surface, background=BLACK, full_ratio=0.5, display=True, max_fills=16):
+        self.surface = surface
+        self.background = background
+        self.full_ratio = full_ratio
+        self.max_fills = max_fills
+        self.display = display
+        self.area = surface.get_width() * surface.get_height()
+        self.previous = []
+        self.current = []
+        self.full = True
+        self.went_full = True    # 上一帧 present() 是不是整屏 flip
+        # 最近一帧的统计，供性能分析使用
+        self.last_rects = 0
+        self.last_pixels = 0
+        self.full_frames = 0
+        self.frames = 0
+
+    def invalidate(self):
+        """屏幕被别的代码整个画过（菜单、结束画面等）后调用，下一帧整屏重画。"""
+        self.full = True
+
+    def begin(self):
+        if self.full or self.went_full or len(self.previous) > self.max_fills:
+            self.surface.fill(self.background)
+        else:
+            fill = self.surface.fill
+            background = self.background
+            for rect in self.previous:
+                fill(background, rect)
+        self.current = []
+
+    def blit(self, image, rect):
+        self.current.append(self.surface.blit(image, rect))
+
+    def rect(self, color, rect, width=0):
+        self.current.append(pygame.draw.rect(self.surface, color, rect, width))
+
+    def add(self, rects):
+        """记录由其他方式画出来的区域，例如 Group.draw 之后的 spritedict.values()。"""
+        self.current.extend(rects)
+
+    def present(self):
+        dirty = self.previous + self.current
+        pixels = sum(r.w * r.h for r in dirty)
+        self.frames += 1
+        self.went_full = self.full or pixels > self.area * self.full_ratio
+        if self.went_full:
+            self.full_frames += 1
+            self.last_rects = 1
+            self.last_pixels = self.area
+            if self.display:
+                pygame.display.flip()
+        else:
+            self.last_rects = len(dirty)
+            self.last_pixels = pixels
+            if self.display:
+                pygame.display.update(dirty)
+        self.previous = self.current
+        self.full = False
+
+    def stats(self):
+        return {
+            'rects': self.last_rects,
+            'pixels': self.last_pixels,
+            'full_frames': self.full_frames,
+            'frames': self.frames,
+        }
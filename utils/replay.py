@@ -0,0 +1,125 @@
+"""紧凑的二进制回放：只记录种子、关卡和每一帧的按键，重新模拟即可得到完全相同的结果。
+
+文件格式（小端）：
+    header  magic "SAGR", version u8, variant 8s, level u8, flags u8, seed u32, invincible_ms u32
+            flags 第 0 位是 swarm，第 7 位是 AI LOD，中间几位是障碍物布局在 OBSTACLE_LAYOUTS 里的序号
+    runs    count u32，然后每段 keys u8 + length u16（连续相同按键合并成一段）
+    trailer outcome u8, ticks u32, digest u32（结束时局面的 crc32，用来校验重放是否一致）
+"""
+import os
+import struct
+import zlib
+from config.settings import OBSTACLE_LAYOUTS
+from utils.keys import encode_keys, decode_keys
+
+MAGIC = b"SAGR"
+VERSION = 1
+HEADER = struct.Struct("<4sB8sBBII")
+COUNT = struct.Struct("<I")
+RUN = struct.Struct("<BH")
+TRAILER = struct.Struct("<BII")
+MAX_RUN = 0xFFFF
+
+FLAG_SWARM = 1
+FLAG_LOD = 0x80
+LAYOUT_SHIFT = 1
+LAYOUT_MASK = 0x3F
+LAYOUTS = tuple(OBSTACLE_LAYOUTS)
+OUTCOMES = ("game_over", "victory", "quit", "timeout")
+
+def state_digest(game):
+    """对局面做一个 crc32：玩家、关卡、能量、所有敌人和子弹的位置。"""
+    enemies = game.enemies
+    if hasattr(enemies, "flush"):
+        enemies.flush()
+    parts = [struct.pack("<iiBB", game.player.x, game.player.y, game.current_level, game.player_has_power)]
+    for name, x, y in sorted((type(e).__name__, e.rect.x, e.rect.y) for e in enemies):
+        parts.append(struct.pack("<8sii", name.encode()[:8], x, y))
+    live = game.bullets.live()
+    parts.append(game.bullets.x[live].tobytes())
+    parts.append(game.bullets.y[live].tobytes())
+    return zlib.crc32(b"".join(parts))
+
+class ReplayRecorder:
+    def __init__(self, variant, level, seed, invincible_ms, swarm=False, obstacles="none", lod=False):
+        self.variant = variant
+        self.level = level
+        self.seed = seed
+        self.invincible_ms = invincible_ms
+        self.swarm = swarm
+        self.obstacles = obstacles
+        self.lod = lod
+        self.runs = []
+        self.ticks = 0
+
+    def record(self, keys):
+        bits = encode_keys(keys)
+        runs = self.runs
+        if runs and runs[-1][0] == bits and runs[-1][1] < MAX_RUN:
+            runs[-1][1] += 1
+        else:
+            runs.append([bits, 1])
+        self.ticks += 1
+
+    def truncate(self, ticks):
+        """只保留前 ticks 帧的按键（回退到那一帧以后从那里接着录）。"""
+        drop = self.ticks - ticks
+        runs = self.runs
+        while drop > 0 and runs:
+            if runs[-1][1] <= drop:
+                drop -= runs.pop()[1]
+            else:
+                runs[-1][1] -= drop
+                drop = 0
+        self.ticks = min(self.ticks, ticks)
+
+    def to_bytes(self, outcome, digest):
+        flags = FLAG_SWARM if self.swarm else 0
+        flags |= LAYOUTS.index(self.obstacles) << LAYOUT_SHIFT
+        if self.lod:
+            flags |= FLAG_LOD
+        parts = [HEADER.pack(MAGIC, VERSION, self.variant.encode(), self.level, flags,
+                             self.seed, self.invincible_ms),
+                 COUNT.pack(len(self.runs))]
+        parts.extend(RUN.pack(bits, length) for bits, length in self.runs)
+        parts.append(TRAILER.pack(OUTCOMES.index(outcome), self.ticks, digest))
+        return b"".join(parts)
+
+    def save(self, path, outcome, digest):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.to_bytes(outcome, digest))
+
+class Replay:
+    def __init__(self, data):
+        magic, version, variant, level, flags, seed, invincible_ms = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a replay file (or unsupported version)")
+        self.variant = variant.rstrip(b"\0").decode()
+        self.level = level
+        self.swarm = bool(flags & FLAG_SWARM)
+        self.obstacles = LAYOUTS[(flags >> LAYOUT_SHIFT) & LAYOUT_MASK]
+        self.lod = bool(flags & FLAG_LOD)
+        self.seed = seed
+        self.invincible_ms = invincible_ms
+        offset = HEADER.size
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        self.runs = [RUN.unpack_from(data, offset + i * RUN.size) for i in range(count)]
+        offset += count * RUN.size
+        outcome, self.ticks, self.digest = TRAILER.unpack_from(data, offset)
+        self.outcome = OUTCOMES[outcome]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def keys(self):
+        """按帧依次产生按键状态。"""
+        for bits, length in self.runs:
+            state = decode_keys(bits)
+            for _ in range(length):
+                yield state
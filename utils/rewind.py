@@ -0,0 +1,274 @@
+"""整局游戏的快照和回退：save_state() 把玩家、敌人（状态机、血量、冷却）、子弹、能量球、计时器、
+随机数和波次进度打包成一段连续的二进制，load_state() 原样恢复；恢复之后继续模拟和没有回退过完全一样。
+
+RewindBuffer 在内存预算内保存最近的快照：每组第一个是完整的关键帧，其余的只存和前一个快照的异或差，
+都用 zlib 压缩；大部分字段帧与帧之间不变，差压缩后很小。超出预算时从最旧的一组开始整组丢。
+"""
+import struct
+import zlib
+from collections import deque
+import numpy as np
+from config.settings import *
+from utils.spatial_hash import SpatialHash
+from sprites.enemy import KINDS, ShootingEnemy, StrongEnemy, CopyEnemy
+from sprites.powerup import Powerup
+from sprites.waves import WaveSpawner
+from sprites.swarm import SwarmGroup, make_enemy_group
+
+WORLD = np.dtype([('frames', '<u4'), ('ticks', '<f8'), ('level', 'u1'), ('has_power', 'u1'),
+                  ('invincible', 'u1'), ('powerup', 'u1'), ('has_gauss', 'u1'),
+                  ('invincible_until', '<i8'), ('next_powerup', '<i8'),
+                  ('player_x', '<i4'), ('player_y', '<i4'),
+                  ('powerup_x', '<i4'), ('powerup_y', '<i4'), ('powerup_sx', '<i4'), ('powerup_sy', '<i4'),
+                  ('wave_index', '<u4'), ('wave_left', '<u4'), ('wave_spawned', '<u4'), ('wave_started', '<i8'),
+                  ('gauss', '<f8'), ('bullets_dropped', '<u4'),
+                  ('copies_spawned', '<u4'), ('copies_merged', '<u4'), ('ai_tick', '<u4'), ('ai_next_phase', '<u4'),
+                  ('enemies', '<u4'), ('bullets', '<u4'), ('free', '<u4'), ('pending', '<u4')])
+RNG_WORDS = 625  # random.Random.getstate()[1]：624 个状态字加当前下标
+RNG = struct.Struct(f"<{RNG_WORDS}I")
+
+ENEMY = np.dtype([('kind', 'u1'), ('attack', 'u1'), ('hp', '<i2'), ('members', '<i4'),
+                  ('x', '<i4'), ('y', '<i4'), ('tx', '<f8'), ('ty', '<f8'),
+                  ('last_shot', '<i8'), ('last_copy', '<i8'),
+                  ('phase', '<i4'), ('dx', '<i4'), ('dy', '<i4')])  # AIScheduler 的相位和外推位移，-1 表示没在跟踪
+BULLET = np.dtype([('slot', '<u2'), ('x', '<f8'), ('y', '<f8'), ('dx', '<f8'), ('dy', '<f8'),
+                   ('px', '<f8'), ('py', '<f8')])
+PENDING = np.dtype([('enemy', '<u4'), ('count', '<u4')])
+
+CLASSES = tuple(KINDS.values())
+CODES = {cls: i for i, cls in enumerate(CLASSES)}
+UNTRACKED = (-1, 0, 0)
+
+def save_state(game):
+    """把 game 当前的局面打包成 bytes。"""
+    enemies = game.enemies
+    if isinstance(enemies, SwarmGroup):
+        enemies.flush()
+    sprites = enemies.sprites()
+    tracked = game.ai.tracked if game.ai is not None else {}
+    rows = []
+    for e in sprites:
+        tx, ty = e.target_point
+        phase, dx, dy = tracked.get(e, UNTRACKED)
+        rows.append((CODES[type(e)], e.state == "attack", getattr(e, 'hp', 0), getattr(e, 'members', 0),
+                     e.rect.x, e.rect.y, tx, ty, getattr(e, 'last_shot', 0), getattr(e, 'last_copy', 0),
+                     phase, dx, dy))
+    enemy_rows = np.array(rows, ENEMY)
+
+    pool = game.bullets
+    live = pool.live()
+    bullets = np.empty(len(live), BULLET)
+    bullets['slot'] = live
+    for name in ('x', 'y', 'dx', 'dy', 'px', 'py'):
+        bullets[name] = getattr(pool, name)[live]
+    # 空闲槽位的顺序决定以后子弹放进哪个槽，要原样保存；struct 打包整数列表比 numpy 快
+    free = pool.free
+    free_bytes = struct.pack(f"<{len(free)}H", *free)
+
+    # 还没生成的复制体按父体在敌人列表里的下标记；父体已经死了的条目本来就会被跳过
+    replication = getattr(game, 'replication', None)
+    pending = []
+    if replication is not None and replication.pending:
+        index = {e: i for i, e in enumerate(sprites)}
+        pending = [(index[parent], count) for parent, count in replication.pending if parent in index]
+    pending = np.array(pending, PENDING)
+
+    version, words, gauss = game.rng.getstate()
+    clock = game.sim_clock
+    waves = game.waves
+    powerup = game.powerup
+    ai = game.ai
+    # 一次按字段顺序构造，比逐个字段赋值快得多
+    world = np.array([(
+        clock.frames, clock.ticks, game.current_level, game.player_has_power, game.player_invincible,
+        powerup is not None, gauss is not None, game.invincible_until, game.next_powerup_time,
+        game.player.x, game.player.y,
+        *((powerup.rect.x, powerup.rect.y, powerup.speed_x, powerup.speed_y) if powerup is not None else (0, 0, 0, 0)),
+        waves.index, waves.left, waves.spawned, waves.started, gauss or 0.0, pool.dropped,
+        *((replication.spawned, replication.merged) if replication is not None else (0, 0)),
+        *((ai.tick, ai.next_phase) if ai is not None else (0, 0)),
+        len(enemy_rows), len(bullets), len(free), len(pending))], WORLD)
+    return b"".join((world.tobytes(), RNG.pack(*words), enemy_rows.tobytes(),
+                     bullets.tobytes(), free_bytes, pending.tobytes()))
+
+def _rebuild(row, pool, group, scheduler):
+    kind, attack, hp, members, x, y, tx, ty, last_shot, last_copy = row[:10]
+    cls = CLASSES[kind]
+    # 构造函数会消耗随机数，没关系：随机源最后才恢复
+    sprite = ShootingEnemy(pool, (0, 0)) if cls is ShootingEnemy else cls((0, 0))
+    sprite.rect.topleft = (x, y)
+    sprite.state = "attack" if attack else "patrol"
+    sprite.target_point = (tx, ty)
+    if cls is ShootingEnemy:
+        sprite.last_shot = last_shot
+    elif cls is StrongEnemy:
+        sprite.set_hp(hp)
+    elif cls is CopyEnemy:
+        sprite.members = members
+        sprite.last_copy = last_copy
+        sprite.enemy_group = group
+        sprite.scheduler = scheduler
+    return sprite
+
+def load_state(game, data):
+    """把 save_state() 的结果恢复到 game 上（同一个 variant、同样的 swarm/lod 设置）。"""
+    world = np.frombuffer(data, WORLD, 1)[0]
+    offset = WORLD.itemsize
+    def take(dtype, count):
+        nonlocal offset
+        array = np.frombuffer(data, dtype, count, offset)
+        offset += array.nbytes
+        return array
+    words = take('<u4', RNG_WORDS)
+    enemy_rows = take(ENEMY, int(world['enemies']))
+    bullets = take(BULLET, int(world['bullets']))
+    free = take('<u2', int(world['free']))
+    pending = take(PENDING, int(world['pending']))
+
+    game.activate()
+    clock = game.sim_clock
+    clock.frames = int(world['frames'])
+    clock.ticks = float(world['ticks'])
+    game.current_level = int(world['level'])
+    game.player.topleft = (int(world['player_x']), int(world['player_y']))
+    game.player_has_power = bool(world['has_power'])
+    game.player_invincible = bool(world['invincible'])
+    game.invincible_until = int(world['invincible_until'])
+    game.next_powerup_time = int(world['next_powerup'])
+
+    pool = game.bullets
+    pool.alive[:] = False
+    slots = bullets['slot'].astype(np.int64)
+    for name in ('x', 'y', 'dx', 'dy', 'px', 'py'):
+        getattr(pool, name)[slots] = bullets[name]
+    pool.alive[slots] = True
+    pool.free = free.tolist()
+    pool.dropped = int(world['bullets_dropped'])
+
+    group = make_enemy_group(game.swarm)
+    # 调度器沿用原来的对象，预算之类的设置不变
+    scheduler = getattr(game, 'replication', None)
+    if scheduler is not None:
+        scheduler.enemy_group = group
+        scheduler.pending.clear()
+        scheduler.spawned = int(world['copies_spawned'])
+        scheduler.merged = int(world['copies_merged'])
+    rows = enemy_rows.tolist()
+    sprites = [_rebuild(row, pool, group, scheduler) for row in rows]
+    group.add(sprites)
+    game.enemies = group
+    if scheduler is not None:
+        scheduler.pending.extend([sprites[i], count] for i, count in pending.tolist())
+    if game.ai is not None:
+        ai = game.ai
+        ai.overdue = {}
+        ai.tick = int(world['ai_tick'])
+        ai.next_phase = int(world['ai_next_phase'])
+        ai.tracked = {sprite: list(row[10:]) for sprite, row in zip(sprites, rows) if row[10] >= 0}
+
+    waves = game.waves = WaveSpawner(game.levels[game.current_level - 1], group, bullet_pool=pool, scheduler=scheduler)
+    waves.index, waves.left = int(world['wave_index']), int(world['wave_left'])
+    waves.spawned, waves.started = int(world['wave_spawned']), int(world['wave_started'])
+
+    game.powerup = None
+    if world['powerup']:
+        game.powerup = Powerup()
+        game.powerup.rect.topleft = (int(world['powerup_x']), int(world['powerup_y']))
+        game.powerup.speed_x, game.powerup.speed_y = int(world['powerup_sx']), int(world['powerup_sy'])
+
+    # 网格按敌人的顺序重建，查询结果的顺序和原来一致
+    game.grid = SpatialHash()
+    game.snapshot.clear()
+    gauss = float(world['gauss']) if world['has_gauss'] else None
+    game.rng.setstate((3, tuple(words.tolist()), gauss))
+
+def _xor(data, base):
+    """data 和 base 逐字节异或（长度按 data，base 多出来的部分忽略）；再和 base 异或一次就还原。"""
+    out = np.frombuffer(data, np.uint8).copy()
+    n = min(len(out), len(base))
+    out[:n] ^= np.frombuffer(base, np.uint8, n)
+    return out.tobytes()
+
+class RewindBuffer:
+    """按 tick 保存最近的快照，压缩后的总大小不超过 budget 字节（不算最新一个快照的原文）。
+
+    每 keyframe_every 个快照是一组：组里第一个存完整的关键帧，其余的各存和前一个快照的异或差。
+    取快照时从关键帧开始依次应用差；超出预算时整组丢掉最旧的一组。
+    """
+    def __init__(self, budget=REWIND_MEMORY_BYTES, keyframe_every=REWIND_KEYFRAME_EVERY, level=1):
+        self.budget = budget
+        self.keyframe_every = keyframe_every
+        self.level = level
+        self.groups = deque()  # [压缩的关键帧, [(tick, 压缩的差，关键帧本身是 None)], 这一组的字节数]
+        self.last = None       # 最新一个快照的原文，下一个差以它为底
+        self.bytes = 0
+        self.count = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.groups.clear()
+        self.last = None
+        self.bytes = 0
+        self.count = 0
+
+    def push(self, tick, data):
+        if self.last is None or len(self.groups[-1][1]) >= self.keyframe_every:
+            key = zlib.compress(data, self.level)
+            self.groups.append([key, [(tick, None)], len(key)])
+            size = len(key)
+        else:
+            delta = zlib.compress(_xor(data, self.last), self.level)
+            group = self.groups[-1]
+            group[1].append((tick, delta))
+            group[2] += len(delta)
+            size = len(delta)
+        self.last = data
+        self.bytes += size
+        self.count += 1
+        # 至少留下最新的一组
+        while self.bytes > self.budget and len(self.groups) > 1:
+            _, entries, size = self.groups.popleft()
+            self.bytes -= size
+            self.count -= len(entries)
+            self.evicted += len(entries)
+
+    @property
+    def oldest(self):
+        return self.groups[0][1][0][0] if self.groups else None
+
+    @property
+    def newest(self):
+        return self.groups[-1][1][-1][0] if self.groups else None
+
+    def rewind(self, tick):
+        """取出 tick 或之前最近的快照（原文），比它新的快照都丢掉，之后从这里接着存。
+        tick 比最旧的快照还早时取最旧的一个；缓冲区为空时返回 None。"""
+        groups = self.groups
+        while len(groups) > 1 and groups[-1][1][0][0] > tick:
+            _, entries, size = groups.pop()
+            self.bytes -= size
+            self.count -= len(entries)
+        if not groups:
+            return None
+        key, entries, size = groups[-1]
+        keep = 1
+        while keep < len(entries) and entries[keep][0] <= tick:
+            keep += 1
+        data = zlib.decompress(key)
+        for _, delta in entries[1:keep]:
+            data = _xor(zlib.decompress(delta), data)
+        for _, delta in entries[keep:]:
+            size -= len(delta)
+            self.bytes -= len(delta)
+        self.count -= len(entries) - keep
+        del entries[keep:]
+        groups[-1][2] = size
+        self.last = data
+        return data
+
+    def stats(self):
+        return {'snapshots': self.count, 'bytes': self.bytes, 'oldest': self.oldest,
+                'newest': self.newest, 'evicted': self.evicted}
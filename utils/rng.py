@@ -0,0 +1,16 @@
+"""模拟用的随机数：每局游戏有自己的 random.Random，精灵通过这里取随机数，方便用种子复现。"""
+import random
+
+# 模拟当前使用的随机源，默认是 random 模块自己的全局随机源
+_active = random._inst
+
+def use_rng(rng):
+    """切换全局随机源；传入 None 恢复 random 模块自己的随机源。"""
+    global _active
+    _active = rng if rng is not None else random._inst
+
+def choice(seq):
+    return _active.choice(seq)
+
+def randint(a, b):
+    return _active.randint(a, b)
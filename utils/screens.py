@@ -0,0 +1,62 @@
+"""静态画面（菜单、游戏结束、胜利）用的事件驱动等待：阻塞在 pygame.event.wait 上，不空转 CPU。"""
+import time
+import pygame
+
+IDLE_TIMEOUT = 500  # milliseconds，超时醒来一次，方便以后做定时刷新
+
+class IdleMeter:
+    """统计停留在静态画面上的真实时间、CPU 时间和被唤醒的次数。"""
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.wakeups = 0
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall += time.perf_counter() - self._wall
+        self.cpu += time.process_time() - self._cpu
+
+    def cpu_percent(self):
+        return 100 * self.cpu / self.wall if self.wall > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.wall:.1f}s idle, {self.cpu:.3f}s CPU "
+                f"({self.cpu_percent():.1f}%), {self.wakeups} wakeups")
+
+def wait_event(meter=None, timeout=IDLE_TIMEOUT):
+    """阻塞等待下一个事件；窗口被遮挡后重新露出时顺便重新提交画面。"""
+    while True:
+        event = pygame.event.wait(timeout)
+        if meter is not None:
+            meter.wakeups += 1
+        if event.type == pygame.NOEVENT:
+            continue
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            pygame.display.flip()
+            continue
+        return event
+
+def wait_for_key(keys, meter=None):
+    """阻塞直到按下 keys 里的某个键并返回它；关闭窗口时返回 None。"""
+    if meter is None:
+        meter = IdleMeter()
+    with meter:
+        while True:
+            event = wait_event(meter)
+            if event.type == pygame.QUIT:
+                return None
+            if event.type == pygame.KEYDOWN and event.key in keys:
+                return event.key
+
+def message_screen(screen, message, color, keys, meter=None):
+    """在当前画面上叠一行大字，只画一次，然后等按键。"""
+    font = pygame.font.Font(None, 74)
+    text = font.render(message, True, color)
+    text_rect = text.get_rect(center=screen.get_rect().center)
+    screen.blit(text, text_rect)
+    pygame.display.flip()
+    return wait_for_key(keys, meter)
@@ -1,19 +1,9 @@
-import pygame
+from utils.assets import AssetLoader, NullAssetLoader
 
 def load_sounds():
-    try:
-        pygame.mixer.music.load("utils/sounds/music.mp3")
-        pygame.mixer.music.set_volume(0.5)
-        pygame.mixer.music.play(-1)
-        return {
-            'victory': pygame.mixer.Sound("utils/sounds/victory.wav"),
-            'get': pygame.mixer.Sound("utils/sounds/get.wav"),
-            'nice': pygame.mixer.Sound("utils/sounds/nice.wav"),
-            'hit': pygame.mixer.Sound("utils/sounds/hit.wav")
-        }
-    except pygame.error:
-        print("Warning: Missing sounds file!")
-        return {
-            'victory': None, 'get': None,
-            'nice': None, 'hit': None
-        }
\ No newline at end of file
+    """在后台开始加载清单里的音效和背景音乐，立即返回；没加载好的音效取出来是 None。"""
+    return AssetLoader().start()
+
+def silent_sounds():
+    """无窗口运行时用：和 load_sounds() 的返回值接口一样，但什么都不加载，音效都是 None。"""
+    return NullAssetLoader()
@@ -0,0 +1,123 @@
+"""均匀网格空间哈希：碰撞检测只看附近格子里的精灵，而不是遍历全部。"""
+from collections import defaultdict
+
+class SpatialHash:
+    """按 rect 把精灵放进 cell_size 大小的格子。精灵需要有 .rect 属性。
+
+    sync() 每帧调用一次：只有跨格移动的精灵才会被重新插入，
+    已经不在传入序列里的精灵会被移除。
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = defaultdict(dict)
+        self.entries = {}  # sprite -> [cell range, insertion order, stamp]
+        self.next_order = 0
+        self.stamp = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, sprite):
+        return sprite in self.entries
+
+    def _cell_range(self, rect):
+        cs = self.cell_size
+        return (rect.left // cs, rect.top // cs,
+                (rect.right - 1) // cs, (rect.bottom - 1) // cs)
+
+    def _link(self, sprite, key):
+        x0, y0, x1, y1 = key
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cells[(cx, cy)][sprite] = None
+
+    def _unlink(self, sprite, key):
+        x0, y0, x1, y1 = key
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells[(cx, cy)]
+                del cell[sprite]
+                if not cell:
+                    del cells[(cx, cy)]
+
+    def insert(self, sprite):
+        key = self._cell_range(sprite.rect)
+        self.entries[sprite] = [key, self.next_order, self.stamp]
+        self.next_order += 1
+        self._link(sprite, key)
+
+    def remove(self, sprite):
+        entry = self.entries.pop(sprite, None)
+        if entry is not None:
+            self._unlink(sprite, entry[0])
+
+    def move(self, sprite):
+        """精灵移动后调用；没有跨格时什么都不做。"""
+        entry = self.entries.get(sprite)
+        if entry is None:
+            self.insert(sprite)
+            return
+        entry[2] = self.stamp
+        key = self._cell_range(sprite.rect)
+        if key != entry[0]:
+            self._unlink(sprite, entry[0])
+            self._link(sprite, key)
+            entry[0] = key
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+        self.next_order = 0
+
+    def rebuild(self, sprites):
+        self.clear()
+        for sprite in sprites:
+            self.insert(sprite)
+
+    def sync(self, sprites):
+        """增量更新：插入新精灵、移动跨格的精灵、删除不在 sprites 里的精灵。"""
+        self.stamp += 1
+        seen = 0
+        for sprite in sprites:
+            self.move(sprite)
+            seen += 1
+        if len(self.entries) != seen:
+            stamp = self.stamp
+            for sprite in [s for s, e in self.entries.items() if e[2] != stamp]:
+                self.remove(sprite)
+
+    def query(self, rect):
+        """返回与 rect 在同一格子里的候选精灵（粗检测），按插入顺序排列。"""
+        x0, y0, x1, y1 = self._cell_range(rect)
+        cells = self.cells
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        if len(found) > 1:
+            entries = self.entries
+            return sorted(found, key=lambda s: entries[s][1])
+        return list(found)
+
+    def collide(self, rect):
+        """返回 rect 与之真正相交的精灵，按插入顺序排列。"""
+        return [s for s in self.query(rect) if rect.colliderect(s.rect)]
+
+    def pairs(self):
+        """所有相交的精灵对（例如敌人之间），每对只返回一次。"""
+        entries = self.entries
+        result = set()
+        for cell in self.cells.values():
+            if len(cell) < 2:
+                continue
+            members = list(cell)
+            for i, a in enumerate(members):
+                ra = a.rect
+                for b in members[i + 1:]:
+                    if ra.colliderect(b.rect):
+                        result.add((a, b) if entries[a][1] < entries[b][1] else (b, a))
+        return list(result)
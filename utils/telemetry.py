@@ -0,0 +1,223 @@
+"""二进制遥测事件流：拾取能量、打强敌、击杀、挡子弹、换关、死亡、通关、画质换档。
+
+每条事件是 16 字节的定长记录（EVENT）。游戏线程只往单生产者单消费者的环形缓冲区里写一条，
+不加锁也不做 I/O；后台线程按批写进文件，文件满 TELEMETRY_FILE_BYTES 就换下一个。
+文件是一个 HEADER 加上连续的记录，load() 用 mmap 直接映射成 NumPy 数组，扫几百万条也很快。
+"""
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+import numpy as np
+from config.settings import *
+from sprites.enemy import KINDS
+
+EVENT = np.dtype([('tick', '<u4'),    # 本局第几个模拟 tick
+                  ('kind', 'u1'),     # 事件类型，见下面
+                  ('level', 'u1'),
+                  ('arg', '<u2'),     # 敌人种类编号、新关卡等，看事件类型
+                  ('x', '<i2'),       # 事件发生的位置（中心点）
+                  ('y', '<i2'),
+                  ('value', '<i4')])  # 剩余血量、剩余敌人数等
+
+# QUALITY：自适应画质换档（--governor），arg 是新档位，value 是触发换档的平均工作时间（微秒）
+POWERUP, STRONG_HIT, KILL, BULLET_HIT, LEVEL, DEATH, VICTORY, QUALITY = range(1, 9)
+EVENT_NAMES = {POWERUP: "powerup", STRONG_HIT: "strong_hit", KILL: "kill", BULLET_HIT: "bullet_hit",
+               LEVEL: "level", DEATH: "death", VICTORY: "victory", QUALITY: "quality"}
+
+# arg 里的敌人种类编号；0 表示子弹（DEATH 事件被子弹打死时）
+BULLET = 0
+KIND_CODES = {cls: i for i, cls in enumerate(KINDS.values(), 1)}
+KIND_NAMES = {0: "bullet", **{i: name for i, name in enumerate(KINDS, 1)}}
+
+MAGIC = b"GTEL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")  # magic, 版本, 记录大小, 文件创建时间（微秒）
+
+def kind_code(enemy):
+    return KIND_CODES.get(type(enemy), 0)
+
+def health(enemy):
+    """还能挨几下：强敌的血量，合并过的复制敌人的成员数。"""
+    return getattr(enemy, 'hp', getattr(enemy, 'members', 0))
+
+class EventRing:
+    """单生产者单消费者的环形缓冲区。游戏线程只改 head，写线程只改 tail，都是单调递增的整数，
+    所以不需要锁；满了就丢掉新事件并计数，游戏线程永远不会等。"""
+    def __init__(self, capacity=TELEMETRY_CAPACITY):
+        if capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self.records = np.zeros(capacity, EVENT)
+        self.mask = capacity - 1
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+
+    def push(self, record):
+        head = self.head
+        if head - self.tail > self.mask:
+            self.dropped += 1
+            return False
+        self.records[head & self.mask] = record
+        # 记录写完之后才移动 head，写线程看到的都是完整的记录
+        self.head = head + 1
+        return True
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def drain(self):
+        """取走目前所有的记录（拷贝），没有时返回 None。只能在写线程里调用。"""
+        head, tail = self.head, self.tail
+        if head == tail:
+            return None
+        start, end = tail & self.mask, head & self.mask
+        if start < end:
+            batch = self.records[start:end].copy()
+        else:
+            batch = np.concatenate((self.records[start:], self.records[:end]))
+        self.tail = head
+        return batch
+
+class Telemetry:
+    """record() 在游戏线程里调用；后台线程每 flush_s 秒（缓冲区过半时提前）把记录追加到
+    directory/events-<时间>-<pid>-NNNN.bin，一个文件超过 max_bytes 换下一个。"""
+    def __init__(self, directory, capacity=TELEMETRY_CAPACITY, flush_s=TELEMETRY_FLUSH_S,
+                 max_bytes=TELEMETRY_FILE_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.prefix = os.path.join(directory, time.strftime("events-%Y%m%d-%H%M%S") + f"-{os.getpid()}")
+        self.ring = EventRing(capacity)
+        self.flush_s = flush_s
+        self.max_bytes = max_bytes
+        self.high_water = capacity // 2
+        self.files = []
+        self.file = None
+        self.file_bytes = 0
+        self.written = 0
+        self.closing = False
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self.thread.start()
+
+    @property
+    def enabled(self):
+        return True
+
+    def emit(self, tick, kind, level, arg=0, x=0, y=0, value=0):
+        self.ring.push((tick, kind, level, arg, x, y, value))
+        if len(self.ring) >= self.high_water:
+            self.wake.set()
+
+    def record(self, game, kind, pos, arg=0, value=0):
+        """以 game 当前的 tick 和关卡记一条事件。"""
+        self.emit(game.sim_clock.frames, kind, game.current_level, arg, pos[0], pos[1], value)
+
+    def _run(self):
+        while not self.closing:
+            self.wake.wait(self.flush_s)
+            self.wake.clear()
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        batch = self.ring.drain()
+        if batch is None:
+            return
+        if self.file is None or self.file_bytes + batch.nbytes > self.max_bytes:
+            self._rotate()
+        self.file.write(batch.tobytes())
+        # 让正在跑的游戏的文件也能随时读
+        self.file.flush()
+        self.file_bytes += batch.nbytes
+        self.written += len(batch)
+
+    def _rotate(self):
+        if self.file is not None:
+            self.file.close()
+        path = f"{self.prefix}-{len(self.files):04d}.bin"
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, EVENT.itemsize, int(time.time() * 1e6)))
+        self.file_bytes = HEADER.size
+        self.files.append(path)
+
+    def close(self):
+        """写完缓冲区里剩下的记录并停掉后台线程。"""
+        if self.closing:
+            return
+        self.closing = True
+        self.wake.set()
+        self.thread.join()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def stats(self):
+        return {'written': self.written, 'dropped': self.ring.dropped, 'files': list(self.files)}
+
+class NullTelemetry:
+    """不记录时用的空实现。"""
+    enabled = False
+    def emit(self, *args, **kwargs): pass
+    def record(self, *args, **kwargs): pass
+    def close(self): pass
+
+NULL_TELEMETRY = NullTelemetry()
+
+def load(path):
+    """把一个事件文件 mmap 成 EVENT 数组（只读，不拷贝）；正在写的文件末尾不完整的记录会被忽略。"""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= HEADER.size:
+            return np.zeros(0, EVENT)
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, record_size, _ = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != VERSION or record_size != EVENT.itemsize:
+        raise ValueError(f"{path}: not a version {VERSION} telemetry file")
+    count = (size - HEADER.size) // record_size
+    return np.frombuffer(mapped, EVENT, count, HEADER.size)
+
+def event_files(paths):
+    """paths 里的文件和目录（目录下所有 *.bin），按名字排序。"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "*.bin")))
+        else:
+            files.append(path)
+    return sorted(files)
+
+def aggregate(paths, cell=100):
+    """扫描所有文件：各类事件数、每关的事件数、击杀和死亡按敌人种类的分布、死亡位置热图（cell 像素一格）。"""
+    kinds = np.zeros(256, np.int64)
+    per_level = np.zeros((256, 256), np.int64)
+    kills = np.zeros(1 << 16, np.int64)
+    deaths = np.zeros(1 << 16, np.int64)
+    heat = np.zeros((SCREEN_HEIGHT // cell + 1, SCREEN_WIDTH // cell + 1), np.int64)
+    total = 0
+    files = event_files(paths)
+    for path in files:
+        events = load(path)
+        if not len(events):
+            continue
+        total += len(events)
+        kind = events['kind']
+        kinds += np.bincount(kind, minlength=256)
+        per_level += np.bincount(events['level'].astype(np.int64) * 256 + kind, minlength=256 * 256).reshape(256, 256)
+        kills += np.bincount(events['arg'][kind == KILL], minlength=1 << 16)
+        dead = events[kind == DEATH]
+        deaths += np.bincount(dead['arg'], minlength=1 << 16)
+        rows = np.clip(dead['y'] // cell, 0, heat.shape[0] - 1).astype(np.int64)
+        cols = np.clip(dead['x'] // cell, 0, heat.shape[1] - 1).astype(np.int64)
+        heat += np.bincount(rows * heat.shape[1] + cols, minlength=heat.size).reshape(heat.shape)
+    return {
+        'files': len(files),
+        'events': total,
+        'kinds': {EVENT_NAMES.get(k, str(k)): int(n) for k, n in enumerate(kinds) if n},
+        'levels': {int(level): {EVENT_NAMES.get(k, str(k)): int(n) for k, n in enumerate(row) if n}
+                   for level, row in enumerate(per_level) if row.any()},
+        'kills': {KIND_NAMES.get(k, str(k)): int(n) for k, n in enumerate(kills) if n},
+        'deaths': {KIND_NAMES.get(k, str(k)): int(n) for k, n in enumerate(deaths) if n},
+        'death_heatmap': heat.tolist(),
+    }